@@ -15,9 +15,17 @@ config.set_main_option("sqlalchemy.url", get_url())
 
 target_metadata = Base.metadata
 
+def include_object(obj, name, type_, reflected, compare_to):
+    # Full-text search objects are managed by app.db.search, not the models
+    if type_ == "table" and name.startswith("listings_fts"):
+        return False
+    if type_ == "column" and name == "search_vector":
+        return False
+    return True
+
 def run_migrations_offline():
     url = config.get_main_option("sqlalchemy.url")
-    context.configure(url=url, target_metadata=target_metadata, literal_binds=True)
+    context.configure(url=url, target_metadata=target_metadata, literal_binds=True, include_object=include_object)
     with context.begin_transaction():
         context.run_migrations()
 
@@ -28,7 +36,7 @@ def run_migrations_online():
         poolclass=pool.NullPool
     )
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
         with context.begin_transaction():
             context.run_migrations()
 
@@ -0,0 +1,27 @@
+"""add listing geohash
+
+Revision ID: a1c5e8f03d92
+Revises: f4a8d2c61b37
+Create Date: 2026-10-17 14:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a1c5e8f03d92"
+down_revision = "f4a8d2c61b37"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("listings", sa.Column("geohash", sa.String(length=12), nullable=True))
+    op.create_index("ix_listings_geohash", "listings", ["geohash"])
+    # Filled in by the geocode_missing_listings task (from the geocode cache)
+
+
+def downgrade():
+    op.drop_index("ix_listings_geohash", table_name="listings")
+    op.drop_column("listings", "geohash")
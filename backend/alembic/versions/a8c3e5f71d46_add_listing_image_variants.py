@@ -0,0 +1,25 @@
+"""add listing image variants
+
+Revision ID: a8c3e5f71d46
+Revises: f2b9d4e16c73
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a8c3e5f71d46"
+down_revision = "f2b9d4e16c73"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing listings are filled in by the generate_missing_image_variants beat task
+    op.add_column("listings", sa.Column("image_variants", sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("listings", "image_variants")
@@ -0,0 +1,34 @@
+"""add content-addressed upload blobs
+
+Revision ID: b4d7f2a90c15
+Revises: a8c3e5f71d46
+Create Date: 2026-10-18 00:20:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b4d7f2a90c15"
+down_revision = "a8c3e5f71d46"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "upload_blobs",
+        sa.Column("sha256", sa.String(length=64), primary_key=True),
+        sa.Column("url", sa.String(length=255), nullable=False, unique=True),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("content_type", sa.String(length=64), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_upload_blobs_ref_count", "upload_blobs", ["ref_count", "created_at"])
+
+
+def downgrade():
+    op.drop_index("ix_upload_blobs_ref_count", table_name="upload_blobs")
+    op.drop_table("upload_blobs")
@@ -0,0 +1,64 @@
+"""add parsed listing available date
+
+Revision ID: b6d2f9e4c518
+Revises: a1c5e8f03d92
+Create Date: 2026-10-17 16:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b6d2f9e4c518"
+down_revision = "a1c5e8f03d92"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade():
+    from app.utils.dates import parse_available_from
+
+    op.add_column("listings", sa.Column("available_date", sa.Date(), nullable=True))
+    op.add_column(
+        "listings",
+        sa.Column("available_flexible", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    op.create_index("ix_listings_available_date", "listings", ["available_date"])
+
+    # Backfill: parse every existing available_from once
+    listings = sa.table(
+        "listings",
+        sa.column("id", sa.Integer),
+        sa.column("available_from", sa.String),
+        sa.column("created_at", sa.DateTime),
+        sa.column("available_date", sa.Date),
+        sa.column("available_flexible", sa.Boolean),
+    )
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(listings.c.id, listings.c.available_from, listings.c.created_at)
+    ).fetchall()
+    update = (
+        listings.update()
+        .where(listings.c.id == sa.bindparam("listing_id"))
+        .values(available_date=sa.bindparam("parsed_date"), available_flexible=sa.bindparam("flexible"))
+    )
+    params = []
+    for listing_id, available_from, created_at in rows:
+        # "Immediately" and year-less dates are relative to when the listing was written
+        parsed_date, flexible = parse_available_from(
+            available_from or "", created_at.date() if created_at else None
+        )
+        if parsed_date is not None:
+            params.append({"listing_id": listing_id, "parsed_date": parsed_date, "flexible": flexible})
+    for start in range(0, len(params), BATCH_SIZE):
+        conn.execute(update, params[start:start + BATCH_SIZE])
+
+
+def downgrade():
+    op.drop_index("ix_listings_available_date", table_name="listings")
+    op.drop_column("listings", "available_flexible")
+    op.drop_column("listings", "available_date")
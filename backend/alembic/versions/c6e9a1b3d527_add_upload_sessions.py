@@ -0,0 +1,36 @@
+"""add resumable upload sessions
+
+Revision ID: c6e9a1b3d527
+Revises: b4d7f2a90c15
+Create Date: 2026-10-18 00:40:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c6e9a1b3d527"
+down_revision = "b4d7f2a90c15"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "upload_sessions",
+        sa.Column("id", sa.String(length=32), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("policy", sa.String(length=32), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("chunk_size", sa.Integer(), nullable=False),
+        sa.Column("sha256", sa.String(length=64), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_upload_sessions_expires_at", "upload_sessions", ["expires_at"])
+
+
+def downgrade():
+    op.drop_index("ix_upload_sessions_expires_at", table_name="upload_sessions")
+    op.drop_table("upload_sessions")
@@ -0,0 +1,35 @@
+"""add per-renter listing scores
+
+Revision ID: c9e1a7b35f04
+Revises: b6d2f9e4c518
+Create Date: 2026-10-17 18:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c9e1a7b35f04"
+down_revision = "b6d2f9e4c518"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "listing_scores",
+        sa.Column("renter_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("listing_id", sa.Integer(), sa.ForeignKey("listings.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("scored_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_listing_scores_renter_score", "listing_scores", ["renter_id", "score", "listing_id"])
+    op.create_index("ix_listing_scores_listing_id", "listing_scores", ["listing_id"])
+    # Filled in by the refresh_all_listing_scores task (or on a renter's first sorted request)
+
+
+def downgrade():
+    op.drop_index("ix_listing_scores_listing_id", table_name="listing_scores")
+    op.drop_index("ix_listing_scores_renter_score", table_name="listing_scores")
+    op.drop_table("listing_scores")
@@ -0,0 +1,31 @@
+"""add score versions for the score cache
+
+Revision ID: d3f8b2c67a19
+Revises: c9e1a7b35f04
+Create Date: 2026-10-17 20:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d3f8b2c67a19"
+down_revision = "c9e1a7b35f04"
+branch_labels = None
+depends_on = None
+
+TABLES = ["renter_preferences", "landlord_preferences", "listings"]
+
+
+def upgrade():
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column("score_version", sa.Integer(), nullable=False, server_default="1"),
+        )
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_column(table, "score_version")
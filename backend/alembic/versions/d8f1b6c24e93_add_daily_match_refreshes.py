@@ -0,0 +1,29 @@
+"""add daily match refresh markers
+
+Revision ID: d8f1b6c24e93
+Revises: c6e9a1b3d527
+Create Date: 2026-10-18 01:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d8f1b6c24e93"
+down_revision = "c6e9a1b3d527"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "daily_match_refreshes",
+        sa.Column("renter_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("matched_date", sa.Date(), primary_key=True),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("daily_match_refreshes")
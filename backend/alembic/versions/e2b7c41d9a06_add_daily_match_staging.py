@@ -0,0 +1,36 @@
+"""add daily match staging table
+
+Revision ID: e2b7c41d9a06
+Revises: c3f3e9d1e5ab
+Create Date: 2026-10-17 09:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e2b7c41d9a06"
+down_revision = "c3f3e9d1e5ab"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "daily_match_staging",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("run_id", sa.String(length=32), nullable=False),
+        sa.Column("renter_id", sa.Integer(), nullable=False),
+        sa.Column("listing_id", sa.Integer(), nullable=False),
+        sa.Column("compatibility_score", sa.Float(), nullable=False),
+        sa.Column("matched_date", sa.Date(), nullable=False),
+    )
+    op.create_index("ix_daily_match_staging_id", "daily_match_staging", ["id"])
+    op.create_index("ix_daily_match_staging_run_id", "daily_match_staging", ["run_id"])
+
+
+def downgrade():
+    op.drop_index("ix_daily_match_staging_run_id", table_name="daily_match_staging")
+    op.drop_index("ix_daily_match_staging_id", table_name="daily_match_staging")
+    op.drop_table("daily_match_staging")
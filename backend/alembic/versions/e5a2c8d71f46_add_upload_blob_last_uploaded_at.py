@@ -0,0 +1,32 @@
+"""add upload blob last_uploaded_at
+
+Revision ID: e5a2c8d71f46
+Revises: d8f1b6c24e93
+Create Date: 2026-10-18 01:20:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e5a2c8d71f46"
+down_revision = "d8f1b6c24e93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "upload_blobs",
+        sa.Column("last_uploaded_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.execute("UPDATE upload_blobs SET last_uploaded_at = created_at")
+    op.drop_index("ix_upload_blobs_ref_count", table_name="upload_blobs")
+    op.create_index("ix_upload_blobs_ref_count", "upload_blobs", ["ref_count", "last_uploaded_at"])
+
+
+def downgrade():
+    op.drop_index("ix_upload_blobs_ref_count", table_name="upload_blobs")
+    op.create_index("ix_upload_blobs_ref_count", "upload_blobs", ["ref_count", "created_at"])
+    op.drop_column("upload_blobs", "last_uploaded_at")
@@ -0,0 +1,28 @@
+"""add full-text search over listings
+
+Revision ID: e7a4c1d95b28
+Revises: d3f8b2c67a19
+Create Date: 2026-10-17 22:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "e7a4c1d95b28"
+down_revision = "d3f8b2c67a19"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    from app.db.search import ensure_listing_search
+
+    # FTS5 table + triggers on SQLite, generated tsvector + GIN on Postgres
+    ensure_listing_search(op.get_bind())
+
+
+def downgrade():
+    from app.db.search import drop_listing_search
+
+    drop_listing_search(op.get_bind())
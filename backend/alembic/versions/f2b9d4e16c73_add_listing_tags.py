@@ -0,0 +1,81 @@
+"""add indexed listing tags and amenity bitmasks
+
+Revision ID: f2b9d4e16c73
+Revises: e7a4c1d95b28
+Create Date: 2026-10-17 23:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f2b9d4e16c73"
+down_revision = "e7a4c1d95b28"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade():
+    from types import SimpleNamespace
+
+    from app.utils.tags import AMENITY_BITS, FEATURE_BITS, TAG_KINDS, listing_tag_values, tag_mask
+
+    op.create_table(
+        "listing_tags",
+        sa.Column("listing_id", sa.Integer(), sa.ForeignKey("listings.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("kind", sa.String(length=16), primary_key=True),
+        sa.Column("value", sa.String(length=128), primary_key=True),
+    )
+    op.create_index("ix_listing_tags_kind_value", "listing_tags", ["kind", "value", "listing_id"])
+    op.add_column("listings", sa.Column("amenity_mask", sa.BigInteger(), nullable=False, server_default="0"))
+    op.add_column("listings", sa.Column("feature_mask", sa.BigInteger(), nullable=False, server_default="0"))
+
+    # Backfill both forms from the JSON columns
+    listings = sa.table(
+        "listings",
+        sa.column("id", sa.Integer),
+        sa.column("amenities", sa.JSON),
+        sa.column("building_features", sa.JSON),
+        sa.column("custom_tags", sa.JSON),
+        sa.column("neighborhood_profile", sa.JSON),
+        sa.column("amenity_mask", sa.BigInteger),
+        sa.column("feature_mask", sa.BigInteger),
+    )
+    listing_tags = sa.table(
+        "listing_tags",
+        sa.column("listing_id", sa.Integer),
+        sa.column("kind", sa.String),
+        sa.column("value", sa.String),
+    )
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(*[listings.c[name] for name in ("id", *TAG_KINDS.values())])
+    ).mappings().fetchall()
+    update = (
+        listings.update()
+        .where(listings.c.id == sa.bindparam("listing_id"))
+        .values(amenity_mask=sa.bindparam("amenities_bits"), feature_mask=sa.bindparam("features_bits"))
+    )
+    masks, tags = [], []
+    for row in rows:
+        masks.append({
+            "listing_id": row["id"],
+            "amenities_bits": tag_mask(row["amenities"], AMENITY_BITS),
+            "features_bits": tag_mask(row["building_features"], FEATURE_BITS),
+        })
+        for kind, values in listing_tag_values(SimpleNamespace(**row)).items():
+            tags.extend({"listing_id": row["id"], "kind": kind, "value": v} for v in values)
+    for start in range(0, len(masks), BATCH_SIZE):
+        conn.execute(update, masks[start:start + BATCH_SIZE])
+    for start in range(0, len(tags), BATCH_SIZE):
+        conn.execute(listing_tags.insert(), tags[start:start + BATCH_SIZE])
+
+
+def downgrade():
+    op.drop_column("listings", "feature_mask")
+    op.drop_column("listings", "amenity_mask")
+    op.drop_index("ix_listing_tags_kind_value", table_name="listing_tags")
+    op.drop_table("listing_tags")
@@ -0,0 +1,35 @@
+"""add geocode cache and listing coordinates
+
+Revision ID: f4a8d2c61b37
+Revises: e2b7c41d9a06
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f4a8d2c61b37"
+down_revision = "e2b7c41d9a06"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "geocode_cache",
+        sa.Column("address_key", sa.String(length=255), primary_key=True),
+        sa.Column("latitude", sa.Float(), nullable=True),
+        sa.Column("longitude", sa.Float(), nullable=True),
+        sa.Column("geocoded_at", sa.DateTime(), nullable=False),
+    )
+    op.add_column("listings", sa.Column("latitude", sa.Float(), nullable=True))
+    op.add_column("listings", sa.Column("longitude", sa.Float(), nullable=True))
+    # Existing listings are geocoded by the geocode_missing_listings task
+
+
+def downgrade():
+    op.drop_column("listings", "longitude")
+    op.drop_column("listings", "latitude")
+    op.drop_table("geocode_cache")
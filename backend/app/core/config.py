@@ -10,6 +10,28 @@ class Settings(BaseSettings):
     FRONTEND_URL: str = "http://localhost:3000"
     USE_ML_MATCHING: bool = True
     USE_SEMANTIC_MATCHING: bool = False
+    SEMANTIC_SEARCH_TIMEOUT_S: float = 5.0  # API wait for the worker running a semantic search query
+    EMBEDDING_STORE_DIR: str = "data/embeddings"
+    EMBEDDING_STORE_DTYPE: str = "float16"  # or "int8"
+    ML_MODEL_WARMUP: bool = False  # load the embedding model when a Celery worker boots
+    MATCHES_PER_RENTER: int = 3
+    MATCH_SHARD_SIZE: int = 500  # renters per Celery scoring task
+    MATCH_SHARD_MAX_RETRIES: int = 3
+    MATCH_SNAPSHOT_TTL_S: int = 6 * 60 * 60  # nightly run's listing snapshot in Redis, dropped when the run ends
+    MATCH_INCREMENTAL_UPDATES: bool = True  # recompute matches when prefs/listings change
+    MATCH_CASCADE_CANDIDATES: int = 50  # per renter, rule-score top-N sent to ML stages; 0 = all
+    MATCH_CASCADE_AUDIT_RATE: float = 0.01  # share of renters also ranked exhaustively
+    LISTING_SCORE_MAX_AGE_HOURS: int = 24  # older sort-by-match scores trigger a refresh
+    SCORE_CACHE_SIZE: int = 50000  # in-process compatibility score cache entries
+    SCORE_CACHE_REDIS_URL: Optional[str] = None  # optional shared tier, e.g. redis://localhost:6379/1
+    SCORE_CACHE_TTL_S: int = 60 * 60 * 24
+    LISTINGS_PAYLOAD_CACHE_TTL_S: int = 30  # serialized anonymous GET /api/listings bodies
+    UPLOAD_CHUNK_SIZE: int = 64 * 1024  # bytes per read/write while streaming an upload
+    UPLOAD_MAX_IMAGE_BYTES: int = 10 * 1024 * 1024
+    UPLOAD_MAX_DOCUMENT_BYTES: int = 20 * 1024 * 1024
+    UPLOAD_ORPHAN_GRACE_HOURS: int = 24  # unreferenced blobs younger than this are kept
+    UPLOAD_SESSION_CHUNK_SIZE: int = 1024 * 1024  # bytes per chunk of a resumable upload
+    UPLOAD_SESSION_TTL_HOURS: int = 24  # resumable uploads expire this long after their last chunk
 
     @validator("ACCESS_TOKEN_EXPIRE_MINUTES", pre=True)
     def cast_to_int(cls, v):
@@ -0,0 +1,112 @@
+# app/core/responses.py
+"""
+Fast JSON responses for high-volume endpoints.
+
+FastAPI validates a route's return value against its response_model and
+then runs jsonable_encoder over every field. List endpoints skip both:
+they build plain dicts (app.schemas serializers) and return a
+FastJSONResponse, which serializes with orjson when it is installed. The
+response_model stays on the route for the OpenAPI docs only.
+
+Payloads shared by many requests can be rendered to bytes once and kept
+in a PayloadCache; FastJSONResponse sends bytes unchanged.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Hashable, Iterable, Optional, Type
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to the standard library
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (date, datetime)):  # stdlib fallback only; orjson handles these
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes (orjson if available)."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def orm_dict(obj, model: Type[BaseModel], exclude: Iterable[str] = ()) -> dict:
+    """
+    model.from_orm(obj).dict(by_alias=True) for a model of plain fields,
+    read straight off the object without validation. Nested models are
+    left to the caller (pass them in `exclude`).
+    """
+    exclude = set(exclude)
+    return {
+        field.alias: getattr(obj, field.alias, field.default)
+        for name, field in model.__fields__.items()
+        if name not in exclude
+    }
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by `dumps`; bytes content is sent as already-serialized JSON."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+class PayloadCache:
+    """Serialized response bodies by key, each kept for `ttl` seconds (LRU beyond `maxsize`)."""
+
+    def __init__(self, ttl: float = 30.0, maxsize: int = 64):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, body = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: Hashable, body: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_render(self, key: Hashable, build: Callable[[], Any]) -> bytes:
+        """Cached body for `key`, or serialize build() and cache it."""
+        body = self.get(key)
+        if body is None:
+            body = dumps(build())
+            self.put(key, body)
+        return body
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,211 @@
+# app/core/static.py
+"""
+Static serving for uploaded media.
+
+MediaFiles is StaticFiles with HTTP caching done properly:
+- files under the `immutable` directories (content-addressed names) are
+  sent with a one-year `immutable` Cache-Control, so browsers and CDNs
+  never revalidate them; everything else must be revalidated;
+- ETags are strong: the content hash for content-addressed files, the
+  modification time and size otherwise. If-None-Match answers 304;
+- single byte ranges (Range / If-Range) answer 206, so interrupted
+  downloads of large media resume instead of restarting;
+- a precompressed sibling (`<file>.br`, `<file>.gz`) is sent instead of
+  the file to clients that accept its encoding.
+Dot-prefixed paths (in-progress uploads) are never served.
+"""
+
+import os
+import stat
+from email.utils import formatdate, parsedate
+from mimetypes import guess_type
+from typing import Iterable, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+# Content-Encoding -> suffix of the precompressed sibling, in order of preference
+PRECOMPRESSED = {"br": ".br", "gzip": ".gz"}
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (first, last) byte positions of a single-range Range header, or None
+    to ignore it and send the whole file (malformed, or several ranges).
+    Raises RangeNotSatisfiable for ranges outside the file.
+    """
+    unit, _, spec = header.partition("=")
+    first, sep, last = spec.strip().partition("-")
+    if unit.strip().lower() != "bytes" or not sep or "," in spec:
+        return None
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0:
+                raise RangeNotSatisfiable(header)
+            return max(0, size - suffix), size - 1
+        start = int(first)
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if start < 0 or (end is not None and end < start):
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+def _accepted_encodings(header: Optional[str]) -> set:
+    accepted = set()
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class FileRangeResponse(FileResponse):
+    """206 response with bytes first..last (inclusive) of a file."""
+
+    def __init__(self, path, first: int, last: int, stat_result: os.stat_result, **kwargs):
+        super().__init__(path, status_code=206, stat_result=stat_result, **kwargs)
+        self.first = first
+        self.last = last
+        self.headers["content-range"] = f"bytes {first}-{last}/{stat_result.st_size}"
+        self.headers["content-length"] = str(last - first + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        remaining = self.last - self.first + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.first)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:  # truncated underneath us
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class MediaFiles(StaticFiles):
+    def __init__(self, *, directory, immutable: Iterable[str] = (), **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.immutable = tuple(immutable)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if any(part.startswith(".") for part in path.split(os.sep) if part != "."):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def _is_immutable(self, full_path) -> bool:
+        relative = os.path.relpath(full_path, os.path.realpath(self.directory))
+        return relative.split(os.sep, 1)[0] in self.immutable
+
+    @staticmethod
+    def _etag(full_path, stat_result: os.stat_result, immutable: bool) -> str:
+        if immutable:
+            # Content-addressed: the name (hash-derived) identifies the bytes
+            return '"' + os.path.splitext(os.path.basename(full_path))[0] + '"'
+        return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+    def _precompressed(self, full_path, request_headers: Headers):
+        """(encoding, path, stat) of the sibling to send, and whether any sibling exists."""
+        accepted = _accepted_encodings(request_headers.get("accept-encoding"))
+        chosen, exists = None, False
+        for encoding, suffix in PRECOMPRESSED.items():
+            try:
+                sibling_stat = os.stat(f"{full_path}{suffix}")
+            except OSError:
+                continue
+            if not stat.S_ISREG(sibling_stat.st_mode):
+                continue
+            exists = True
+            if chosen is None and encoding in accepted:
+                chosen = (encoding, f"{full_path}{suffix}", sibling_stat)
+        return chosen, exists
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        method = scope["method"]
+        request_headers = Headers(scope=scope)
+        immutable = self._is_immutable(full_path)
+        etag = self._etag(full_path, stat_result, immutable)
+        headers = {
+            "cache-control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+            "accept-ranges": "bytes",
+        }
+        media_type = guess_type(str(full_path))[0] or "application/octet-stream"
+
+        range_header = request_headers.get("range")
+        if range_header and not self._if_range_matches(request_headers, etag, stat_result):
+            range_header = None
+        path = full_path
+        encoded, has_siblings = self._precompressed(full_path, request_headers)
+        if has_siblings:
+            headers["vary"] = "Accept-Encoding"
+        if encoded and range_header is None:  # ranges are served from the identity file
+            encoding, path, stat_result = encoded
+            headers["content-encoding"] = encoding
+            etag = f'{etag[:-1]}-{encoding}"'  # strong ETags differ per representation
+        headers["etag"] = etag
+
+        response = FileResponse(
+            path, status_code=status_code, headers=headers, media_type=media_type,
+            stat_result=stat_result, method=method,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        if range_header is None:
+            return response
+        try:
+            span = byte_range(range_header, stat_result.st_size)
+        except RangeNotSatisfiable:
+            headers["content-range"] = f"bytes */{stat_result.st_size}"
+            return Response(status_code=416, headers=headers)
+        if span is None:
+            return response
+        return FileRangeResponse(
+            path, *span, stat_result=stat_result, headers=headers, media_type=media_type, method=method,
+        )
+
+    @staticmethod
+    def _if_range_matches(request_headers: Headers, etag: str, stat_result: os.stat_result) -> bool:
+        if_range = request_headers.get("if-range")
+        if if_range is None:
+            return True
+        if if_range.startswith('"'):
+            return if_range == etag  # strong comparison
+        return if_range == formatdate(stat_result.st_mtime, usegmt=True)
+
+    def is_not_modified(self, response_headers: Headers, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            # Weak comparison; If-Modified-Since is ignored when If-None-Match is present
+            etag = response_headers.get("etag", "").removeprefix("W/")
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = parsedate(request_headers.get("if-modified-since", ""))
+        last_modified = parsedate(response_headers.get("last-modified", ""))
+        return if_modified_since is not None and last_modified is not None and if_modified_since >= last_modified
@@ -1,9 +1,33 @@
 # app/crud/listings.py
-from sqlalchemy.orm import Session, joinedload
-from app.db.models import Listing, SavedListing
-from app.schemas.listing import ListingResponse, LandlordOut
+import re
+from typing import Tuple
+from sqlalchemy import Float, Integer, and_, func, literal_column, or_, select, text
+from sqlalchemy.orm import Session, joinedload, load_only
+from app.db.models import Listing, ListingScore, ListingTag, SavedListing
+from app.db.search import SQLITE_BM25_WEIGHTS
+from app.schemas.listing import ListingResponse, LandlordOut, listing_response_dict
+from app.utils.dates import parse_available_from
+from app.utils.score_cache import bump_score_version
+from app.utils.tags import AMENITY_BITS, FEATURE_BITS, TAG_KINDS, listing_tag_values, normalize_tag, tag_mask
+from app.utilis.geo import bounding_box, geohashes_covering, haversine_matrix
 from datetime import datetime
 
+MAX_SEARCH_TERMS = 8
+
+# What a browse card shows; description, house_rules, neighborhood text
+# and the landlord are left for the detail view.
+CARD_COLUMNS = (
+    Listing.id, Listing.landlord_id, Listing.title, Listing.location, Listing.rent_price,
+    Listing.property_type, Listing.bedrooms, Listing.bathrooms, Listing.sqft,
+    Listing.available_from, Listing.images, Listing.image_variants, Listing.created_at,
+)
+# What the matcher reads (app.utils.batch_match) on top of the card columns
+SCORING_COLUMNS = CARD_COLUMNS + (
+    Listing.lease_length, Listing.max_occupants, Listing.pets_allowed, Listing.neighborhood_type,
+    Listing.neighborhood_profile, Listing.available_date, Listing.amenities, Listing.amenity_mask,
+    Listing.building_features, Listing.feature_mask, Listing.custom_tags, Listing.score_version,
+)
+
 def get_listing(db: Session, listing_id: int):
     listing = db.query(Listing).filter(Listing.id == listing_id).first()
     if not listing:
@@ -21,12 +45,246 @@ def get_listing(db: Session, listing_id: int):
     data['landlord'] = landlord_data
     return data
 
-def get_all_listings(db: Session):
-    return (
+def _filter_available(query, available_after=None, available_before=None):
+    """Restrict to listings available within the range (indexed available_date)."""
+    if available_after is not None:
+        query = query.filter(Listing.available_date >= available_after)
+    if available_before is not None:
+        query = query.filter(Listing.available_date <= available_before)
+    return query
+
+def get_all_listings(db: Session, available_after=None, available_before=None):
+    query = db.query(Listing).options(joinedload(Listing.landlord))
+    return _filter_available(query, available_after, available_before).all()
+
+def get_listings_by_ids(db: Session, listing_ids):
+    """Listings for the given ids, in the order given (missing ids are skipped)."""
+    if not listing_ids:
+        return []
+    listings = (
         db.query(Listing)
         .options(joinedload(Listing.landlord))
+        .filter(Listing.id.in_(listing_ids))
         .all()
     )
+    by_id = {listing.id: listing for listing in listings}
+    return [by_id[i] for i in listing_ids if i in by_id]
+
+def _filter_tags(query, kind: str, values):
+    """Restrict to listings having every one of `values` (indexed listing_tags lookup)."""
+    wanted = {normalize_tag(v) for v in values or []} - {""}
+    if not wanted:
+        return query
+    having_all = (
+        select(ListingTag.listing_id)
+        .where(ListingTag.kind == kind, ListingTag.value.in_(wanted))
+        .group_by(ListingTag.listing_id)
+        .having(func.count() == len(wanted))
+    )
+    return query.filter(Listing.id.in_(having_all))
+
+def _filter_listings(
+    query,
+    min_price: int = None,
+    max_price: int = None,
+    bedrooms: int = None,
+    bathrooms: int = None,
+    pets_allowed: bool = None,
+    property_type: str = None,
+    location: str = None,
+    available_after=None,
+    available_before=None,
+    amenities=None,
+    building_features=None,
+    tags=None,
+    neighborhood=None,
+):
+    if min_price is not None:
+        query = query.filter(Listing.rent_price >= min_price)
+    if max_price is not None:
+        query = query.filter(Listing.rent_price <= max_price)
+    if bedrooms is not None:
+        query = query.filter(Listing.bedrooms >= bedrooms)
+    if bathrooms is not None:
+        query = query.filter(Listing.bathrooms >= bathrooms)
+    if pets_allowed is not None:
+        query = query.filter(Listing.pets_allowed.is_(pets_allowed))
+    if property_type:
+        query = query.filter(Listing.property_type == property_type)
+    if location:
+        pattern = location.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.filter(Listing.location.ilike(f"%{pattern}%", escape="\\"))
+    for kind, values in (
+        ("amenity", amenities),
+        ("feature", building_features),
+        ("tag", tags),
+        ("neighborhood", neighborhood),
+    ):
+        query = _filter_tags(query, kind, values)
+    return _filter_available(query, available_after, available_before)
+
+def _load(query, columns=None):
+    # Whole rows with their landlord, or only `columns` (CARD_COLUMNS / SCORING_COLUMNS)
+    if columns is None:
+        return query.options(joinedload(Listing.landlord))
+    return query.options(load_only(*columns))
+
+def get_listing_page(db: Session, limit: int, cursor: int = None, columns=None, **filters):
+    """
+    One page of listings, newest first, keyset-paginated on id: `cursor`
+    is the last id of the previous page. Filters are the keyword arguments
+    of _filter_listings; `columns` restricts what is loaded (see _load).
+    Returns (listings, next_cursor).
+    """
+    query = _load(db.query(Listing), columns)
+    if cursor is not None:
+        query = query.filter(Listing.id < cursor)
+    query = _filter_listings(query, **filters)
+    listings = query.order_by(Listing.id.desc()).limit(limit + 1).all()
+    next_cursor = listings[limit - 1].id if len(listings) > limit else None
+    return listings[:limit], next_cursor
+
+def get_listing_page_by_score(
+    db: Session,
+    renter_id: int,
+    limit: int,
+    cursor: Tuple[float, int] = None,
+    columns=None,
+    **filters,
+):
+    """
+    One page of listings ordered by the renter's precomputed score (best
+    first, then newest), keyset-paginated on (score, listing id).
+    Returns ([(listing, score, scored_at)], next_cursor).
+    """
+    query = _load(
+        db.query(Listing, ListingScore.score, ListingScore.scored_at)
+        .join(ListingScore, ListingScore.listing_id == Listing.id)
+        .filter(ListingScore.renter_id == renter_id),
+        columns,
+    )
+    if cursor is not None:
+        score, listing_id = cursor
+        query = query.filter(or_(
+            ListingScore.score < score,
+            and_(ListingScore.score == score, ListingScore.listing_id < listing_id),
+        ))
+    query = _filter_listings(query, **filters)
+    rows = (
+        query.order_by(ListingScore.score.desc(), ListingScore.listing_id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        listing, score, _ = rows[limit - 1]
+        next_cursor = (score, listing.id)
+    return rows[:limit], next_cursor
+
+def _search_terms(q: str):
+    # Words only, so user input can't inject FTS/tsquery syntax
+    return re.findall(r"\w+", (q or "").lower())[:MAX_SEARCH_TERMS]
+
+def search_listings(db: Session, q: str, limit: int, offset: int = 0, **filters):
+    """
+    Full-text search over title, description, neighborhood_description and
+    custom_tags (see app.db.search), best match first. Every term must
+    match, as a word or a word prefix. Filters are the keyword arguments
+    of _filter_listings. Returns ([(listing, rank)], next_offset).
+    """
+    terms = _search_terms(q)
+    if not terms:
+        return [], None
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        fts = (
+            text(
+                "SELECT rowid AS listing_id, bm25(listings_fts, {}) AS rank "
+                "FROM listings_fts WHERE listings_fts MATCH :match".format(
+                    ", ".join(str(w) for w in SQLITE_BM25_WEIGHTS)
+                )
+            )
+            .bindparams(match=" ".join(f'"{term}"*' for term in terms))
+            .columns(listing_id=Integer, rank=Float)
+            .subquery("fts")
+        )
+        # bm25 is lower-is-better; flip it so higher rank is better everywhere
+        rank = (-fts.c.rank).label("rank")
+        query = db.query(Listing, rank).join(fts, fts.c.listing_id == Listing.id)
+    elif dialect == "postgresql":
+        tsquery = func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+        vector = literal_column("listings.search_vector")
+        rank = func.ts_rank_cd(vector, tsquery).label("rank")
+        query = db.query(Listing, rank).filter(vector.op("@@")(tsquery))
+    else:
+        rank = literal_column("0.0").label("rank")
+        query = db.query(Listing, rank)
+        for term in terms:
+            pattern = f"%{term}%"
+            query = query.filter(or_(
+                Listing.title.ilike(pattern),
+                Listing.description.ilike(pattern),
+                Listing.neighborhood_description.ilike(pattern),
+            ))
+    query = _filter_listings(query.options(joinedload(Listing.landlord)), **filters)
+    rows = query.order_by(rank.desc(), Listing.id.desc()).offset(offset).limit(limit + 1).all()
+    next_offset = offset + limit if len(rows) > limit else None
+    return [(listing, float(score)) for listing, score in rows[:limit]], next_offset
+
+def get_listings_in_bbox(
+    db: Session, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+    available_after=None, available_before=None,
+):
+    """
+    Geocoded listings inside the box. Candidates come from the indexed
+    geohash column (prefix match on the cells covering the box) and are
+    then checked against the exact bounds.
+    """
+    crosses = min_lon > max_lon  # box crosses the antimeridian
+    cells = geohashes_covering((min_lat, min_lon, max_lat, max_lon + 360 * crosses))
+    query = (
+        db.query(Listing)
+        .options(joinedload(Listing.landlord))
+        .filter(or_(*[Listing.geohash.startswith(cell) for cell in cells]))
+    )
+    listings = _filter_available(query, available_after, available_before).order_by(Listing.id).all()
+
+    def inside(listing):
+        if not min_lat <= listing.latitude <= max_lat:
+            return False
+        if crosses:
+            return listing.longitude >= min_lon or listing.longitude <= max_lon
+        return min_lon <= listing.longitude <= max_lon
+
+    return [listing for listing in listings if inside(listing)]
+
+def get_listings_near(
+    db: Session, lat: float, lon: float, radius_km: float,
+    available_after=None, available_before=None,
+):
+    """Geocoded listings within radius_km of (lat, lon), nearest first."""
+    min_lat, min_lon, max_lat, max_lon = bounding_box(lat, lon, radius_km)
+    # Wrap a circle that crosses the antimeridian into a crossing box
+    if max_lon > 180:
+        max_lon -= 360
+    elif min_lon < -180:
+        min_lon += 360
+    listings = get_listings_in_bbox(
+        db, min_lat, min_lon, max_lat, max_lon, available_after, available_before
+    )
+    if not listings:
+        return []
+    distances = haversine_matrix([(lat, lon)], [(l.latitude, l.longitude) for l in listings])[0]
+    nearby = [(d, listing) for d, listing in zip(distances, listings) if d <= radius_km]
+    nearby.sort(key=lambda item: (item[0], item[1].id))
+    return [listing for _, listing in nearby]
+
+def get_catalog_version(db: Session):
+    """
+    Changes whenever a listing is created, deleted or updated (every
+    update bumps score_version); keys cached serialized catalogs.
+    """
+    return tuple(db.query(func.count(Listing.id), func.max(Listing.id), func.sum(Listing.score_version)).one())
 
 def get_listings_by_landlord(db: Session, landlord_id: int):
     return (
@@ -36,28 +294,49 @@ def get_listings_by_landlord(db: Session, landlord_id: int):
         .all()
     )
 
+def _set_available_date(listing: Listing):
+    # Parsed once here so matchers and filters never re-parse the text
+    listing.available_date, listing.available_flexible = parse_available_from(listing.available_from or "")
+
+def _set_tags(listing: Listing):
+    # Indexed forms of the JSON lists: bitmasks for the matcher, rows for filters
+    listing.amenity_mask = tag_mask(listing.amenities, AMENITY_BITS)
+    listing.feature_mask = tag_mask(listing.building_features, FEATURE_BITS)
+    wanted = {(kind, value) for kind, values in listing_tag_values(listing).items() for value in values}
+    kept = [row for row in listing.tag_rows if (row.kind, row.value) in wanted]
+    have = {(row.kind, row.value) for row in kept}
+    listing.tag_rows = kept + [ListingTag(kind=kind, value=value) for kind, value in sorted(wanted - have)]
+
 def create_listing(db: Session, landlord_id: int, listing_data: dict):
     new_listing = Listing(landlord_id=landlord_id, **listing_data)
+    _set_available_date(new_listing)
+    _set_tags(new_listing)
     db.add(new_listing)
     db.commit()
     db.refresh(new_listing)
     return new_listing
 
 def update_listing(db: Session, listing_id: int, updates: dict):
-    listing = get_listing(db, listing_id)
+    listing = db.query(Listing).filter(Listing.id == listing_id).first()
     if not listing:
         return None
     for key, val in updates.items():
         if val is not None:
             setattr(listing, key, val)
+    if updates.get("available_from") is not None:
+        _set_available_date(listing)
+    if any(updates.get(column) is not None for column in TAG_KINDS.values()):
+        _set_tags(listing)
+    bump_score_version(listing)
     db.commit()
     db.refresh(listing)
     return listing
 
 def delete_listing(db: Session, listing_id: int):
     db.query(SavedListing).filter(SavedListing.listing_id == listing_id).delete()
+    db.query(ListingScore).filter(ListingScore.listing_id == listing_id).delete()
     db.commit()
-    listing = get_listing(db, listing_id)
+    listing = db.query(Listing).filter(Listing.id == listing_id).first()
     if listing:
         db.delete(listing)
         db.commit()
@@ -96,7 +375,7 @@ def get_saved_listings_by_user_full(db: Session, user_id: int):
             "id": saved.id,
             "user_id": saved.user_id,
             "saved_at": saved.saved_at,
-            "listing": ListingResponse.from_orm(listing)
+            "listing": listing_response_dict(listing)
         }
         for saved, listing in results
     ]
@@ -1,15 +1,29 @@
 # app/crud/crud_match.py
+import csv
+import io
+from sqlalchemy import delete, false, func, insert, select
 from sqlalchemy.orm import Session
-from datetime import date
-from app.db.models import DailyMatch, Listing, RenterPreferences
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+from app.db.models import DailyMatch, DailyMatchRefresh, DailyMatchStaging, Listing, RenterPreferences
 from app.schemas.match import MatchResponse
 
 def get_ranked_matches(db: Session, user):
-    """Get daily matches for a user, ranked by compatibility score."""
-    today = date.today()
+    """
+    Get daily matches for a user, ranked by compatibility score. Until the
+    nightly run has published today's matches, the latest earlier ones are
+    shown, so the feed doesn't go empty after midnight.
+    """
+    latest = db.query(func.max(DailyMatch.matched_date)).filter(
+        DailyMatch.renter_id == user.id,
+        DailyMatch.matched_date <= date.today()
+    ).scalar()
+    if latest is None:
+        return []
     matches = db.query(DailyMatch).filter(
         DailyMatch.renter_id == user.id,
-        DailyMatch.matched_date == today
+        DailyMatch.matched_date == latest
     ).order_by(DailyMatch.compatibility_score.desc()).all()
     
     # Join with listings to get full details
@@ -27,26 +41,168 @@ def get_ranked_matches(db: Session, user):
     
     return ranked[:10]
 
-def create_daily_match(
+
+def new_match_run_id() -> str:
+    return uuid4().hex
+
+
+def stage_daily_matches(
     db: Session,
-    renter_id: int,
-    listing_id: int,
-    compatibility_score: float,
-    matched_date: date
+    run_id: str,
+    matched_date: date,
+    rows: Iterable[Tuple[int, int, float]],
 ):
-    """Create a daily match record."""
-    match = DailyMatch(
-        renter_id=renter_id,
-        listing_id=listing_id,
-        compatibility_score=compatibility_score,
-        matched_date=matched_date
+    """
+    Write (renter_id, listing_id, score) rows for a run into the staging table.
+    Uses COPY on Postgres (psycopg2) and a single executemany INSERT elsewhere.
+    Runs on its own connection so the caller's session is not committed or expired.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    bind = db.get_bind()
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for renter_id, listing_id, score in rows:
+                writer.writerow((run_id, renter_id, listing_id, score, matched_date.isoformat()))
+            buffer.seek(0)
+            cursor = conn.connection.dbapi_connection.cursor()
+            try:
+                cursor.copy_expert(
+                    "COPY daily_match_staging "
+                    "(run_id, renter_id, listing_id, compatibility_score, matched_date) "
+                    "FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+            finally:
+                cursor.close()
+        else:
+            conn.execute(
+                insert(DailyMatchStaging),
+                [
+                    {
+                        "run_id": run_id,
+                        "renter_id": renter_id,
+                        "listing_id": listing_id,
+                        "compatibility_score": score,
+                        "matched_date": matched_date,
+                    }
+                    for renter_id, listing_id, score in rows
+                ],
+            )
+    return len(rows)
+
+
+def clear_staged_matches(db: Session, run_id: str, renter_ids: Iterable[int]):
+    """Remove a run's staged rows for some renters (makes shard retries idempotent)."""
+    db.execute(
+        delete(DailyMatchStaging).where(
+            DailyMatchStaging.run_id == run_id,
+            DailyMatchStaging.renter_id.in_(list(renter_ids)),
+        )
+    )
+    db.commit()
+
+
+def swap_in_staged_matches(db: Session, run_id: str, matched_date: date, started_at: Optional[datetime] = None):
+    """
+    Atomically replace the matches for `matched_date` with a run's staged rows.
+    Readers keep seeing the previous matches until the transaction commits.
+    Renters whose matches an incremental recompute rewrote after `started_at`
+    keep those: they are newer than the run's snapshot. Staged rows for
+    listings deleted since the snapshot are dropped.
+    """
+    columns = ["renter_id", "listing_id", "compatibility_score", "matched_date"]
+    refreshed = select(DailyMatchRefresh.renter_id).where(
+        DailyMatchRefresh.matched_date == matched_date,
+        DailyMatchRefresh.refreshed_at >= started_at if started_at is not None else false(),
+    )
+    staged = select(
+        DailyMatchStaging.renter_id,
+        DailyMatchStaging.listing_id,
+        DailyMatchStaging.compatibility_score,
+        DailyMatchStaging.matched_date,
+    ).where(
+        DailyMatchStaging.run_id == run_id,
+        DailyMatchStaging.renter_id.not_in(refreshed),
+        DailyMatchStaging.listing_id.in_(select(Listing.id)),
     )
-    db.add(match)
+    try:
+        db.execute(
+            delete(DailyMatch).where(
+                DailyMatch.matched_date == matched_date,
+                DailyMatch.renter_id.not_in(refreshed),
+            )
+        )
+        db.execute(insert(DailyMatch).from_select(columns, staged))
+        db.execute(delete(DailyMatchStaging).where(DailyMatchStaging.run_id == run_id))
+        # Older markers can't affect a future swap
+        db.execute(delete(DailyMatchRefresh).where(DailyMatchRefresh.matched_date < matched_date))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def discard_staged_matches(db: Session, run_id: str):
+    """Drop the staged rows of a failed or abandoned run."""
+    db.execute(delete(DailyMatchStaging).where(DailyMatchStaging.run_id == run_id))
     db.commit()
-    db.refresh(match)
-    return match
 
-def delete_matches_for_date(db: Session, matched_date: date):
-    """Delete all matches for a specific date (used when recomputing)."""
-    db.query(DailyMatch).filter(DailyMatch.matched_date == matched_date).delete()
-    db.commit()
\ No newline at end of file
+
+def get_matches_for_date(db: Session, matched_date: date) -> List[DailyMatch]:
+    return db.query(DailyMatch).filter(DailyMatch.matched_date == matched_date).all()
+
+
+def replace_renter_matches(
+    db: Session,
+    matched_date: date,
+    rows_by_renter: Dict[int, List[Tuple[int, int, float]]],
+):
+    """
+    Rewrite only the given renters' matches for a date, in one transaction,
+    and mark them refreshed so a nightly run already in progress keeps them.
+    """
+    if not rows_by_renter:
+        return
+    try:
+        db.execute(
+            delete(DailyMatch).where(
+                DailyMatch.matched_date == matched_date,
+                DailyMatch.renter_id.in_(list(rows_by_renter)),
+            )
+        )
+        db.execute(
+            delete(DailyMatchRefresh).where(
+                DailyMatchRefresh.matched_date == matched_date,
+                DailyMatchRefresh.renter_id.in_(list(rows_by_renter)),
+            )
+        )
+        refreshed_at = datetime.utcnow()
+        db.execute(
+            insert(DailyMatchRefresh),
+            [
+                {"renter_id": renter_id, "matched_date": matched_date, "refreshed_at": refreshed_at}
+                for renter_id in rows_by_renter
+            ],
+        )
+        rows = [row for renter_rows in rows_by_renter.values() for row in renter_rows]
+        if rows:
+            db.execute(
+                insert(DailyMatch),
+                [
+                    {
+                        "renter_id": renter_id,
+                        "listing_id": listing_id,
+                        "compatibility_score": score,
+                        "matched_date": matched_date,
+                    }
+                    for renter_id, listing_id, score in rows
+                ],
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
@@ -1,6 +1,7 @@
 # app/crud/preferences.py
 from sqlalchemy.orm import Session
 from app.db.models import RenterPreferences, LandlordPreferences
+from app.utils.score_cache import bump_score_version, get_score_cache
 
 def get_renter_preferences(db: Session, user_id: int):
     return db.query(RenterPreferences).filter(RenterPreferences.user_id == user_id).first()
@@ -10,8 +11,10 @@ def set_renter_preferences(db: Session, user_id: int, prefs_data: dict):
     if existing:
         for key, val in prefs_data.items():
             setattr(existing, key, val)
+        bump_score_version(existing)
         db.commit()
         db.refresh(existing)
+        get_score_cache().evict_renter(user_id)
         return existing
     new_pref = RenterPreferences(user_id=user_id, **prefs_data)
     db.add(new_pref)
@@ -22,11 +25,20 @@ def set_renter_preferences(db: Session, user_id: int, prefs_data: dict):
 def get_landlord_preferences(db: Session, user_id: int):
     return db.query(LandlordPreferences).filter(LandlordPreferences.user_id == user_id).first()
 
+def get_landlord_preferences_map(db: Session, user_ids):
+    """{landlord user_id: LandlordPreferences} for the given landlords, in one query."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    prefs = db.query(LandlordPreferences).filter(LandlordPreferences.user_id.in_(user_ids)).all()
+    return {p.user_id: p for p in prefs}
+
 def set_landlord_preferences(db: Session, user_id: int, prefs_data: dict):
     existing = get_landlord_preferences(db, user_id)
     if existing:
         for key, val in prefs_data.items():
             setattr(existing, key, val)
+        bump_score_version(existing)
         db.commit()
         db.refresh(existing)
         return existing
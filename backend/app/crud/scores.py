@@ -0,0 +1,62 @@
+# app/crud/scores.py
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.db.models import ListingScore
+
+
+def has_listing_scores(db: Session, renter_id: int) -> bool:
+    return db.query(ListingScore.renter_id).filter(ListingScore.renter_id == renter_id).first() is not None
+
+
+def get_scored_renter_ids(db: Session) -> List[int]:
+    return [row.renter_id for row in db.query(ListingScore.renter_id).distinct()]
+
+
+def _rows(rows_by_renter: Dict[int, Iterable[Tuple[int, float]]], scored_at: datetime):
+    return [
+        {"renter_id": renter_id, "listing_id": listing_id, "score": score, "scored_at": scored_at}
+        for renter_id, rows in rows_by_renter.items()
+        for listing_id, score in rows
+    ]
+
+
+def replace_renter_scores(db: Session, rows_by_renter: Dict[int, List[Tuple[int, float]]]):
+    """Rewrite the given renters' scores for the whole catalog, in one transaction."""
+    if not rows_by_renter:
+        return
+    try:
+        db.execute(delete(ListingScore).where(ListingScore.renter_id.in_(list(rows_by_renter))))
+        rows = _rows(rows_by_renter, datetime.utcnow())
+        if rows:
+            db.execute(insert(ListingScore), rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def replace_listing_scores(
+    db: Session,
+    listing_ids: Iterable[int],
+    rows_by_renter: Dict[int, List[Tuple[int, float]]],
+):
+    """
+    Rewrite the scores of some listings for every renter, in one
+    transaction. Listings with no rows (deleted ones) lose their scores.
+    """
+    listing_ids = list(listing_ids)
+    if not listing_ids:
+        return
+    try:
+        db.execute(delete(ListingScore).where(ListingScore.listing_id.in_(listing_ids)))
+        rows = _rows(rows_by_renter, datetime.utcnow())
+        if rows:
+            db.execute(insert(ListingScore), rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
@@ -0,0 +1,123 @@
+# app/crud/uploads.py
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.models import UploadBlob, UploadSession
+
+
+def get_blob(db: Session, sha256: str):
+    return db.query(UploadBlob).filter(UploadBlob.sha256 == sha256).first()
+
+
+def touch_blob(db: Session, sha256: str) -> bool:
+    """
+    Mark a blob as just uploaded, so it gets a new grace period before it
+    can be collected. False if there is no such blob (or it was just collected).
+    """
+    touched = db.execute(
+        update(UploadBlob).where(UploadBlob.sha256 == sha256).values(last_uploaded_at=datetime.utcnow())
+    ).rowcount
+    db.commit()
+    return bool(touched)
+
+
+def record_blob(db: Session, sha256: str, url: str, size: int, content_type: str) -> UploadBlob:
+    """The blob row for this content, created on first upload and touched on later ones."""
+    if touch_blob(db, sha256):
+        return get_blob(db, sha256)
+    blob = UploadBlob(sha256=sha256, url=url, size=size, content_type=content_type, ref_count=0)
+    db.add(blob)
+    try:
+        db.commit()
+    except IntegrityError:
+        # The same bytes were uploaded concurrently; theirs is as good as ours
+        db.rollback()
+        touch_blob(db, sha256)
+        return get_blob(db, sha256)
+    db.refresh(blob)
+    return blob
+
+
+def adjust_ref_counts(connection, deltas: Dict[str, int]) -> None:
+    """
+    Add deltas to the ref_count of the blobs with these URLs (in the
+    caller's transaction). Attached blobs are touched as well, so one found
+    by hash (find_blob) and attached late still gets a full grace period.
+    """
+    now = datetime.utcnow()
+    for url, delta in deltas.items():
+        if delta:
+            values = {"ref_count": UploadBlob.ref_count + delta}
+            if delta > 0:
+                values["last_uploaded_at"] = now
+            connection.execute(update(UploadBlob).where(UploadBlob.url == url).values(**values))
+
+
+def set_ref_counts(db: Session, counts: Counter) -> int:
+    """Overwrite every blob's ref_count with `counts` (by URL); returns how many changed."""
+    changed = 0
+    for blob in db.query(UploadBlob).all():
+        if blob.ref_count != counts.get(blob.url, 0):
+            blob.ref_count = counts.get(blob.url, 0)
+            changed += 1
+    db.commit()
+    return changed
+
+
+def get_orphaned_blobs(db: Session, grace: timedelta) -> List[UploadBlob]:
+    """Unreferenced blobs last uploaded more than `grace` ago (newer ones may be about to be attached)."""
+    return (
+        db.query(UploadBlob)
+        .filter(UploadBlob.ref_count <= 0, UploadBlob.last_uploaded_at < datetime.utcnow() - grace)
+        .all()
+    )
+
+
+def create_upload_session(
+    db: Session, session_id: str, user_id: int, policy: str, size: int, chunk_size: int,
+    sha256: Optional[str], ttl: timedelta,
+) -> UploadSession:
+    upload = UploadSession(
+        id=session_id, user_id=user_id, policy=policy, size=size, chunk_size=chunk_size,
+        sha256=sha256, expires_at=datetime.utcnow() + ttl,
+    )
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+    return upload
+
+
+def get_upload_session(db: Session, session_id: str, user_id: int) -> Optional[UploadSession]:
+    """The user's unexpired upload session with this id."""
+    return (
+        db.query(UploadSession)
+        .filter(
+            UploadSession.id == session_id,
+            UploadSession.user_id == user_id,
+            UploadSession.expires_at > datetime.utcnow(),
+        )
+        .first()
+    )
+
+
+def extend_upload_session(db: Session, upload: UploadSession, ttl: timedelta) -> None:
+    upload.expires_at = datetime.utcnow() + ttl
+    db.commit()
+
+
+def delete_upload_session(db: Session, upload: UploadSession) -> None:
+    db.delete(upload)
+    db.commit()
+
+
+def get_expired_upload_sessions(db: Session) -> List[UploadSession]:
+    return db.query(UploadSession).filter(UploadSession.expires_at <= datetime.utcnow()).all()
+
+
+def get_upload_session_ids(db: Session) -> set:
+    return {session_id for (session_id,) in db.query(UploadSession.id)}
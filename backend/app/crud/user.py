@@ -2,6 +2,7 @@
 from sqlalchemy.orm import Session
 from app.db.models import User, RenterPreferences, LandlordPreferences, Token as TokenModel
 from app.core.security import get_password_hash, verify_password
+from app.utils.score_cache import bump_score_version, get_score_cache
 
 def get_user_by_id(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
@@ -57,9 +58,12 @@ def save_renter_preferences(db, user_id, data):
     prefs.lease_length = data["lease_length"]
     prefs.amenities = data["amenities"]
     prefs.pets_allowed = data["pets_allowed"]
+    if prefs.id is not None:
+        bump_score_version(prefs)
     db.add(prefs)
     db.commit()
     db.refresh(prefs)
+    get_score_cache().evict_renter(user_id)
     return prefs
 
 def save_landlord_preferences(db, user_id, data):
@@ -69,6 +73,8 @@ def save_landlord_preferences(db, user_id, data):
     prefs.tenant_preferences = data.get("tenant_preferences", [])
     prefs.lease_length = data.get("lease_length")
     prefs.pets_allowed = data.get("pets_allowed", True)
+    if prefs.id is not None:
+        bump_score_version(prefs)
     db.add(prefs)
     db.commit()
     db.refresh(prefs)
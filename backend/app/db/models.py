@@ -1,6 +1,6 @@
 # app/db/models.py
 from sqlalchemy import (
-    Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, Float, Date, UniqueConstraint
+    Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey, Text, JSON, Float, Date, UniqueConstraint, Index
 )
 from app.db.base import Base
 from sqlalchemy.orm import relationship
@@ -46,6 +46,9 @@ class Listing(Base):
     bedrooms = Column(Integer, nullable=False, default=1)
     bathrooms = Column(Integer, nullable=False, default=1)
     available_from = Column(String(64), nullable=False, default="")
+    # Parsed from available_from by the listing write path (app.utils.dates)
+    available_date = Column(Date, nullable=True, index=True)
+    available_flexible = Column(Boolean, nullable=False, default=False)
     max_occupants = Column(Integer, nullable=False, default=1)
     neighborhood_type = Column(String(64), nullable=True)
     neighborhood_description = Column(String(255), nullable=True)
@@ -56,10 +59,21 @@ class Listing(Base):
     pets_allowed = Column(Boolean, default=True)
     lease_length = Column(Integer, nullable=True)
     images = Column(JSON, nullable=True, default=[])
+    # {original url: {"thumb"|"medium"|"large": url}}, filled in by app.services.images
+    image_variants = Column(JSON, nullable=True, default=dict)
     sqft = Column(Integer, nullable=True)
     house_rules = Column(JSON, nullable=True, default=[])
+    # Filled in by the geocode_listing task after `location` is written
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geohash = Column(String(12), nullable=True, index=True)
+    # Derived from amenities / building_features by the listing write path (app.utils.tags)
+    amenity_mask = Column(BigInteger, nullable=False, default=0)
+    feature_mask = Column(BigInteger, nullable=False, default=0)
+    score_version = Column(Integer, nullable=False, default=1)  # bumped on every write (score cache key)
 
     landlord = relationship("User", back_populates="listings")
+    tag_rows = relationship("ListingTag", cascade="all, delete-orphan")
     matches = relationship("DailyMatch", back_populates="listing")
     visit_requests = relationship("VisitRequest", back_populates="listing")
 
@@ -91,6 +105,7 @@ class RenterPreferences(Base):
     noise_tolerance = Column(String(32), nullable=True)
     visitor_flexibility = Column(String(32), nullable=True)
     custom_preferences = Column(JSON, default=list)
+    score_version = Column(Integer, nullable=False, default=1)  # bumped on every write (score cache key)
     user = relationship("User", back_populates="renter_preferences")
 
 class LandlordPreferences(Base):
@@ -101,6 +116,7 @@ class LandlordPreferences(Base):
     lease_length = Column(Integer, nullable=True)
     pets_allowed = Column(Boolean, default=True)
     custom_requirements = Column(JSON, default=list)
+    score_version = Column(Integer, nullable=False, default=1)  # bumped on every write (score cache key)
     user = relationship("User", back_populates="landlord_preferences")
 
 class Token(Base):
@@ -169,3 +185,77 @@ class DailyMatch(Base):
     matched_date = Column(Date, nullable=False, index=True)
     renter = relationship("User")
     listing = relationship("Listing", back_populates="matches")
+
+class DailyMatchStaging(Base):
+    """Matches written by an in-progress run; swapped into daily_matches when it completes."""
+    __tablename__ = "daily_match_staging"
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String(32), nullable=False, index=True)
+    renter_id = Column(Integer, nullable=False)
+    listing_id = Column(Integer, nullable=False)
+    compatibility_score = Column(Float, nullable=False)
+    matched_date = Column(Date, nullable=False)
+
+class DailyMatchRefresh(Base):
+    """When a renter's matches for a date were last rewritten by an incremental recompute."""
+    __tablename__ = "daily_match_refreshes"
+    renter_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    matched_date = Column(Date, primary_key=True)
+    refreshed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class ListingScore(Base):
+    """Rule-based score of every listing for a renter, kept fresh for sort-by-match browsing."""
+    __tablename__ = "listing_scores"
+    renter_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    listing_id = Column(Integer, ForeignKey("listings.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False)
+    scored_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    __table_args__ = (
+        Index("ix_listing_scores_renter_score", "renter_id", "score", "listing_id"),
+        Index("ix_listing_scores_listing_id", "listing_id"),
+    )
+
+class ListingTag(Base):
+    """One normalized amenity / feature / tag / neighborhood value of a listing, for indexed filtering."""
+    __tablename__ = "listing_tags"
+    listing_id = Column(Integer, ForeignKey("listings.id", ondelete="CASCADE"), primary_key=True)
+    kind = Column(String(16), primary_key=True)
+    value = Column(String(128), primary_key=True)
+    __table_args__ = (
+        Index("ix_listing_tags_kind_value", "kind", "value", "listing_id"),
+    )
+
+class UploadBlob(Base):
+    """An uploaded file, stored once per distinct content; ref_count counts listings/users using its URL."""
+    __tablename__ = "upload_blobs"
+    sha256 = Column(String(64), primary_key=True)
+    url = Column(String(255), nullable=False, unique=True)
+    size = Column(Integer, nullable=False)
+    content_type = Column(String(64), nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Bumped whenever the same content is uploaded again; orphans are collected a grace period after it
+    last_uploaded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    __table_args__ = (
+        Index("ix_upload_blobs_ref_count", "ref_count", "last_uploaded_at"),
+    )
+
+class UploadSession(Base):
+    """A resumable upload in progress; its chunks are on disk (app.services.upload_sessions)."""
+    __tablename__ = "upload_sessions"
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    policy = Column(String(32), nullable=False)
+    size = Column(Integer, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=True)  # declared by the client, checked on completion
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class GeocodeCache(Base):
+    """Geocoder results keyed by normalized address; NULL coordinates mean 'not found'."""
+    __tablename__ = "geocode_cache"
+    address_key = Column(String(255), primary_key=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geocoded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,94 @@
+# app/db/search.py
+"""
+Full-text search index over listings, picked by dialect:
+
+- SQLite: an external-content FTS5 table (listings_fts) kept in sync with
+  listings by triggers.
+- Postgres: a generated, stored tsvector column (listings.search_vector)
+  with a GIN index; Postgres recomputes it on every write.
+
+Either way the index is maintained by the database as part of the listing
+write itself. `ensure_listing_search` is idempotent and is run by the
+migration and (for dev databases made by create_all) at startup.
+"""
+
+import logging
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# bm25 weights per listings_fts column: title > description/tags > neighborhood
+SQLITE_BM25_WEIGHTS = (10.0, 4.0, 2.0, 4.0)
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS listings_fts USING fts5(
+        title, description, neighborhood_description, custom_tags,
+        content='listings', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS listings_fts_ai AFTER INSERT ON listings BEGIN
+        INSERT INTO listings_fts(rowid, title, description, neighborhood_description, custom_tags)
+        VALUES (new.id, new.title, new.description, new.neighborhood_description, new.custom_tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS listings_fts_ad AFTER DELETE ON listings BEGIN
+        INSERT INTO listings_fts(listings_fts, rowid, title, description, neighborhood_description, custom_tags)
+        VALUES ('delete', old.id, old.title, old.description, old.neighborhood_description, old.custom_tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS listings_fts_au
+    AFTER UPDATE OF title, description, neighborhood_description, custom_tags ON listings BEGIN
+        INSERT INTO listings_fts(listings_fts, rowid, title, description, neighborhood_description, custom_tags)
+        VALUES ('delete', old.id, old.title, old.description, old.neighborhood_description, old.custom_tags);
+        INSERT INTO listings_fts(rowid, title, description, neighborhood_description, custom_tags)
+        VALUES (new.id, new.title, new.description, new.neighborhood_description, new.custom_tags);
+    END
+    """,
+]
+
+_POSTGRES_DDL = [
+    """
+    ALTER TABLE listings ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(custom_tags::text, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(neighborhood_description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_listings_search_vector ON listings USING gin (search_vector)",
+]
+
+
+def ensure_listing_search(conn) -> None:
+    """Create the dialect's full-text index (and backfill it) if it doesn't exist."""
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'listings_fts'")
+        ).first()
+        for statement in _SQLITE_DDL:
+            conn.execute(text(statement))
+        if not exists:
+            conn.execute(text("INSERT INTO listings_fts(listings_fts) VALUES ('rebuild')"))
+    elif dialect == "postgresql":
+        for statement in _POSTGRES_DDL:
+            conn.execute(text(statement))
+    else:
+        logger.warning("No full-text index for dialect %s; search falls back to LIKE", dialect)
+
+
+def drop_listing_search(conn) -> None:
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        for name in ("listings_fts_ai", "listings_fts_ad", "listings_fts_au"):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        conn.execute(text("DROP TABLE IF EXISTS listings_fts"))
+    elif dialect == "postgresql":
+        conn.execute(text("DROP INDEX IF EXISTS ix_listings_search_vector"))
+        conn.execute(text("ALTER TABLE listings DROP COLUMN IF EXISTS search_vector"))
@@ -4,9 +4,14 @@ import os
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from app.core.config import settings
-from app.db.session import engine, Base
-from fastapi.staticfiles import StaticFiles
-from pathlib import Path
+from app.db.session import engine, Base, SessionLocal
+from app.db.search import ensure_listing_search
+from app.services.match_events import register_match_change_tracking
+from app.services.geocoding import register_geocoding
+from app.services.images import DERIVED_DIR, register_image_derivatives
+from app.services.upload_store import register_upload_refcounts
+from app.services.uploads import BLOBS_DIR, UPLOADS_DIR
+from app.core.static import MediaFiles
 
 from app.routers import (
     auth,
@@ -25,10 +30,18 @@ from app.core.config import settings
 
 app = FastAPI(title="RentMatch API")
 
-BASE_DIR = Path(__file__).resolve().parent.parent  # backend/
-UPLOADS_DIR = BASE_DIR / "uploads"
+# Enqueue targeted match recomputation when preferences or listings change
+register_match_change_tracking(SessionLocal)
+# Geocode listing locations after they are written, off the request path
+register_geocoding(SessionLocal)
+# Render thumbnails and WebP sizes of uploaded listing images in the background
+register_image_derivatives(SessionLocal)
+# Count which uploaded files are still used, for orphan collection
+register_upload_refcounts(SessionLocal)
+
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
-app.mount("/static", StaticFiles(directory=str(UPLOADS_DIR)), name="static")
+# Content-addressed blobs and their derivatives never change: cache them for good
+app.mount("/static", MediaFiles(directory=str(UPLOADS_DIR), immutable=(BLOBS_DIR, DERIVED_DIR)), name="static")
 
 origins = [
     "http://localhost:3000",
@@ -47,6 +60,8 @@ app.add_middleware(SessionMiddleware, secret_key=settings.SESSION_SECRET_KEY)
 @app.on_event("startup")
 def on_startup():
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        ensure_listing_search(conn)
 
 # Routers
 app.include_router(auth.router)
@@ -1,16 +1,16 @@
-from fastapi import APIRouter, UploadFile, File, Depends
-import shutil
-import os
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from sqlalchemy.orm import Session
 
-router = APIRouter(prefix="/api/files", tags=["files"])
+from app.dependencies import get_db
+from app.services.uploads import USER_FILE, UploadRejected, save_upload
 
-UPLOAD_DIR = "./uploads"
+router = APIRouter(prefix="/api/files", tags=["files"])
 
 @router.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+async def upload_file(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    try:
+        stored = await save_upload(file, USER_FILE, db)
+    except UploadRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
     # Return the relative path for saving to DB or returning to frontend
-    return {"url": f"/uploads/{file.filename}"}
+    return {"url": stored.url}
@@ -1,19 +1,70 @@
 #app/routers/listing.py
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Path, Request, Response, status, Query
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-import os
-from uuid import uuid4
-from app.schemas.listing import ( ListingCreate, ListingResponse,ListingUpdate,SavedListingResponse, SavedListingWithDetails )
-from app.crud.listings import (create_listing, get_all_listings, get_listing, get_listings_by_landlord, update_listing,
+from datetime import date, datetime, timedelta
+from functools import partial
+from app.schemas.listing import ( ListingCardPage, ListingCreate, ListingPage, ListingResponse,ListingUpdate,SavedListingResponse, SavedListingWithDetails,
+    listing_response_dict )
+from app.crud.listings import (CARD_COLUMNS, SCORING_COLUMNS, create_listing, get_catalog_version, get_all_listings, get_listing, get_listings_by_ids, get_listings_by_landlord, update_listing,
+    get_listing_page, get_listing_page_by_score, get_listings_in_bbox, get_listings_near, search_listings,
     delete_listing, get_saved_listings_by_user,  get_saved_listings_by_user_full, save_listing, remove_saved_listing )
 from app.dependencies import get_db, get_current_user, get_optional_user
-from app.crud.preferences import get_renter_preferences, get_landlord_preferences
-from app.utils.match import compute_compatibility_score
+from app.crud.preferences import get_renter_preferences, get_landlord_preferences_map
+from app.crud.scores import has_listing_scores
+from app.crud.uploads import get_upload_session
+from app.core.config import settings
+from app.core.responses import FastJSONResponse, PayloadCache
+from app.services.listing_scores import enqueue_renter_refresh, refresh_renter_scores
+from app.services.match_events import SEMANTIC_SEARCH_TASK
+from app.services.task_queue import call as call_task
+from app.schemas.upload import UploadCompleteResponse, UploadSessionCreate, UploadSessionResponse
+from app.services.upload_sessions import complete_upload, discard_upload, start_upload, upload_status, write_chunk
+from app.services.uploads import LISTING_IMAGE, UploadRejected, find_blob, save_upload
+from app.utils.batch_match import compute_score_matrix
+from app.utils.score_cache import get_score_cache, score_key
 
 router = APIRouter(prefix="/api/listings", tags=["Listings"])
 
+# GET /api/listings bodies without match scores, keyed by catalog version and query
+_anonymous_listings = PayloadCache(ttl=settings.LISTINGS_PAYLOAD_CACHE_TTL_S)
+
+def _renter_prefs_for(db: Session, current_user, view_as_renter: bool):
+    """Preferences to score against: renters, and landlords viewing as a renter."""
+    if current_user and (current_user.role == "renter" or (current_user.role == "landlord" and view_as_renter)):
+        return get_renter_preferences(db, current_user.id)
+    return None
+
+def _match_scores(db: Session, listings, renter_prefs):
+    """
+    {listing_id: match score}, empty without renter preferences. Scores
+    come from the score cache; only listings whose (renter, listing,
+    landlord) versions aren't cached are scored, with landlord preferences
+    loaded in one query.
+    """
+    scores = {}
+    if renter_prefs and listings:
+        cache = get_score_cache()
+        landlord_pref_map = get_landlord_preferences_map(db, {l.landlord_id for l in listings})
+        keys = {
+            l.id: score_key(renter_prefs, l, landlord_pref_map.get(l.landlord_id)) for l in listings
+        }
+        cached = cache.get_many(keys.values())
+        missing = [l for l in listings if keys[l.id] not in cached]
+        if missing:
+            computed = compute_score_matrix([renter_prefs], missing, landlord_pref_map)[0]
+            fresh = {keys[l.id]: float(score) for l, score in zip(missing, computed)}
+            cache.set_many(fresh)
+            cached.update(fresh)
+        scores = {listing_id: cached[key] for listing_id, key in keys.items()}
+    return scores
+
+def _with_match_scores(db: Session, listings, renter_prefs):
+    """Serialize listings with match_score (see _match_scores)."""
+    scores = _match_scores(db, listings, renter_prefs)
+    return [listing_response_dict(listing, scores.get(listing.id)) for listing in listings]
+
 @router.post("/", response_model=ListingResponse)
 def create_listing_endpoint(
     request: ListingCreate,
@@ -26,54 +77,326 @@ def create_listing_endpoint(
     return new_listing
 
 @router.post("/upload-image")
-def upload_image(file: UploadFile = File(...)):
-    UPLOAD_DIR = "uploads/listing_images"
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-    ext = os.path.splitext(file.filename)[1]
-    fname = f"{uuid4().hex}{ext}"
-    fpath = os.path.join(UPLOAD_DIR, fname)
-    with open(fpath, "wb") as f:
-        f.write(file.file.read())
-    url = f"/static/listing_images/{fname}"
-    return JSONResponse({"url": url})
+async def upload_image(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    try:
+        stored = await save_upload(file, LISTING_IMAGE, db)
+    except UploadRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+    return JSONResponse({"url": stored.url, "sha256": stored.sha256, "deduplicated": stored.deduplicated})
+
+@router.get("/images/{sha256}")
+def find_uploaded_image(
+    sha256: str = Path(..., regex="^[0-9a-fA-F]{64}$"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """URL of an already-uploaded image with this SHA-256, so clients can skip re-uploading it."""
+    url = find_blob(db, sha256, LISTING_IMAGE)
+    if url is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return {"url": url, "sha256": sha256.lower()}
+
+# Resumable uploads: create a session, PUT its chunks (retrying any that
+# fail), check which arrived, then complete it to get the image URL.
+@router.post("/uploads", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+def create_image_upload(
+    request: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    try:
+        upload = start_upload(db, current_user.id, LISTING_IMAGE, request.size, request.sha256)
+    except UploadRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+    return upload_status(upload)
+
+def _image_upload(
+    upload_id: str = Path(..., regex="^[0-9a-f]{32}$"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    upload = get_upload_session(db, upload_id, current_user.id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    return upload
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+def read_image_upload(upload=Depends(_image_upload)):
+    """Which chunks have arrived; `offset` is where to resume a sequential upload."""
+    return upload_status(upload)
+
+@router.put("/uploads/{upload_id}/chunks/{index}", response_model=UploadSessionResponse)
+async def upload_image_chunk(
+    request: Request,
+    index: int = Path(..., ge=0),
+    upload=Depends(_image_upload),
+    db: Session = Depends(get_db),
+):
+    """Store one chunk (the raw request body); sending a chunk again replaces it."""
+    try:
+        await write_chunk(db, upload, index, request.stream())
+    except UploadRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+    return upload_status(upload)
+
+@router.post("/uploads/{upload_id}/complete", response_model=UploadCompleteResponse)
+async def complete_image_upload(upload=Depends(_image_upload), db: Session = Depends(get_db)):
+    try:
+        stored = await complete_upload(db, upload)
+    except UploadRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+    return {"url": stored.url, "sha256": stored.sha256, "deduplicated": stored.deduplicated}
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_image_upload(upload=Depends(_image_upload), db: Session = Depends(get_db)):
+    discard_upload(db, upload)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.get("", response_model=List[ListingResponse])
 @router.get("/", response_model=List[ListingResponse])
 def read_all_listings(
     db: Session = Depends(get_db),
     current_user=Depends(get_optional_user),
-    view_as_renter: bool = Query(False, description="For landlords: view all listings as a renter would")
+    view_as_renter: bool = Query(False, description="For landlords: view all listings as a renter would"),
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Center latitude for a radius search"),
+    lon: Optional[float] = Query(None, ge=-180, le=180, description="Center longitude for a radius search"),
+    radius_km: Optional[float] = Query(None, gt=0, le=500, description="Only listings within this many km of lat/lon"),
+    min_lat: Optional[float] = Query(None, ge=-90, le=90),
+    min_lon: Optional[float] = Query(None, ge=-180, le=180),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90),
+    max_lon: Optional[float] = Query(None, ge=-180, le=180, description="Less than min_lon for boxes crossing the antimeridian"),
+    available_after: Optional[date] = Query(None, description="Only listings available on or after this date"),
+    available_before: Optional[date] = Query(None, description="Only listings available on or before this date"),
 ):
     """
     Get all listings. 
     - Unauthenticated users: see all listings without match scores
     - Landlords: see their own listings by default, or all listings if view_as_renter=True
     - Renters: see all listings with match scores
+    Pass lat/lon/radius_km (nearest first) or min_lat/min_lon/max_lat/max_lon
+    to only get geocoded listings in that area, and available_after /
+    available_before to only get listings whose move-in date parsed into
+    that range. Bodies without match scores are serialized once per
+    catalog version and shared.
     """
     # If landlord and not viewing as renter, show only their listings
     if current_user and current_user.role == "landlord" and not view_as_renter:
-        return get_listings_by_landlord(db, current_user.id)
+        return FastJSONResponse([listing_response_dict(l) for l in get_listings_by_landlord(db, current_user.id)])
     
     # Otherwise, show all listings (for renters, unauthenticated users, or landlords viewing as renters)
-    listings = get_all_listings(db)
-    results = []
-    
-    # Only calculate match scores if user is authenticated and is/wants to be treated as renter
-    renter_prefs = None
-    if current_user and (current_user.role == "renter" or (current_user.role == "landlord" and view_as_renter)):
-        renter_prefs = get_renter_preferences(db, current_user.id)
-    
-    for listing in listings:
-        landlord_prefs = get_landlord_preferences(db, listing.landlord_id)
-        data = ListingResponse.from_orm(listing).dict()
-        
-        if renter_prefs:
-            score = compute_compatibility_score(renter_prefs, landlord_prefs, listing)
-            data["match_score"] = score
-        else:
-            data["match_score"] = None
-        results.append(data)
-    return results
+    available = {"available_after": available_after, "available_before": available_before}
+    radius = (lat, lon, radius_km)
+    bbox = (min_lat, min_lon, max_lat, max_lon)
+    if any(v is not None for v in radius):
+        if any(v is None for v in radius):
+            raise HTTPException(status_code=400, detail="lat, lon and radius_km must be given together")
+        load = partial(get_listings_near, db, lat, lon, radius_km, **available)
+    elif any(v is not None for v in bbox):
+        if any(v is None for v in bbox) or min_lat > max_lat:
+            raise HTTPException(status_code=400, detail="min_lat, min_lon, max_lat and max_lon must all be given")
+        load = partial(get_listings_in_bbox, db, min_lat, min_lon, max_lat, max_lon, **available)
+    else:
+        load = partial(get_all_listings, db, **available)
+
+    renter_prefs = _renter_prefs_for(db, current_user, view_as_renter)
+    if renter_prefs:
+        return FastJSONResponse(_with_match_scores(db, load(), renter_prefs))
+    # Without scores every caller gets the same body: serialize it once per catalog version
+    key = (get_catalog_version(db), radius, bbox, available_after, available_before)
+    return FastJSONResponse(_anonymous_listings.get_or_render(key, lambda: _with_match_scores(db, load(), None)))
+
+def _parse_cursor(cursor: Optional[str], sort: str):
+    if cursor is None:
+        return None
+    try:
+        if sort == "match":
+            score, listing_id = cursor.split(":")
+            return float(score), int(listing_id)
+        return int(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _listing_filters(
+    min_price: Optional[int] = Query(None, ge=0),
+    max_price: Optional[int] = Query(None, ge=0),
+    bedrooms: Optional[int] = Query(None, ge=0, description="Minimum bedrooms"),
+    bathrooms: Optional[int] = Query(None, ge=0, description="Minimum bathrooms"),
+    pets_allowed: Optional[bool] = Query(None),
+    property_type: Optional[str] = Query(None),
+    location: Optional[str] = Query(None, description="Substring of the listing location"),
+    available_after: Optional[date] = Query(None),
+    available_before: Optional[date] = Query(None),
+    amenities: Optional[List[str]] = Query(None, description="Only listings with all of these amenities"),
+    building_features: Optional[List[str]] = Query(None, description="Only listings with all of these building features"),
+    tags: Optional[List[str]] = Query(None, description="Only listings with all of these custom tags"),
+    neighborhood: Optional[List[str]] = Query(None, description="Only listings with all of these neighborhood profiles"),
+):
+    """Structured filters shared by /feed, /cards and /search (keyword arguments of crud _filter_listings)."""
+    return dict(
+        min_price=min_price,
+        max_price=max_price,
+        bedrooms=bedrooms,
+        bathrooms=bathrooms,
+        pets_allowed=pets_allowed,
+        property_type=property_type,
+        location=location,
+        available_after=available_after,
+        available_before=available_before,
+        amenities=amenities,
+        building_features=building_features,
+        tags=tags,
+        neighborhood=neighborhood,
+    )
+
+def _feed_page(db: Session, renter_prefs, sort: str, cursor: Optional[str], limit: int, filters: dict, columns=None):
+    """
+    One feed page as (listings, {listing_id: match score}, next_cursor,
+    scored_at); shared by /feed and /cards.
+    """
+    if sort == "newest":
+        listings, next_cursor = get_listing_page(
+            db, limit, cursor=_parse_cursor(cursor, sort), columns=columns, **filters
+        )
+        scores = _match_scores(db, listings, renter_prefs)
+        return listings, scores, None if next_cursor is None else str(next_cursor), None
+
+    if not renter_prefs:
+        raise HTTPException(status_code=400, detail="Sorting by match needs renter preferences")
+    if not has_listing_scores(db, renter_prefs.user_id):
+        # First sorted request for this renter: score the catalog once
+        refresh_renter_scores(db, [renter_prefs])
+    rows, next_cursor = get_listing_page_by_score(
+        db, renter_prefs.user_id, limit, cursor=_parse_cursor(cursor, sort), columns=columns, **filters
+    )
+    scored_at = min((row[2] for row in rows), default=None)
+    if scored_at and datetime.utcnow() - scored_at > timedelta(hours=settings.LISTING_SCORE_MAX_AGE_HOURS):
+        enqueue_renter_refresh(renter_prefs.user_id)
+    return (
+        [listing for listing, _, _ in rows],
+        {listing.id: score for listing, score, _ in rows},
+        None if next_cursor is None else f"{next_cursor[0]!r}:{next_cursor[1]}",
+        scored_at,
+    )
+
+@router.get("/feed", response_model=ListingPage)
+def read_listing_feed(
+    db: Session = Depends(get_db),
+    current_user=Depends(get_optional_user),
+    view_as_renter: bool = Query(False, description="For landlords: include match scores as a renter would see them"),
+    sort: str = Query("newest", regex="^(newest|match)$", description="newest, or match (best match first; renters only)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    filters: dict = Depends(_listing_filters),
+):
+    """
+    Listings one page at a time, newest first or (sort=match) best match
+    first. Filters run in the database and match scores (for renters) are
+    computed for the returned page only. sort=match reads the renter's
+    precomputed scores and reports their age in `scored_at`. Repeat
+    amenities / building_features / tags / neighborhood to require several
+    values (case-insensitive).
+    """
+    renter_prefs = _renter_prefs_for(db, current_user, view_as_renter)
+    listings, scores, next_cursor, scored_at = _feed_page(db, renter_prefs, sort, cursor, limit, filters)
+    return FastJSONResponse({
+        "items": [listing_response_dict(listing, scores.get(listing.id)) for listing in listings],
+        "next_cursor": next_cursor,
+        "scored_at": scored_at,
+    })
+
+def _listing_card(listing, score=None) -> dict:
+    # Built straight from the loaded columns: no Pydantic model per row
+    images = listing.images or []
+    thumbnail = None
+    if images:
+        thumbnail = ((listing.image_variants or {}).get(images[0]) or {}).get("thumb", images[0])
+    return {
+        "id": listing.id,
+        "title": listing.title,
+        "location": listing.location,
+        "rent_price": listing.rent_price,
+        "property_type": listing.property_type,
+        "bedrooms": listing.bedrooms,
+        "bathrooms": listing.bathrooms,
+        "sqft": listing.sqft,
+        "available_from": listing.available_from,
+        "thumbnail": thumbnail,
+        "created_at": listing.created_at,
+        "match_score": score,
+    }
+
+@router.get("/cards", response_model=ListingCardPage)
+def read_listing_cards(
+    db: Session = Depends(get_db),
+    current_user=Depends(get_optional_user),
+    view_as_renter: bool = Query(False, description="For landlords: include match scores as a renter would see them"),
+    sort: str = Query("newest", regex="^(newest|match)$", description="newest, or match (best match first; renters only)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    filters: dict = Depends(_listing_filters),
+):
+    """
+    The feed as lightweight cards for grid views: only the card columns
+    (plus what scoring needs, for renters) are loaded and the first image
+    is the thumbnail. Full details are at /api/listings/{id}. Same sorting,
+    cursors and filters as /feed.
+    """
+    renter_prefs = _renter_prefs_for(db, current_user, view_as_renter)
+    columns = SCORING_COLUMNS if renter_prefs and sort == "newest" else CARD_COLUMNS
+    listings, scores, next_cursor, scored_at = _feed_page(
+        db, renter_prefs, sort, cursor, limit, filters, columns=columns
+    )
+    return FastJSONResponse({
+        "items": [_listing_card(listing, scores.get(listing.id)) for listing in listings],
+        "next_cursor": next_cursor,
+        "scored_at": scored_at,
+    })
+
+@router.get("/search", response_model=ListingPage)
+def search_listings_endpoint(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to search for (prefixes match too)"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_optional_user),
+    view_as_renter: bool = Query(False, description="For landlords: include match scores as a renter would see them"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    filters: dict = Depends(_listing_filters),
+):
+    """
+    Full-text search over title, description, neighborhood description and
+    tags, best match first, combined with the same filters as /feed.
+    """
+    offset = max(0, _parse_cursor(cursor, "newest") or 0)
+    rows, next_offset = search_listings(db, q, limit, offset=offset, **filters)
+    listings = [listing for listing, _ in rows]
+    items = _with_match_scores(db, listings, _renter_prefs_for(db, current_user, view_as_renter))
+    return FastJSONResponse({"items": items, "next_cursor": None if next_offset is None else str(next_offset)})
+
+@router.get("/semantic-search", response_model=List[ListingResponse])
+def semantic_search_listings(
+    q: str = Query(..., min_length=1, description="Describe the place you want"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    Listings whose description, tags and neighborhood text are closest to
+    the free-text query, best first. Served from the semantic listing
+    index, so it never scans the whole catalog. The query is embedded by a
+    worker (semantic_search_listings); the API process never loads the model.
+    """
+    if not settings.USE_SEMANTIC_MATCHING:
+        raise HTTPException(status_code=503, detail="Semantic search is not enabled")
+    try:
+        candidates = call_task(SEMANTIC_SEARCH_TASK, [q, limit], settings.SEMANTIC_SEARCH_TIMEOUT_S)
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail="Semantic search is unavailable") from exc
+    if candidates is None:
+        raise HTTPException(status_code=503, detail="Semantic search is not enabled")
+    return get_listings_by_ids(db, [listing_id for listing_id, _ in candidates])
 
 @router.put("/{listing_id}", response_model=ListingResponse)
 def update_listing_endpoint(
@@ -83,7 +406,7 @@ def update_listing_endpoint(
     current_user=Depends(get_current_user),
 ):
     listing = get_listing(db, listing_id)
-    if not listing or listing.landlord_id != current_user.id:
+    if not listing or listing["landlord_id"] != current_user.id:
         raise HTTPException(status_code=403, detail="Unauthorized or listing not found")
     updated = update_listing(db, listing_id, request.dict(exclude_unset=True))
     return updated
@@ -95,10 +418,11 @@ def delete_listing_endpoint(
     current_user=Depends(get_current_user),
 ):
     listing = get_listing(db, listing_id)
-    if not listing or listing.landlord_id != current_user.id:
+    if not listing or listing["landlord_id"] != current_user.id:
         raise HTTPException(status_code=403, detail="Unauthorized or listing not found")
-    deleted = delete_listing(db, listing_id)
-    return deleted
+    delete_listing(db, listing_id)
+    # The row is gone; answer with what was deleted
+    return listing
 
 @router.get("/owned", response_model=List[ListingResponse])
 def get_owned_listings(
@@ -116,37 +440,12 @@ def read_listing(listing_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Listing not found")
     return listing
 
-@router.put("/{listing_id}", response_model=ListingResponse)
-def update_listing_endpoint(
-    listing_id: int,
-    request: ListingUpdate,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
-):
-    listing = get_listing(db, listing_id)
-    if not listing or listing.landlord_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Unauthorized or listing not found")
-    updated = update_listing(db, listing_id, request.dict(exclude_unset=True))
-    return updated
-
-@router.delete("/{listing_id}", response_model=ListingResponse)
-def delete_listing_endpoint(
-    listing_id: int,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
-):
-    listing = get_listing(db, listing_id)
-    if not listing or listing.landlord_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Unauthorized or listing not found")
-    deleted = delete_listing(db, listing_id)
-    return deleted
-
 @router.get("/saved/", response_model=List[SavedListingWithDetails])
 def list_saved_listings(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    return get_saved_listings_by_user_full(db, current_user.id)
+    return FastJSONResponse(get_saved_listings_by_user_full(db, current_user.id))
 
 @router.post("/saved/{listing_id}", response_model=SavedListingResponse)
 def add_saved_listing(
@@ -11,6 +11,7 @@ from app.crud.payment import (
     list_user_payments,
     update_payment_status,
 )
+from app.core.responses import FastJSONResponse
 from app.dependencies import get_current_user, get_db
 from app.schemas.payment import (
     PaymentConfirmRequest,
@@ -18,6 +19,7 @@ from app.schemas.payment import (
     PaymentInitiateResponse,
     PaymentRecordOut,
     PaymentRequirement,
+    payment_record_dict,
 )
 from app.services.h402_client import (
     H402IntegrationError,
@@ -108,7 +110,7 @@ def payment_history(
     user=Depends(get_current_user),
 ):
     """Return the authenticated user's payment receipts."""
-    return list_user_payments(db, user.id)
+    return FastJSONResponse([payment_record_dict(r) for r in list_user_payments(db, user.id)])
 
 
 @router.get("/{payment_id}", response_model=PaymentRecordOut)
@@ -4,7 +4,9 @@ from typing import List
 
 from app.db import models
 from app.db.session import get_db
+from app.dependencies import get_current_user
 from app.schemas.stats import StatsSummary
+from app.utils.score_cache import get_score_cache
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
@@ -38,3 +40,8 @@ def get_stats_summary(db: Session = Depends(get_db)) -> StatsSummary:
         avg_visit_lead_hours=avg_visit_lead_hours,
     )
 
+
+@router.get("/score-cache")
+def get_score_cache_stats(current_user=Depends(get_current_user)) -> dict:
+    """Hit rate, size and evictions of this process's compatibility score cache."""
+    return get_score_cache().stats()
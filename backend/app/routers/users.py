@@ -6,15 +6,8 @@ from app.schemas.user import UserResponse, UserUpdateIn, RenterPreferencesIn, La
 from app.core.security import verify_password, get_password_hash
 from app.crud.user import get_user_by_id, link_wallet_address, save_renter_preferences, save_landlord_preferences
 from app.dependencies import get_db, get_current_user
-import os
-from uuid import uuid4
+from app.services.uploads import PROFILE_DOC, UploadRejected, save_upload
 from fastapi.responses import JSONResponse
-from pathlib import Path
-
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-UPLOAD_DIR = str(BASE_DIR / "uploads")
-PROFILE_PICS_DIR = os.path.join(UPLOAD_DIR, "profile_pics")
-os.makedirs(PROFILE_PICS_DIR, exist_ok=True)
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -35,14 +28,12 @@ def update_profile(
     return current_user
 
 @router.post("/upload-profile-doc")
-def upload_profile_doc(file: UploadFile = File(...), current_user=Depends(get_current_user)):
-    ext = os.path.splitext(file.filename)[1]
-    fname = f"{uuid4().hex}{ext}"
-    fpath = os.path.join(PROFILE_PICS_DIR, fname)
-    with open(fpath, "wb") as f:
-        f.write(file.file.read())
-    file_url = f"/static/profile_pics/{fname}"
-    return JSONResponse({"file_url": file_url})
+async def upload_profile_doc(file: UploadFile = File(...), db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    try:
+        stored = await save_upload(file, PROFILE_DOC, db)
+    except UploadRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+    return JSONResponse({"file_url": stored.url})
 
 @router.post("/change-password")
 def change_password(
@@ -1,7 +1,8 @@
 #app/schemas/listing.py
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Dict
 from datetime import datetime
+from app.core.responses import orm_dict
 
 class LandlordOut(BaseModel):
     id: int
@@ -85,11 +86,47 @@ class ListingResponse(BaseModel):
     pets_allowed: Optional[bool] = None
     lease_length: Optional[int] = None
     images: Optional[List[str]] = []
+    # {original url: {"thumb"|"medium"|"large": url}}: resized WebP versions (app.services.images)
+    image_variants: Optional[Dict[str, Dict[str, str]]] = {}
     match_score: Optional[float] = None
 
     class Config:
         orm_mode = True
 
+def listing_response_dict(listing, match_score: Optional[float] = None) -> dict:
+    """ListingResponse of an ORM listing as a plain dict, for FastJSONResponse list endpoints."""
+    data = orm_dict(listing, ListingResponse, exclude=("landlord", "match_score"))
+    data["landlord"] = orm_dict(listing.landlord, LandlordOut) if listing.landlord is not None else None
+    data["match_score"] = match_score
+    return data
+
+class ListingPage(BaseModel):
+    items: List[ListingResponse]
+    # Pass back as `cursor` to get the next page; None on the last page
+    next_cursor: Optional[str] = None
+    # sort=match: when the oldest score on this page was computed (UTC)
+    scored_at: Optional[datetime] = None
+
+class ListingCard(BaseModel):
+    """Browse-grid projection of a listing; the full listing is at /api/listings/{id}."""
+    id: int
+    title: str
+    location: str
+    rent_price: int
+    property_type: Optional[str] = None
+    bedrooms: Optional[int] = None
+    bathrooms: Optional[int] = None
+    sqft: Optional[int] = None
+    available_from: Optional[str] = None
+    thumbnail: Optional[str] = None  # first image, as its thumbnail once rendered
+    created_at: Optional[datetime] = None
+    match_score: Optional[float] = None
+
+class ListingCardPage(BaseModel):
+    items: List[ListingCard]
+    next_cursor: Optional[str] = None
+    scored_at: Optional[datetime] = None
+
 class SavedListingBase(BaseModel):
     listing_id: int
 
@@ -4,6 +4,8 @@ from typing import Any, Dict, Optional
 
 from pydantic import BaseModel, Field, root_validator, validator
 
+from app.core.responses import orm_dict
+
 
 class PaymentRequirement(BaseModel):
     namespace: str = "evm"
@@ -78,3 +80,8 @@ class PaymentRecordOut(BaseModel):
 
 
 PaymentInitiateResponse.update_forward_refs()
+
+
+def payment_record_dict(record) -> Dict[str, Any]:
+    """PaymentRecordOut of an ORM record as a plain dict, for FastJSONResponse list endpoints."""
+    return orm_dict(record, PaymentRecordOut)
@@ -0,0 +1,26 @@
+# app/schemas/upload.py
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, conint, constr
+
+
+class UploadSessionCreate(BaseModel):
+    size: conint(gt=0)  # total bytes of the file
+    sha256: Optional[constr(regex=r"^[0-9a-fA-F]{64}$")] = None  # checked when the upload completes
+
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    size: int
+    chunk_size: int  # every chunk but the last is exactly this long
+    chunks: int
+    received: List[int]  # chunk indexes stored so far
+    offset: int  # bytes received without gaps from the start of the file
+    expires_at: datetime
+
+
+class UploadCompleteResponse(BaseModel):
+    url: str
+    sha256: str
+    deduplicated: bool
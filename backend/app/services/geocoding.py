@@ -0,0 +1,116 @@
+# app/services/geocoding.py
+"""
+Background geocoding.
+
+Listings get their latitude/longitude written by `geocode_listing` after
+their location is created or edited, and renters' preferred locations are
+warmed into the geocode cache when their preferences change. Match scoring
+only reads stored coordinates and the cache (app.utilis.geo), so the
+geocoder is never called on the scoring path.
+"""
+
+import logging
+from typing import List
+
+from celery_app import celery
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.db.models import Listing, RenterPreferences
+from app.db.session import SessionLocal
+from app.services.task_queue import enqueue
+from app.utilis.geo import geocode_cache, geohash_encode
+
+logger = logging.getLogger(__name__)
+
+_CHANGES_KEY = "geocode_changes"
+
+
+@celery.task
+def geocode_listing(listing_id: int):
+    """Geocode a listing's location (through the cache) and store its coordinates and geohash."""
+    db: Session = SessionLocal()
+    try:
+        listing = db.query(Listing).filter(Listing.id == listing_id).first()
+        if not listing:
+            return None
+        coords = geocode_cache.geocode(listing.location, db)
+        latitude, longitude = coords if coords else (None, None)
+        geohash = geohash_encode(latitude, longitude) if coords else None
+        if (listing.latitude, listing.longitude, listing.geohash) != (latitude, longitude, geohash):
+            listing.latitude, listing.longitude, listing.geohash = latitude, longitude, geohash
+            db.commit()
+        return coords
+    finally:
+        db.close()
+
+
+@celery.task
+def geocode_addresses(addresses: List[str]):
+    """Make sure every address has a geocode cache entry."""
+    db: Session = SessionLocal()
+    try:
+        return sum(1 for address in addresses if geocode_cache.geocode(address, db))
+    finally:
+        db.close()
+
+
+@celery.task
+def geocode_missing_listings():
+    """
+    Backfill coordinates for listings (and renter locations) that don't have
+    them yet. Addresses the geocoder couldn't resolve are answered by the
+    cache, so re-running this is cheap.
+    """
+    db: Session = SessionLocal()
+    try:
+        listing_ids = [row.id for row in db.query(Listing.id).filter(Listing.geohash.is_(None))]
+        renter_locations = {
+            loc for (locations,) in db.query(RenterPreferences.locations) for loc in (locations or [])
+        }
+    finally:
+        db.close()
+    for listing_id in listing_ids:
+        geocode_listing(listing_id)
+    geocode_addresses(sorted(renter_locations))
+    return len(listing_ids)
+
+
+# --- Change tracking -------------------------------------------------------
+
+def _changes(session):
+    return session.info.setdefault(_CHANGES_KEY, {"listings": set(), "addresses": set()})
+
+
+def _after_flush(session, flush_context):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Listing):
+            if obj in session.new or inspect(obj).attrs.location.history.has_changes():
+                _changes(session)["listings"].add(obj.id)
+        elif isinstance(obj, RenterPreferences):
+            if obj in session.new or inspect(obj).attrs.locations.history.has_changes():
+                _changes(session)["addresses"].update(obj.locations or [])
+
+
+def _after_commit(session):
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if not changes:
+        return
+    # Anything lost on the way is picked up by geocode_missing_listings
+    for listing_id in changes["listings"]:
+        enqueue(geocode_listing.name, [listing_id])
+    if changes["addresses"]:
+        enqueue(geocode_addresses.name, [sorted(changes["addresses"])])
+
+
+def _after_rollback(session):
+    session.info.pop(_CHANGES_KEY, None)
+
+
+def register_geocoding(session_factory) -> None:
+    """Geocode listings and renter locations in the background after they are written."""
+    if event.contains(session_factory, "after_flush", _after_flush):
+        return
+    event.listen(session_factory, "after_flush", _after_flush)
+    event.listen(session_factory, "after_commit", _after_commit)
+    event.listen(session_factory, "after_rollback", _after_rollback)
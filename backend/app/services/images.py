@@ -0,0 +1,181 @@
+# app/services/images.py
+"""
+Background image derivatives.
+
+After a listing's images are written, `generate_listing_images` renders
+each uploaded original (app.services.uploads) into:
+- a fixed-size thumbnail, cropped to fill and used by browse cards;
+- medium and large WebP versions no wider than their bounds, for the detail view.
+The URLs are recorded in `Listing.image_variants` as
+{original_url: {"thumb": url, "medium": url, "large": url}}, or
+{original_url: {}} for an original that couldn't be rendered.
+
+Originals stay in `Listing.images` and are served as before. Derivatives
+are named after their original, so re-running a task only renders
+what's missing. Images hosted elsewhere are left alone.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from celery_app import celery
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.db.models import Listing
+from app.db.session import SessionLocal
+from app.services.task_queue import enqueue
+from app.services.uploads import STATIC_URL, UPLOADS_DIR, url_path
+
+logger = logging.getLogger(__name__)
+
+# name -> (width, height, crop to fill); without crop the image fits inside the box
+IMAGE_VARIANTS = {
+    "thumb": (400, 300, True),
+    "medium": (960, 960, False),
+    "large": (1920, 1920, False),
+}
+WEBP_QUALITY = 80
+DERIVED_DIR = "derived"
+
+_CHANGES_KEY = "image_changes"
+
+
+def _local_path(url: str) -> Optional[Path]:
+    """Filesystem path of an uploaded original, or None for anything else (derivatives included)."""
+    path = url_path(url)
+    if path is None or path.parent == UPLOADS_DIR / DERIVED_DIR:
+        return None
+    return path
+
+
+def _stem(url: str) -> str:
+    return os.path.splitext(url.rsplit("/", 1)[1])[0]
+
+
+def variant_url(url: str, variant: str) -> str:
+    # Stored originals are named by content hash, so stems don't collide
+    return f"{STATIC_URL}/{DERIVED_DIR}/{_stem(url)}-{variant}.webp"
+
+
+def derived_paths(url: str) -> list:
+    """Derivative files of an original that exist on disk."""
+    return [path for path in (_variant_path(url, name) for name in IMAGE_VARIANTS) if path.exists()]
+
+
+def _variant_path(url: str, variant: str) -> Path:
+    return UPLOADS_DIR / variant_url(url, variant)[len(STATIC_URL) + 1:]
+
+
+def render_variants(url: str) -> Dict[str, str]:
+    """Render the missing derivatives of one uploaded image; {variant: url} of those that exist."""
+    from PIL import Image, ImageOps
+
+    source = _local_path(url)
+    if source is None or not source.exists():
+        return {}
+    variants = {}
+    image = None
+    try:
+        for name, (width, height, crop) in IMAGE_VARIANTS.items():
+            target = _variant_path(url, name)
+            if not target.exists():
+                if image is None:
+                    image = ImageOps.exif_transpose(Image.open(source))
+                    image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+                if crop:
+                    resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+                else:
+                    resized = image.copy()
+                    resized.thumbnail((width, height), Image.LANCZOS)  # never upscales
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp = target.with_name(f".{target.name}.tmp")
+                resized.save(tmp, "WEBP", quality=WEBP_QUALITY, method=4)
+                os.replace(tmp, target)
+            variants[name] = variant_url(url, name)
+    except Exception:
+        # A corrupt or unsupported original keeps being served as-is
+        logger.exception("Could not render derivatives of %s", url)
+        return {}
+    finally:
+        if image is not None:
+            image.close()
+    return variants
+
+
+@celery.task
+def generate_listing_images(listing_id: int):
+    """Render derivatives for a listing's uploaded images and record them in image_variants."""
+    db: Session = SessionLocal()
+    try:
+        listing = db.query(Listing).filter(Listing.id == listing_id).first()
+        if not listing:
+            return 0
+        images = list(listing.images or [])
+        existing = listing.image_variants or {}
+        variants = {}
+        for url in images:
+            if url in existing:
+                variants[url] = existing[url]
+            elif _local_path(url) is not None:
+                # {} marks an original that can't be rendered, so it isn't retried
+                variants[url] = render_variants(url)
+        if variants != existing:
+            # Don't overwrite an edit that landed while we were rendering
+            db.refresh(listing, ["images"])
+            if list(listing.images or []) == images:
+                listing.image_variants = variants
+                db.commit()
+        return len(variants)
+    finally:
+        db.close()
+
+
+@celery.task
+def generate_missing_image_variants():
+    """Backfill derivatives for listings whose images aren't all rendered yet."""
+    db: Session = SessionLocal()
+    try:
+        rows = db.query(Listing.id, Listing.images, Listing.image_variants).all()
+    finally:
+        db.close()
+    pending = [
+        listing_id for listing_id, images, variants in rows
+        if any(_local_path(url) and url not in (variants or {}) for url in images or [])
+    ]
+    for listing_id in pending:
+        generate_listing_images.delay(listing_id)
+    return len(pending)
+
+
+# --- Change tracking -------------------------------------------------------
+
+def _after_flush(session, flush_context):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Listing) and obj.images:
+            if obj in session.new or inspect(obj).attrs.images.history.has_changes():
+                session.info.setdefault(_CHANGES_KEY, set()).add(obj.id)
+
+
+def _after_commit(session):
+    listing_ids = session.info.pop(_CHANGES_KEY, None)
+    if not listing_ids:
+        return
+    # Anything lost on the way is picked up by generate_missing_image_variants
+    for listing_id in listing_ids:
+        enqueue(generate_listing_images.name, [listing_id])
+
+
+def _after_rollback(session):
+    session.info.pop(_CHANGES_KEY, None)
+
+
+def register_image_derivatives(session_factory) -> None:
+    """Render listing image derivatives in the background after images are written."""
+    if event.contains(session_factory, "after_flush", _after_flush):
+        return
+    event.listen(session_factory, "after_flush", _after_flush)
+    event.listen(session_factory, "after_commit", _after_commit)
+    event.listen(session_factory, "after_rollback", _after_rollback)
@@ -0,0 +1,75 @@
+# app/services/listing_scores.py
+"""
+Per-renter listing scores.
+
+The listing_scores table holds the rule-based compatibility score of every
+listing for every renter, so sort-by-match browsing is an indexed
+ORDER BY score LIMIT n instead of scoring the catalog per request. Rows are
+rewritten when a renter's preferences or a listing change (tasks in
+app.services.matching, enqueued by app.services.match_events) and swept
+daily; each row carries scored_at so readers can see how fresh it is.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.crud.preferences import get_landlord_preferences_map
+from app.crud.scores import get_scored_renter_ids, replace_listing_scores, replace_renter_scores
+from app.db.models import Listing, RenterPreferences
+from app.services.match_events import RENTER_SCORES_TASK
+from app.services.task_queue import enqueue
+from app.utils.batch_match import encode_listings, iter_score_blocks
+
+logger = logging.getLogger(__name__)
+
+
+def score_catalog(renters: Sequence, listings: Sequence[Listing], landlord_pref_map: Dict):
+    """Yield {renter_id: [(listing_id, score)]} one renter chunk at a time."""
+    encoded = encode_listings(listings, landlord_pref_map)
+    listing_ids = [listing.id for listing in listings]
+    for encoded_renters, scores in iter_score_blocks(renters, encoded):
+        yield {
+            renter.user_id: list(zip(listing_ids, row.tolist()))
+            for renter, row in zip(encoded_renters.renters, scores)
+        }
+
+
+def refresh_renter_scores(db: Session, renters: Sequence[RenterPreferences]) -> int:
+    """Rescore the whole catalog for these renters and replace their rows."""
+    if not renters:
+        return 0
+    listings = db.query(Listing).order_by(Listing.id).all()
+    landlord_pref_map = get_landlord_preferences_map(db, {l.landlord_id for l in listings})
+    for rows_by_renter in score_catalog(renters, listings, landlord_pref_map):
+        replace_renter_scores(db, rows_by_renter)
+    return len(renters)
+
+
+def refresh_listing_scores(db: Session, listing_ids: Iterable[int]) -> int:
+    """
+    Rescore changed listings for every renter that has scores and replace
+    their rows; deleted listings just lose theirs.
+    """
+    listing_ids = sorted(set(listing_ids))
+    if not listing_ids:
+        return 0
+    renter_ids = get_scored_renter_ids(db)
+    renters = (
+        db.query(RenterPreferences).filter(RenterPreferences.user_id.in_(renter_ids)).all()
+        if renter_ids else []
+    )
+    listings = db.query(Listing).filter(Listing.id.in_(listing_ids)).order_by(Listing.id).all()
+    rows_by_renter: Dict[int, List[Tuple[int, float]]] = {}
+    if renters and listings:
+        for chunk in score_catalog(renters, listings, get_landlord_preferences_map(db, {l.landlord_id for l in listings})):
+            rows_by_renter.update(chunk)
+    replace_listing_scores(db, listing_ids, rows_by_renter)
+    return len(listings)
+
+
+def enqueue_renter_refresh(user_id: int) -> None:
+    """Ask a worker to rescore a renter's catalog (sent by name, like match_events)."""
+    # Anything lost on the way is picked up by the daily sweep
+    enqueue(RENTER_SCORES_TASK, [user_id])
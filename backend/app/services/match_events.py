@@ -0,0 +1,88 @@
+# app/services/match_events.py
+"""
+Change tracking for match inputs.
+
+Session hooks record which RenterPreferences, LandlordPreferences and
+Listing rows were written in a transaction and, once it commits, enqueue
+targeted recomputation tasks from app.services.matching. Tasks are sent
+by name (app.services.task_queue) so API processes never import the
+matching stack.
+"""
+
+import logging
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.db.models import LandlordPreferences, Listing, RenterPreferences
+from app.services.task_queue import enqueue
+
+logger = logging.getLogger(__name__)
+
+_CHANGES_KEY = "match_changes"
+
+RENTER_TASK = "app.services.matching.recompute_matches_for_renter"
+LANDLORD_TASK = "app.services.matching.recompute_matches_for_landlord"
+LISTINGS_TASK = "app.services.matching.recompute_matches_for_listings"
+LISTING_INDEX_TASK = "app.services.matching.update_listing_index"
+SEMANTIC_SEARCH_TASK = "app.services.matching.semantic_search_listings"
+RENTER_SCORES_TASK = "app.services.matching.refresh_listing_scores_for_renter"
+LANDLORD_SCORES_TASK = "app.services.matching.refresh_listing_scores_for_landlord"
+LISTINGS_SCORES_TASK = "app.services.matching.refresh_listing_scores_for_listings"
+
+
+def _changes(session):
+    return session.info.setdefault(
+        _CHANGES_KEY, {"renters": set(), "landlords": set(), "listings": set()}
+    )
+
+
+def _after_flush(session, flush_context):
+    changed = list(session.new) + list(session.deleted)
+    changed += [obj for obj in session.dirty if session.is_modified(obj)]
+    for obj in changed:
+        if isinstance(obj, RenterPreferences):
+            _changes(session)["renters"].add(obj.user_id)
+        elif isinstance(obj, LandlordPreferences):
+            _changes(session)["landlords"].add(obj.user_id)
+        elif isinstance(obj, Listing):
+            _changes(session)["listings"].add(obj.id)
+
+
+def _after_commit(session):
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if changes:
+        enqueue_recomputation(changes)
+
+
+def _after_rollback(session):
+    session.info.pop(_CHANGES_KEY, None)
+
+
+def enqueue_recomputation(changes) -> None:
+    """Queue the recompute tasks for a commit's changes (anything lost is picked up nightly)."""
+    for user_id in changes["renters"]:
+        if user_id is not None:
+            enqueue(RENTER_TASK, [user_id])
+            enqueue(RENTER_SCORES_TASK, [user_id])
+    for user_id in changes["landlords"]:
+        if user_id is not None:
+            enqueue(LANDLORD_TASK, [user_id])
+            enqueue(LANDLORD_SCORES_TASK, [user_id])
+    listing_ids = sorted(i for i in changes["listings"] if i is not None)
+    if listing_ids:
+        enqueue(LISTINGS_TASK, [listing_ids])
+        enqueue(LISTINGS_SCORES_TASK, [listing_ids])
+        if settings.USE_SEMANTIC_MATCHING:
+            enqueue(LISTING_INDEX_TASK, [listing_ids])
+
+
+def register_match_change_tracking(session_factory) -> None:
+    """Attach the hooks to a sessionmaker (no-op when MATCH_INCREMENTAL_UPDATES is off)."""
+    if not settings.MATCH_INCREMENTAL_UPDATES:
+        return
+    if event.contains(session_factory, "after_flush", _after_flush):
+        return
+    event.listen(session_factory, "after_flush", _after_flush)
+    event.listen(session_factory, "after_commit", _after_commit)
+    event.listen(session_factory, "after_rollback", _after_rollback)
@@ -1,88 +1,603 @@
 # app/services/matching.py
-from datetime import date
+import logging
+import pickle
+import random
+import zlib
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from celery import chord
+from celery.signals import worker_process_init
 from celery_app import celery
 from sqlalchemy.orm import Session
 
-from app.crud.match import create_daily_match, delete_matches_for_date
+from app.crud.match import (
+    clear_staged_matches,
+    get_matches_for_date,
+    replace_renter_matches,
+    discard_staged_matches,
+    new_match_run_id,
+    stage_daily_matches,
+    swap_in_staged_matches,
+)
 from app.db.models import LandlordPreferences, Listing, RenterPreferences
 from app.db.session import SessionLocal
 from app.core.config import settings
-from app.utils.match import compute_compatibility_score
-from app.utils.ml_match import SmartMatcher, compute_user_behavior_features, find_similar_users
+from app.services import listing_scores
+from app.utils.batch_match import EncodedListings, encode_listings, iter_score_blocks, top_k_indices
+from app.utils.ml_match import BehaviorFeatureStore, SmartMatcher
+from app.utils.model_registry import registry
+from app.utils.similar_users import SimilarUserIndex, load_saved_listing_ids
+from app.utilis.geo import GeohashIndex, PROXIMITY_THRESHOLD_KM, geocode_cache, proximity_scores
 
 
-# Initialize smart matcher (can be configured via env vars)
+# Initialize smart matcher (can be configured via env vars). This is cheap:
+# the embedding model is loaded by the model registry on first use.
 USE_ML_MATCHING = settings.USE_ML_MATCHING
 USE_SEMANTIC = settings.USE_SEMANTIC_MATCHING
 
-smart_matcher = SmartMatcher(use_semantic=USE_SEMANTIC) if USE_ML_MATCHING else None
+smart_matcher = SmartMatcher(
+    use_semantic=USE_SEMANTIC,
+    embedding_store_dir=settings.EMBEDDING_STORE_DIR,
+    embedding_dtype=settings.EMBEDDING_STORE_DTYPE,
+) if USE_ML_MATCHING else None
 
+logger = logging.getLogger(__name__)
 
-@celery.task
-def compute_daily_matches():
+
+@worker_process_init.connect
+def warm_up_models(**kwargs):
+    """Load the embedding model when a worker process boots (ML_MODEL_WARMUP)."""
+    if settings.ML_MODEL_WARMUP and smart_matcher:
+        smart_matcher.warm_up()
+        logger.info("Model registry after warm-up: %s", registry.stats())
+
+
+class ListingSnapshot:
     """
-    Compute daily matches using AI-enhanced matching if enabled,
-    otherwise falls back to rule-based scoring.
+    Read-only view of the catalog for one matching run: the listings, their
+    landlord preferences, the encoded score arrays, a geohash index over
+    listing coordinates and (for ML matching) the similar-renter index.
+    `catalog` is the encoding behavior features are computed against; it
+    is the full catalog even for a subset.
     """
-    db: Session = SessionLocal()
-    today = date.today()
 
-    delete_matches_for_date(db, today)
+    def __init__(
+        self,
+        run_id: str,
+        listings: List[Listing],
+        landlord_pref_map: Dict,
+        similar_index: Optional[SimilarUserIndex] = None,
+        catalog: Optional[EncodedListings] = None,
+    ):
+        self.run_id = run_id
+        self.listings = listings
+        self.landlord_pref_map = landlord_pref_map
+        self.encoded: EncodedListings = encode_listings(listings, landlord_pref_map)
+        self.similar_index = similar_index
+        self.catalog = catalog or self.encoded
+        self.geo_index = GeohashIndex.from_listings(listings)
 
-    renters = db.query(RenterPreferences).all()
-    listings = db.query(Listing).all()
+    @staticmethod
+    def _read(db: Session) -> Tuple[List[Listing], Dict, Optional[SimilarUserIndex]]:
+        listings = db.query(Listing).order_by(Listing.id).all()
+        landlord_pref_map = {
+            lp.user_id: lp for lp in db.query(LandlordPreferences).all()
+        }
+        similar_index = None
+        if smart_matcher:
+            # Collaborative filtering looks at all renters, not just this shard
+            similar_index = SimilarUserIndex.build(
+                db.query(RenterPreferences).all(), load_saved_listing_ids(db)
+            )
+        # The snapshot outlives the session that loaded it
+        db.expunge_all()
+        return listings, landlord_pref_map, similar_index
 
-    landlord_pref_map = {
-        lp.user_id: lp for lp in db.query(LandlordPreferences).all()
-    }
+    @classmethod
+    def load(cls, db: Session, run_id: str) -> "ListingSnapshot":
+        snapshot = cls(run_id, *cls._read(db))
+        snapshot.prefetch_geocodes(db)
+        return snapshot
 
-    for renter_pref in renters:
-        ranked = []
-        
-        # Pre-compute similar users for collaborative filtering (if ML enabled)
-        similar_users_data = None
-        if smart_matcher:
-            similar_users = find_similar_users(db, renter_pref, limit=10)
+    @classmethod
+    def dump(cls, db: Session) -> bytes:
+        """The catalog as it is now, serialized for ListingSnapshot.from_bytes."""
+        return zlib.compress(pickle.dumps(cls._read(db), protocol=pickle.HIGHEST_PROTOCOL))
+
+    @classmethod
+    def from_bytes(cls, run_id: str, data: bytes) -> "ListingSnapshot":
+        return cls(run_id, *pickle.loads(zlib.decompress(data)))
+
+    def prefetch_geocodes(self, db: Session) -> None:
+        # Cached coordinates for listings the geocoding task hasn't reached yet
+        geocode_cache.prefetch(db, {l.location for l in self.listings if l.latitude is None and l.location})
+
+    def subset(self, listing_ids) -> "ListingSnapshot":
+        wanted = set(listing_ids)
+        return ListingSnapshot(
+            self.run_id,
+            [l for l in self.listings if l.id in wanted],
+            self.landlord_pref_map,
+            self.similar_index,
+            catalog=self.catalog,
+        )
+
+
+# Nightly runs read the catalog once, in the coordinator, and store it in
+# Redis under the run id; every shard, on whichever worker, scores against
+# that same copy. Each worker process decodes it once per run.
+_snapshot: Optional[ListingSnapshot] = None
+
+
+def _snapshot_key(run_id: str) -> str:
+    return f"match_snapshot:{run_id}"
+
+
+def _snapshot_store():
+    import redis
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+def publish_listing_snapshot(db: Session, run_id: str) -> int:
+    """Materialize the run's catalog for its shards; returns its size in bytes."""
+    data = ListingSnapshot.dump(db)
+    _snapshot_store().set(_snapshot_key(run_id), data, ex=settings.MATCH_SNAPSHOT_TTL_S)
+    return len(data)
+
+
+def drop_listing_snapshot(run_id: str) -> None:
+    try:
+        _snapshot_store().delete(_snapshot_key(run_id))
+    except Exception:
+        # It expires after MATCH_SNAPSHOT_TTL_S anyway
+        logger.exception("Could not delete match snapshot for run %s", run_id)
+
+
+def get_listing_snapshot(db: Session, run_id: str) -> ListingSnapshot:
+    """The run's published snapshot, decoded once per worker process and reused for every shard."""
+    global _snapshot
+    if _snapshot is None or _snapshot.run_id != run_id:
+        _snapshot = None
+        data = _snapshot_store().get(_snapshot_key(run_id))
+        if data is None:
+            raise RuntimeError(f"Match snapshot for run {run_id} is missing or expired")
+        _snapshot = ListingSnapshot.from_bytes(run_id, data)
+        _snapshot.prefetch_geocodes(db)
+    return _snapshot
+
+
+def rank_renters(
+    db: Session,
+    renters: Sequence,
+    snapshot: ListingSnapshot,
+    top_k: Optional[int] = None,
+    candidates: Optional[int] = None,
+) -> List[Tuple[int, int, float]]:
+    """
+    Score renters against the snapshot and return their top matches as
+    (renter_id, listing_id, score) rows. Uses AI-enhanced matching if
+    enabled, otherwise the rule-based scores.
+
+    AI matching is a cascade: the rule-based score picks each renter's
+    `candidates` best listings (MATCH_CASCADE_CANDIDATES by default, 0 for
+    all) and only those go through the behavioral, semantic,
+    collaborative and geo stages.
+    """
+    top_k = top_k or settings.MATCHES_PER_RENTER
+    if candidates is None:
+        candidates = settings.MATCH_CASCADE_CANDIDATES
+    listings = snapshot.listings
+    landlord_pref_map = snapshot.landlord_pref_map
+
+    # Saves, visits and ignored matches for these renters, loaded once
+    behavior_store = None
+    if smart_matcher:
+        behavior_store = BehaviorFeatureStore.load(
+            db, snapshot.catalog, user_ids=[r.user_id for r in renters]
+        )
+        # Encodes only renters/listings whose text changed since the last run
+        smart_matcher.sync_embeddings(renters, listings)
+        # Renter location coordinates for the geo boost, in one query
+        geocode_cache.prefetch(db, {loc for r in renters for loc in (r.locations or [])})
+
+    rows = []
+    # Rule-based scores for every renter x listing pair, one renter chunk at a time
+    for encoded_renters, base_scores in iter_score_blocks(renters, snapshot.encoded):
+        for renter_pref, renter_scores in zip(encoded_renters.renters, base_scores):
+            if not smart_matcher:
+                # Rule-based only
+                for idx in top_k_indices(renter_scores, top_k):
+                    rows.append((renter_pref.user_id, listings[idx].id, float(renter_scores[idx])))
+                continue
+
+            if 0 < candidates < len(listings):
+                # Catalog order keeps tie-breaking identical to the exhaustive pass
+                pool = sorted(top_k_indices(renter_scores, candidates))
+            else:
+                pool = range(len(listings))
+
+            # Distance to the nearest preferred location, for listings within range
+            renter_coords = [
+                c for c in (geocode_cache.lookup(loc, db) for loc in (renter_pref.locations or []))
+                if c is not None
+            ]
+            nearby = snapshot.geo_index.within(renter_coords, PROXIMITY_THRESHOLD_KM)
+
+            semantic_scores = None
+            if smart_matcher.has_embedding_store:
+                semantic_scores = smart_matcher.semantic_score_matrix(
+                    [renter_pref], [listings[idx] for idx in pool]
+                )[0]
+
+            ranked = []
+
+            # Pre-compute similar users for collaborative filtering
+            similar_users = snapshot.similar_index.query(renter_pref, limit=10)
             similar_users_data = []
             for su in similar_users:
                 for listing_id in su.get('saved_listing_ids', []):
                     similar_users_data.append({'saved_listing_id': listing_id})
-        
-        for listing in listings:
-            landlord_pref = landlord_pref_map.get(listing.landlord_id)
-            
-            if smart_matcher:
+
+            for pos, idx in enumerate(pool):
+                listing = listings[idx]
+                landlord_pref = landlord_pref_map.get(listing.landlord_id)
+
                 # AI-enhanced matching
-                user_behavior = compute_user_behavior_features(
-                    db, renter_pref.user_id, listing.id
-                )
-                
+                user_behavior = behavior_store.features_for(renter_pref.user_id, listing.id)
+
                 score, explanation = smart_matcher.compute_enhanced_score(
                     renter_pref,
                     landlord_pref,
                     listing,
                     user_behavior=user_behavior,
-                    similar_users_prefs=similar_users_data
+                    similar_users_prefs=similar_users_data,
+                    base_score=float(renter_scores[idx]),
+                    semantic_score=None if semantic_scores is None else float(semantic_scores[pos]),
+                    geo_score=float(proximity_scores(nearby[listing.id], 1.0)) if listing.id in nearby else 0.0,
                 )
-            else:
-                # Fallback to rule-based
-                score = compute_compatibility_score(renter_pref, landlord_pref, listing)
-                explanation = {"base_score": score}
-            
-            ranked.append((listing.id, score, explanation))
-        
-        # Sort by score
-        ranked.sort(key=lambda item: item[1], reverse=True)
-        
-        # Store top 3 matches (can be configurable)
-        for listing_id, score, explanation in ranked[:3]:
-            create_daily_match(
-                db,
-                renter_pref.user_id,
-                listing_id,
-                float(score),
-                today,
+                ranked.append((listing.id, score, explanation))
+
+            # Sort by score
+            ranked.sort(key=lambda item: item[1], reverse=True)
+
+            for listing_id, score, explanation in ranked[:top_k]:
+                rows.append((renter_pref.user_id, listing_id, float(score)))
+    return rows
+
+
+def cascade_divergence(
+    db: Session,
+    renters: Sequence,
+    snapshot: ListingSnapshot,
+    candidates: Optional[int] = None,
+) -> Dict[str, float]:
+    """
+    Rank renters with the cascade and exhaustively, and report how many
+    renters end up with a different top-k. Used to tune MATCH_CASCADE_CANDIDATES.
+    """
+    cascade = _group_rows(rank_renters(db, renters, snapshot, candidates=candidates))
+    exhaustive = _group_rows(rank_renters(db, renters, snapshot, candidates=0))
+    differs = sum(
+        1 for renter in renters
+        if {row[1] for row in cascade.get(renter.user_id, [])}
+        != {row[1] for row in exhaustive.get(renter.user_id, [])}
+    )
+    return {
+        "audited": len(renters),
+        "differs": differs,
+        "rate": differs / len(renters) if renters else 0.0,
+    }
+
+
+def _shards(ids: List[int], size: int) -> List[List[int]]:
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+def _group_rows(rows: List[Tuple[int, int, float]]) -> Dict[int, List[Tuple[int, int, float]]]:
+    grouped: Dict[int, List[Tuple[int, int, float]]] = {}
+    for row in rows:
+        grouped.setdefault(row[0], []).append(row)
+    return grouped
+
+
+@celery.task
+def compute_daily_matches():
+    """
+    Coordinator for the nightly run: snapshots the catalog, splits renters
+    into shards and fans out one scoring task per shard. When every shard
+    has staged its rows, finalize_daily_matches swaps them in for the date.
+    """
+    db: Session = SessionLocal()
+    try:
+        run_id = new_match_run_id()
+        today = date.today().isoformat()
+        # Incremental recomputes after this point are newer than the run's results
+        started_at = datetime.utcnow().isoformat()
+        size = publish_listing_snapshot(db, run_id)
+        logger.info("Match run %s: published a %d-byte listing snapshot", run_id, size)
+        renter_ids = [
+            row.user_id
+            for row in db.query(RenterPreferences.user_id).order_by(RenterPreferences.user_id)
+        ]
+    finally:
+        db.close()
+
+    finalize = finalize_daily_matches.s(run_id, today, started_at).on_error(
+        discard_daily_match_run.si(run_id)
+    )
+    shards = _shards(renter_ids, settings.MATCH_SHARD_SIZE)
+    if not shards:
+        return finalize.delay([])
+    return chord(
+        score_match_shard.s(run_id, today, shard) for shard in shards
+    )(finalize)
+
+
+@celery.task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    max_retries=settings.MATCH_SHARD_MAX_RETRIES,
+)
+def score_match_shard(self, run_id: str, matched_date: str, renter_ids: List[int]):
+    """Score one shard of renters and stage its matches. Safe to retry."""
+    db: Session = SessionLocal()
+    try:
+        clear_staged_matches(db, run_id, renter_ids)
+        snapshot = get_listing_snapshot(db, run_id)
+        renters = (
+            db.query(RenterPreferences)
+            .filter(RenterPreferences.user_id.in_(renter_ids))
+            .order_by(RenterPreferences.user_id)
+            .all()
+        )
+        rows = rank_renters(db, renters, snapshot)
+        staged = stage_daily_matches(db, run_id, date.fromisoformat(matched_date), rows)
+
+        audit = {"audited": 0, "differs": 0}
+        audit_size = int(len(renters) * settings.MATCH_CASCADE_AUDIT_RATE)
+        if smart_matcher and audit_size and 0 < settings.MATCH_CASCADE_CANDIDATES < len(snapshot.listings):
+            audit = cascade_divergence(db, random.sample(renters, audit_size), snapshot)
+        return {"staged": staged, "audited": audit["audited"], "differs": audit["differs"]}
+    finally:
+        db.close()
+
+
+@celery.task
+def finalize_daily_matches(
+    shard_results: List[Dict], run_id: str, matched_date: str, started_at: Optional[str] = None,
+):
+    """Chord callback: atomically publish the run's staged matches."""
+    db: Session = SessionLocal()
+    try:
+        swap_in_staged_matches(
+            db, run_id, date.fromisoformat(matched_date),
+            datetime.fromisoformat(started_at) if started_at else None,
+        )
+    finally:
+        db.close()
+    drop_listing_snapshot(run_id)
+
+    shard_results = shard_results or []
+    audited = sum(r["audited"] for r in shard_results)
+    differs = sum(r["differs"] for r in shard_results)
+    if audited:
+        logger.info(
+            "Match run %s: cascade top-%d differed from exhaustive for %d/%d audited renters (%.1f%%) at N=%d",
+            run_id, settings.MATCHES_PER_RENTER, differs, audited, 100.0 * differs / audited,
+            settings.MATCH_CASCADE_CANDIDATES,
+        )
+    return {
+        "staged": sum(r["staged"] for r in shard_results),
+        "audited": audited,
+        "differs": differs,
+    }
+
+
+@celery.task
+def discard_daily_match_run(run_id: str):
+    """Error callback: drop whatever a failed run managed to stage."""
+    db: Session = SessionLocal()
+    try:
+        discard_staged_matches(db, run_id)
+    finally:
+        db.close()
+    drop_listing_snapshot(run_id)
+
+
+# --- Incremental recomputation ---------------------------------------------
+# Enqueued by app.services.match_events when preferences or listings change.
+# Only the affected renters' DailyMatch rows for today are rewritten; the
+# nightly run remains the consistency sweep.
+
+@celery.task
+def recompute_matches_for_renter(user_id: int):
+    """Rescore one renter against every listing and replace their matches for today."""
+    db: Session = SessionLocal()
+    try:
+        renter = db.query(RenterPreferences).filter(RenterPreferences.user_id == user_id).first()
+        if not renter:
+            return 0
+        snapshot = ListingSnapshot.load(db, new_match_run_id())
+        rows = rank_renters(db, [renter], snapshot)
+        replace_renter_matches(db, date.today(), {user_id: rows})
+        return len(rows)
+    finally:
+        db.close()
+
+
+@celery.task
+def recompute_matches_for_landlord(landlord_id: int):
+    """Landlord preferences feed every one of their listings' scores."""
+    db: Session = SessionLocal()
+    try:
+        listing_ids = [
+            row.id for row in db.query(Listing.id).filter(Listing.landlord_id == landlord_id)
+        ]
+    finally:
+        db.close()
+    return recompute_matches_for_listings(listing_ids) if listing_ids else 0
+
+
+@celery.task
+def recompute_matches_for_listings(listing_ids: List[int]):
+    """
+    Rescore changed (or deleted) listings against every renter and merge them
+    into today's matches. A renter whose current top matches include a
+    listing that got worse or disappeared is rescored in full, since the
+    replacement could be any listing.
+    """
+    today = date.today()
+    top_k = settings.MATCHES_PER_RENTER
+    changed = set(listing_ids)
+    db: Session = SessionLocal()
+    try:
+        current: Dict[int, List[Tuple[int, int, float]]] = {}
+        for match in get_matches_for_date(db, today):
+            current.setdefault(match.renter_id, []).append(
+                (match.renter_id, match.listing_id, match.compatibility_score)
+            )
+        renters = db.query(RenterPreferences).order_by(RenterPreferences.user_id).all()
+        # Renters without matches today are filled in by the nightly run
+        renters = [r for r in renters if r.user_id in current]
+        if not renters:
+            return 0
+
+        snapshot = ListingSnapshot.load(db, new_match_run_id())
+        live = snapshot.subset(changed)
+        new_scores: Dict[int, Dict[int, float]] = {}
+        for renter_id, listing_id, score in rank_renters(db, renters, live, top_k=len(live.listings) or 1, candidates=0):
+            new_scores.setdefault(renter_id, {})[listing_id] = score
+
+        updates: Dict[int, List[Tuple[int, int, float]]] = {}
+        full_rescore = []
+        for renter in renters:
+            rows = current[renter.user_id]
+            scores = new_scores.get(renter.user_id, {})
+            # A listing delete can leave rows whose listing_id was nulled out
+            degraded = any(
+                listing_id is None
+                or (listing_id in changed and scores.get(listing_id, -1.0) < score)
+                for _, listing_id, score in rows
             )
-    
-    db.close()
+            # Ties with the current cut-off are broken by catalog order, which
+            # depends on listings we haven't rescored
+            cutoff = min(score for _, _, score in rows)
+            if degraded or (len(rows) >= top_k and cutoff in scores.values()):
+                full_rescore.append(renter)
+                continue
+            merged = [row for row in rows if row[1] not in changed]
+            merged += [(renter.user_id, listing_id, score) for listing_id, score in scores.items()]
+            merged.sort(key=lambda row: (-row[2], row[1]))
+            merged = merged[:top_k]
+            if set(merged) != set(rows):
+                updates[renter.user_id] = merged
+
+        for renter_id, rows in _group_rows(rank_renters(db, full_rescore, snapshot)).items():
+            updates[renter_id] = rows
+        for renter in full_rescore:
+            updates.setdefault(renter.user_id, [])
+
+        replace_renter_matches(db, today, updates)
+        return len(updates)
+    finally:
+        db.close()
+
+
+# --- Semantic listing index ------------------------------------------------
+# IVF index over listing embeddings used for semantic candidate retrieval
+# (SmartMatcher.retrieve_semantic_candidates). Rebuilt periodically to
+# re-fit its clusters; edits in between are inserted incrementally.
+
+def _semantic_enabled() -> bool:
+    return bool(smart_matcher and smart_matcher.has_embedding_store)
+
+
+@celery.task
+def rebuild_listing_index():
+    """Re-cluster the semantic listing index over the whole catalog."""
+    if not _semantic_enabled():
+        return 0
+    db: Session = SessionLocal()
+    try:
+        listings = db.query(Listing).order_by(Listing.id).all()
+        return smart_matcher.build_listing_index(listings)
+    finally:
+        db.close()
+
+
+@celery.task
+def update_listing_index(listing_ids: List[int]):
+    """Insert new/edited listings into the semantic index and drop deleted ones."""
+    if not _semantic_enabled():
+        return 0
+    db: Session = SessionLocal()
+    try:
+        listings = db.query(Listing).filter(Listing.id.in_(listing_ids)).all()
+        removed = set(listing_ids) - {l.id for l in listings}
+        return smart_matcher.index_listings(listings, removed_ids=removed)
+    finally:
+        db.close()
+
+
+@celery.task
+def semantic_search_listings(query: str, limit: int):
+    """
+    [listing_id, score] pairs for a free-text query, best first; None when
+    semantic matching is off. Runs on workers so API processes never load the model.
+    """
+    if not _semantic_enabled():
+        return None
+    return [
+        [int(listing_id), float(score)]
+        for listing_id, score in smart_matcher.retrieve_semantic_candidates(query=query, k=limit)
+    ]
+
+
+# --- Per-renter listing scores ---------------------------------------------
+# Backing store for sort-by-match browsing (app.services.listing_scores).
+
+@celery.task
+def refresh_listing_scores_for_renter(user_id: int):
+    """Rescore the catalog for a renter whose preferences changed."""
+    db: Session = SessionLocal()
+    try:
+        renters = db.query(RenterPreferences).filter(RenterPreferences.user_id == user_id).all()
+        return listing_scores.refresh_renter_scores(db, renters)
+    finally:
+        db.close()
+
+
+@celery.task
+def refresh_listing_scores_for_landlord(landlord_id: int):
+    """Landlord preferences feed every one of their listings' scores."""
+    db: Session = SessionLocal()
+    try:
+        listing_ids = [
+            row.id for row in db.query(Listing.id).filter(Listing.landlord_id == landlord_id)
+        ]
+        return listing_scores.refresh_listing_scores(db, listing_ids)
+    finally:
+        db.close()
+
+
+@celery.task
+def refresh_listing_scores_for_listings(listing_ids: List[int]):
+    """Rescore new/edited listings for every renter and drop deleted ones."""
+    db: Session = SessionLocal()
+    try:
+        return listing_scores.refresh_listing_scores(db, listing_ids)
+    finally:
+        db.close()
+
+
+@celery.task
+def refresh_all_listing_scores():
+    """Daily sweep: bounds how stale any renter's scores can get."""
+    db: Session = SessionLocal()
+    try:
+        renters = db.query(RenterPreferences).order_by(RenterPreferences.user_id).all()
+        return listing_scores.refresh_renter_scores(db, renters)
+    finally:
+        db.close()
@@ -0,0 +1,101 @@
+# app/services/task_queue.py
+"""
+Publishing Celery tasks from request handlers and session hooks.
+
+`enqueue` hands a task (by name) to a background thread that publishes it,
+so a request never waits on the broker: not for publish retries, not for
+the result backend, and not for the connect timeout while Redis is down.
+Messages are published once, without retries, and their results are
+ignored (nobody reads them); work lost to a broker outage is picked up by
+the periodic backfills. The queue is bounded, and messages that don't fit
+are dropped with an error log rather than blocking the caller.
+
+`call` is for the few requests that need a task's answer (e.g. work that
+needs the embedding model, which only workers load): it sends the task and
+waits for its result, with a timeout.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+from typing import Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING = 10_000
+
+_queue: "queue.Queue" = queue.Queue(maxsize=MAX_PENDING)
+_lock = threading.Lock()
+_publisher: Optional[threading.Thread] = None
+_publisher_pid: Optional[int] = None
+
+
+def _publish_forever(pending: "queue.Queue") -> None:
+    from celery_app import celery
+
+    while True:
+        item = pending.get()
+        if isinstance(item, threading.Event):  # flush marker
+            item.set()
+            continue
+        name, args = item
+        try:
+            celery.send_task(name, args=args, retry=False, ignore_result=True)
+        except Exception:
+            logger.exception("Could not enqueue %s%s", name, tuple(args))
+
+
+def _ensure_publisher() -> None:
+    global _queue, _publisher, _publisher_pid
+    if _publisher is not None and _publisher_pid == os.getpid():
+        return
+    with _lock:
+        if _publisher is not None and _publisher_pid == os.getpid():
+            return
+        if _publisher_pid is not None:
+            # Forked: the parent's thread didn't come along, nor should its backlog
+            _queue = queue.Queue(maxsize=MAX_PENDING)
+        _publisher = threading.Thread(target=_publish_forever, args=(_queue,), name="task-publisher", daemon=True)
+        _publisher.start()
+        _publisher_pid = os.getpid()
+
+
+def enqueue(name: str, args: Sequence) -> None:
+    """Publish task `name` with `args` in the background; never blocks or raises."""
+    _ensure_publisher()
+    try:
+        _queue.put_nowait((name, list(args)))
+    except queue.Full:
+        logger.error("Task queue full, dropped %s%s", name, tuple(args))
+
+
+def call(name: str, args: Sequence, timeout: float):
+    """
+    Run task `name` on a worker and wait up to `timeout` seconds for its
+    result, for requests that need the answer. Raises if the broker is
+    unreachable, the task fails or the timeout passes.
+    """
+    from celery_app import celery
+
+    result = celery.send_task(name, args=list(args), retry=False)
+    try:
+        return result.get(timeout=timeout)
+    finally:
+        result.forget()
+
+
+def flush(timeout: float = 5.0) -> bool:
+    """Wait until everything enqueued so far has been published (or given up on)."""
+    if _publisher is None or _publisher_pid != os.getpid():
+        return True
+    done = threading.Event()
+    try:
+        _queue.put(done, timeout=timeout)
+    except queue.Full:
+        return False
+    return done.wait(timeout)
+
+
+atexit.register(flush)
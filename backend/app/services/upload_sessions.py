@@ -0,0 +1,205 @@
+# app/services/upload_sessions.py
+"""
+Resumable chunked uploads.
+
+A client creates a session for a file of known size, PUTs its chunks
+(numbered from 0, each UPLOAD_SESSION_CHUNK_SIZE bytes but the last) in
+any order and as many times as it needs, asks which chunks have arrived,
+and completes the session. Completion streams the chunks in order through
+the normal upload path (app.services.uploads.store_stream), so the result
+is the same validated, deduplicated blob as a single-request upload.
+
+Chunks are files under uploads/.sessions/<id>/, written to a temporary
+name and renamed once whole, so a chunk either fully exists or doesn't.
+Sessions live UPLOAD_SESSION_TTL_HOURS after their last chunk;
+`expire_upload_sessions` deletes the ones that ran out.
+"""
+
+import logging
+import os
+import re
+import secrets
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from typing import AsyncIterator, List
+
+from celery_app import celery
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.crud.uploads import (
+    create_upload_session, delete_upload_session, extend_upload_session, get_expired_upload_sessions,
+    get_upload_session_ids,
+)
+from app.db.models import UploadSession
+from app.db.session import SessionLocal
+from app.services.uploads import (
+    POLICIES, UPLOADS_DIR, StoredUpload, UploadPolicy, UploadRejected, sniff_content_type, store_stream,
+)
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_DIR = UPLOADS_DIR / ".sessions"  # dot-prefixed, so never served under /static
+_CHUNK_NAME = re.compile(r"^(\d+)\.part$")
+
+
+def _ttl() -> timedelta:
+    return timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+
+
+def session_dir(session_id: str):
+    return SESSIONS_DIR / session_id
+
+
+def chunk_count(upload: UploadSession) -> int:
+    return -(-upload.size // upload.chunk_size)
+
+
+def chunk_length(upload: UploadSession, index: int) -> int:
+    return min(upload.chunk_size, upload.size - index * upload.chunk_size)
+
+
+def start_upload(db: Session, user_id: int, policy: UploadPolicy, size: int, sha256=None) -> UploadSession:
+    """Open a session for a `size`-byte file; 413 if no type `policy` accepts is allowed that big."""
+    limit = max(policy.max_bytes.values())
+    if size > limit:
+        raise UploadRejected(f"File too large (limit {limit // (1024 * 1024)} MB)", 413)
+    session_id = secrets.token_hex(16)
+    session_dir(session_id).mkdir(parents=True, exist_ok=True)
+    return create_upload_session(
+        db, session_id, user_id, policy.name, size, settings.UPLOAD_SESSION_CHUNK_SIZE,
+        sha256.lower() if sha256 else None, _ttl(),
+    )
+
+
+def received_chunks(upload: UploadSession) -> List[int]:
+    try:
+        names = os.listdir(session_dir(upload.id))
+    except FileNotFoundError:
+        return []
+    return sorted(int(match.group(1)) for match in map(_CHUNK_NAME.match, names) if match)
+
+
+def upload_status(upload: UploadSession) -> dict:
+    received = received_chunks(upload)
+    present = set(received)
+    contiguous = 0
+    while contiguous in present:
+        contiguous += 1
+    return {
+        "upload_id": upload.id,
+        "size": upload.size,
+        "chunk_size": upload.chunk_size,
+        "chunks": chunk_count(upload),
+        "received": received,
+        "offset": min(contiguous * upload.chunk_size, upload.size),
+        "expires_at": upload.expires_at,
+    }
+
+
+def _discard(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _check_first_chunk(upload: UploadSession, path: str) -> None:
+    with open(path, "rb") as f:
+        content_type = sniff_content_type(f.read(16))
+    if content_type not in POLICIES[upload.policy].max_bytes:
+        raise UploadRejected("Unsupported file type", 415)
+
+
+async def write_chunk(db: Session, upload: UploadSession, index: int, body: AsyncIterator[bytes]) -> None:
+    """
+    Store chunk `index` from a stream of bytes, replacing any earlier copy.
+    Raises UploadRejected: 400 for an index out of range or a wrong length,
+    415 if chunk 0 isn't a type the session's policy accepts.
+    """
+    if not 0 <= index < chunk_count(upload):
+        raise UploadRejected(f"Chunk index must be between 0 and {chunk_count(upload) - 1}", 400)
+    expected = chunk_length(upload, index)
+    directory = session_dir(upload.id)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp = tempfile.NamedTemporaryFile(dir=directory, prefix=f".{index}-", delete=False)
+    received = 0
+    try:
+        with tmp:
+            async for data in body:
+                received += len(data)
+                if received > expected:
+                    raise UploadRejected(f"Chunk {index} must be {expected} bytes", 400)
+                await run_in_threadpool(tmp.write, data)
+        if received != expected:
+            raise UploadRejected(f"Chunk {index} must be {expected} bytes", 400)
+        if index == 0:
+            # Reject a file of the wrong type before the rest of it is sent
+            await run_in_threadpool(_check_first_chunk, upload, tmp.name)
+        await run_in_threadpool(os.replace, tmp.name, directory / f"{index}.part")
+    except BaseException:
+        _discard(tmp.name)
+        raise
+    await run_in_threadpool(extend_upload_session, db, upload, _ttl())
+
+
+async def _assembled(upload: UploadSession) -> AsyncIterator[bytes]:
+    directory = session_dir(upload.id)
+    for index in range(chunk_count(upload)):
+        f = await run_in_threadpool(open, directory / f"{index}.part", "rb")
+        try:
+            while True:
+                data = await run_in_threadpool(f.read, settings.UPLOAD_CHUNK_SIZE)
+                if not data:
+                    break
+                yield data
+        finally:
+            f.close()
+
+
+async def complete_upload(db: Session, upload: UploadSession) -> StoredUpload:
+    """
+    Store the session's chunks as one upload and close the session. 409
+    while chunks are missing; otherwise rejected as by store_stream, which
+    closes the session too (resending chunks can't fix the file).
+    """
+    present = set(received_chunks(upload))
+    missing = [index for index in range(chunk_count(upload)) if index not in present]
+    if missing:
+        raise UploadRejected(f"Missing chunks: {', '.join(map(str, missing[:20]))}", 409)
+    try:
+        stored = await store_stream(_assembled(upload), POLICIES[upload.policy], db, upload.sha256)
+    except UploadRejected:
+        await run_in_threadpool(discard_upload, db, upload)
+        raise
+    await run_in_threadpool(discard_upload, db, upload)
+    return stored
+
+
+def discard_upload(db: Session, upload: UploadSession) -> None:
+    shutil.rmtree(session_dir(upload.id), ignore_errors=True)
+    delete_upload_session(db, upload)
+
+
+@celery.task
+def expire_upload_sessions():
+    """Delete sessions past their expiry, and chunk directories left without a session."""
+    db: Session = SessionLocal()
+    try:
+        expired = get_expired_upload_sessions(db)
+        for upload in expired:
+            discard_upload(db, upload)
+        live = get_upload_session_ids(db)
+    finally:
+        db.close()
+    cutoff = time.time() - _ttl().total_seconds()
+    if SESSIONS_DIR.exists():
+        for directory in SESSIONS_DIR.iterdir():
+            if directory.name not in live and directory.stat().st_mtime < cutoff:
+                shutil.rmtree(directory, ignore_errors=True)
+    if expired:
+        logger.info("Expired %d resumable uploads", len(expired))
+    return len(expired)
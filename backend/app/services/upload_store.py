@@ -0,0 +1,139 @@
+# app/services/upload_store.py
+"""
+Reference counting and garbage collection for the upload blob store.
+
+Every flush that changes `Listing.images` or `User.profilePicture` adds
+or removes references to blob URLs (app.services.uploads), and the
+upload_blobs.ref_count of those blobs is adjusted in the same
+transaction. `collect_orphaned_uploads` recounts references from the
+tables (so counts drift at most a day) and deletes blobs nobody has
+referenced or uploaded again for UPLOAD_ORPHAN_GRACE_HOURS, with their
+image derivatives and precompressed copies.
+
+Files outside the blob store (uploads from before it, images hosted
+elsewhere) are never counted or deleted.
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+
+from celery_app import celery
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.static import PRECOMPRESSED
+from app.crud.uploads import adjust_ref_counts, get_orphaned_blobs, set_ref_counts
+from app.db.models import Listing, User
+from app.db.session import SessionLocal
+from app.services.images import derived_paths
+from app.services.uploads import is_blob_url, url_path
+
+logger = logging.getLogger(__name__)
+
+# model -> attributes holding upload URLs (a list of URLs or a single one)
+_REFERENCES = {
+    Listing: ("images",),
+    User: ("profilePicture",),
+}
+
+
+def _urls(value) -> Counter:
+    values = value if isinstance(value, (list, tuple)) else [value]
+    # A listing showing the same image twice still references it once
+    return Counter({url: 1 for url in values if is_blob_url(url)})
+
+
+def _history_urls(values) -> Counter:
+    urls = Counter()
+    for value in values:
+        urls.update(_urls(value))
+    return urls
+
+
+def _after_flush(session, flush_context):
+    deltas = Counter()
+    for obj in session.new:
+        for attr in _REFERENCES.get(type(obj), ()):
+            deltas.update(_urls(getattr(obj, attr)))
+    for obj in session.deleted:
+        for attr in _REFERENCES.get(type(obj), ()):
+            deltas.subtract(_urls(getattr(obj, attr)))
+    for obj in session.dirty:
+        attrs = _REFERENCES.get(type(obj), ())
+        if not attrs or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        for attr in attrs:
+            history = state.attrs[attr].history
+            if history.has_changes():
+                deltas.update(_history_urls(history.added))
+                deltas.subtract(_history_urls(history.deleted))
+    deltas = {url: delta for url, delta in deltas.items() if delta}
+    if deltas:
+        adjust_ref_counts(session.connection(), deltas)
+
+
+def _keep_previous(target, value, oldvalue, initiator):
+    pass
+
+
+def register_upload_refcounts(session_factory) -> None:
+    """Keep upload_blobs.ref_count in step with the listings and users that use each blob."""
+    if event.contains(session_factory, "after_flush", _after_flush):
+        return
+    for model, attrs in _REFERENCES.items():
+        for attr in attrs:
+            # Load the replaced value on assignment (even when expired), so history has it
+            event.listen(getattr(model, attr), "set", _keep_previous, active_history=True)
+    event.listen(session_factory, "after_flush", _after_flush)
+
+
+def count_references(db: Session) -> Counter:
+    """Blob URL -> number of listings / users referencing it, from the tables."""
+    counts = Counter()
+    for (images,) in db.query(Listing.images).yield_per(1000):
+        counts.update(_urls(images or []))
+    for (picture,) in db.query(User.profilePicture).filter(User.profilePicture.isnot(None)).yield_per(1000):
+        counts.update(_urls(picture))
+    return counts
+
+
+def _unlink(path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+@celery.task
+def collect_orphaned_uploads():
+    """Recount blob references and delete blobs unreferenced for the grace period."""
+    db: Session = SessionLocal()
+    try:
+        recounted = set_ref_counts(db, count_references(db))
+        if recounted:
+            logger.warning("Corrected %d upload reference counts", recounted)
+        grace = timedelta(hours=settings.UPLOAD_ORPHAN_GRACE_HOURS)
+        deleted = 0
+        for blob in get_orphaned_blobs(db, grace):
+            # Lock the row until it is deleted: a re-upload of the same bytes
+            # (touch_blob) or a new reference waits, then finds it gone
+            db.refresh(blob, with_for_update=True)
+            if blob.ref_count > 0 or blob.last_uploaded_at >= datetime.utcnow() - grace:
+                db.rollback()  # attached or uploaded again since the query; release the lock
+                continue
+            path = url_path(blob.url)
+            if path is not None:
+                for derived in derived_paths(blob.url):
+                    _unlink(derived)
+                for suffix in PRECOMPRESSED.values():
+                    _unlink(path.with_name(path.name + suffix))
+                _unlink(path)
+            db.delete(blob)
+            db.commit()  # per blob, so a failure part-way keeps what was done
+            deleted += 1
+        return deleted
+    finally:
+        db.close()
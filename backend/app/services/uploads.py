@@ -0,0 +1,220 @@
+# app/services/uploads.py
+"""
+Streaming file uploads into a content-addressed store.
+
+Uploads are copied to disk in fixed-size chunks, so memory per upload is
+bounded by UPLOAD_CHUNK_SIZE whatever the file size. The file type comes
+from the first bytes, not from the client's filename or Content-Type. The
+size limit for that type is enforced while streaming. Data lands in a
+temporary file and is renamed into place only once complete.
+
+Files are stored once per distinct content, at
+uploads/blobs/<sha256[:2]>/<sha256>.<ext>, with an upload_blobs row each.
+Re-uploading the same bytes (the same photos across a building's units)
+keeps the existing blob. Clients can also ask for it by hash before
+uploading (find_blob). How many listings / users reference a blob is
+tracked by app.services.upload_store, which also deletes orphans.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi import UploadFile
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.crud.uploads import get_blob, record_blob
+
+logger = logging.getLogger(__name__)
+
+UPLOADS_DIR = Path(__file__).resolve().parent.parent.parent / "uploads"
+STATIC_URL = "/static"  # UPLOADS_DIR is mounted here (app.main)
+BLOBS_DIR = "blobs"
+
+IMAGE_TYPES = {"image/jpeg": "jpg", "image/png": "png", "image/gif": "gif", "image/webp": "webp"}
+DOCUMENT_TYPES = {"application/pdf": "pdf"}
+EXTENSIONS = {**IMAGE_TYPES, **DOCUMENT_TYPES}
+
+
+class UploadRejected(Exception):
+    """The upload breaks its policy; status_code is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UploadPolicy:
+    """The maximum size of each content type an upload kind accepts."""
+
+    def __init__(self, name: str, max_bytes: Dict[str, int]):
+        self.name = name
+        self.max_bytes = max_bytes
+
+
+def _image_limits() -> Dict[str, int]:
+    return {content_type: settings.UPLOAD_MAX_IMAGE_BYTES for content_type in IMAGE_TYPES}
+
+
+def _document_limits() -> Dict[str, int]:
+    return {content_type: settings.UPLOAD_MAX_DOCUMENT_BYTES for content_type in DOCUMENT_TYPES}
+
+
+LISTING_IMAGE = UploadPolicy("listing_images", _image_limits())
+PROFILE_DOC = UploadPolicy("profile_pics", {**_image_limits(), **_document_limits()})
+USER_FILE = UploadPolicy("files", {**_image_limits(), **_document_limits()})
+POLICIES = {policy.name: policy for policy in (LISTING_IMAGE, PROFILE_DOC, USER_FILE)}
+
+
+class StoredUpload:
+    def __init__(self, path: Path, url: str, size: int, content_type: str, sha256: str, deduplicated: bool):
+        self.path = path
+        self.url = url
+        self.size = size
+        self.content_type = content_type
+        self.sha256 = sha256
+        self.deduplicated = deduplicated  # the blob already existed
+
+
+def blob_url(sha256: str, content_type: str) -> str:
+    return f"{STATIC_URL}/{BLOBS_DIR}/{sha256[:2]}/{sha256}.{EXTENSIONS[content_type]}"
+
+
+def url_path(url: str) -> Optional[Path]:
+    """Filesystem path of a /static URL inside UPLOADS_DIR, or None for anything else."""
+    prefix = f"{STATIC_URL}/"
+    if not url or not url.startswith(prefix):
+        return None
+    parts = url[len(prefix):].split("/")
+    if any(not part or part.startswith(".") for part in parts):
+        return None
+    return UPLOADS_DIR.joinpath(*parts)
+
+
+def is_blob_url(url) -> bool:
+    return isinstance(url, str) and url.startswith(f"{STATIC_URL}/{BLOBS_DIR}/")
+
+
+def find_blob(db: Session, sha256: str, policy: UploadPolicy) -> Optional[str]:
+    """
+    URL of already-stored content with this hash that `policy` accepts, if
+    any. A lookup doesn't touch the blob; attaching it does (adjust_ref_counts).
+    """
+    blob = get_blob(db, sha256.lower())
+    if blob is None or blob.content_type not in policy.max_bytes:
+        return None
+    path = url_path(blob.url)
+    return blob.url if path is not None and path.exists() else None
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Content type from a file's leading bytes, for the types uploads accept."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    return None
+
+
+def _discard(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def _file_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    try:
+        while True:
+            chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await file.close()
+
+
+async def save_upload(file: UploadFile, policy: UploadPolicy, db: Session) -> StoredUpload:
+    """
+    Stream `file` into the blob store and return where it is. Raises
+    UploadRejected (415 unsupported type, 413 too large, 400 empty);
+    nothing is left on disk in that case.
+    """
+    return await store_stream(_file_chunks(file), policy, db)
+
+
+async def store_stream(
+    chunks: AsyncIterator[bytes], policy: UploadPolicy, db: Session, expected_sha256: Optional[str] = None,
+) -> StoredUpload:
+    """
+    save_upload for any stream of byte chunks. With `expected_sha256`, the
+    content must hash to it (400 otherwise).
+    """
+    tmp_dir = UPLOADS_DIR / BLOBS_DIR / ".tmp"  # same filesystem, so the final rename is atomic
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    tmp = tempfile.NamedTemporaryFile(dir=tmp_dir, prefix="upload-", delete=False)
+    digest = hashlib.sha256()
+    size = 0
+    content_type = None
+    try:
+        with tmp:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                if content_type is None:
+                    # The first chunk (>= 12 bytes in practice) identifies the type
+                    content_type = sniff_content_type(chunk)
+                    if content_type not in policy.max_bytes:
+                        raise UploadRejected("Unsupported file type", 415)
+                size += len(chunk)
+                if size > policy.max_bytes[content_type]:
+                    raise UploadRejected(
+                        f"File too large (limit {policy.max_bytes[content_type] // (1024 * 1024)} MB)", 413
+                    )
+                digest.update(chunk)
+                await run_in_threadpool(tmp.write, chunk)
+        if content_type is None:
+            raise UploadRejected("Empty file", 400)
+
+        sha256 = digest.hexdigest()
+        if expected_sha256 is not None and sha256 != expected_sha256.lower():
+            raise UploadRejected("Uploaded content does not match its SHA-256", 400)
+        url = blob_url(sha256, content_type)
+        path = url_path(url)
+        # Record (or touch) the blob before looking for its file: once touched,
+        # garbage collection leaves it alone, so an existing file stays
+        await run_in_threadpool(record_blob, db, sha256, url, size, content_type)
+        deduplicated = path.exists()
+        if deduplicated:
+            _discard(tmp.name)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            await run_in_threadpool(os.replace, tmp.name, path)
+    except BaseException:
+        # Rejected, failed or cancelled mid-stream: leave nothing behind
+        _discard(tmp.name)
+        raise
+    finally:
+        if hasattr(chunks, "aclose"):
+            await chunks.aclose()
+
+    logger.info("Stored upload %s (%s, %d bytes, deduplicated=%s)", url, content_type, size, deduplicated)
+    return StoredUpload(
+        path=path,
+        url=url,
+        size=size,
+        content_type=content_type,
+        sha256=sha256,
+        deduplicated=deduplicated,
+    )
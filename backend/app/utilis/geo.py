@@ -1,5 +1,22 @@
 # app/utils/geo.py
 import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE_LAT = 111.32
+GEOHASH_PRECISION = 9
+# Listings farther than this from every preferred location get no proximity score
+PROXIMITY_THRESHOLD_KM = 10
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+Coords = Tuple[float, float]
 
 # --- Replace with your actual geocoding implementation ---
 def geocode_address(address: str):
@@ -18,11 +35,135 @@ def geocode_address(address: str):
     return dummy_coords.get(address, (42.4406, -76.4966))
 
 
+def normalize_address(address: str) -> str:
+    """Cache key for an address: case, spacing and trailing punctuation don't matter."""
+    return re.sub(r"\s+", " ", (address or "").strip().lower()).strip(" .,;")[:255]
+
+
+class GeocodeCache:
+    """
+    Two-tier geocode cache keyed by normalized address: an in-process LRU in
+    front of the geocode_cache table. Misses (None) are cached as well, so
+    an unknown address is looked up at most once per process; an address
+    that simply hasn't been geocoded yet is re-checked after `pending_ttl`
+    seconds.
+
+    `lookup` only reads the cache and is what scoring uses; `geocode` also
+    calls the geocoder on a miss and is only used by background tasks.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int = 4096, geocoder=None, session_factory=None, pending_ttl: float = 300):
+        self.maxsize = maxsize
+        self.geocoder = geocoder or geocode_address
+        self.pending_ttl = pending_ttl
+        self._session_factory = session_factory
+        # key -> (coords, expiry as time.monotonic() or None)
+        self._entries: "OrderedDict[str, Tuple[Optional[Coords], Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _session(self):
+        if self._session_factory is None:
+            from app.db.session import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def _get_local(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return self._MISSING
+
+    def _put_local(self, key: str, coords: Optional[Coords], ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._entries[key] = (coords, None if ttl is None else time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _load_rows(self, db, keys: Iterable[str]) -> Dict[str, Optional[Coords]]:
+        from app.db.models import GeocodeCache as GeocodeCacheRow
+
+        keys = list(keys)
+        rows = db.query(GeocodeCacheRow).filter(GeocodeCacheRow.address_key.in_(keys)).all()
+        found = {}
+        for row in rows:
+            coords = None if row.latitude is None else (row.latitude, row.longitude)
+            found[row.address_key] = coords
+            self._put_local(row.address_key, coords)
+        for key in set(keys) - set(found):
+            # Not geocoded yet; a background task will fill it in
+            self._put_local(key, None, ttl=self.pending_ttl)
+        return found
+
+    def _is_final(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] is None
+
+    def prefetch(self, db, addresses: Iterable[str]) -> None:
+        """Load every cached address in one query, ahead of a scoring loop."""
+        keys = {normalize_address(a) for a in addresses if a}
+        keys = {key for key in keys if key and self._get_local(key) is self._MISSING}
+        if keys:
+            self._load_rows(db, keys)
+
+    def lookup(self, address: str, db=None) -> Optional[Coords]:
+        """Cached coordinates for `address`, or None. Never calls the geocoder."""
+        key = normalize_address(address)
+        if not key:
+            return None
+        coords = self._get_local(key)
+        if coords is not self._MISSING:
+            return coords
+        session = db if db is not None else self._session()
+        try:
+            return self._load_rows(session, [key]).get(key)
+        finally:
+            if db is None:
+                session.close()
+
+    def geocode(self, address: str, db) -> Optional[Coords]:
+        """Cached coordinates, calling the geocoder (and persisting the result) on a miss."""
+        from app.db.models import GeocodeCache as GeocodeCacheRow
+
+        key = normalize_address(address)
+        if not key:
+            return None
+        coords = self._get_local(key)
+        if coords is not self._MISSING and (coords is not None or self._is_final(key)):
+            return coords
+        found = self._load_rows(db, [key])
+        if key in found:
+            return found[key]
+
+        coords = self.geocoder(address)
+        db.merge(GeocodeCacheRow(
+            address_key=key,
+            latitude=coords[0] if coords else None,
+            longitude=coords[1] if coords else None,
+            geocoded_at=datetime.utcnow(),
+        ))
+        db.commit()
+        self._put_local(key, coords)
+        return coords
+
+
+geocode_cache = GeocodeCache()
+
+
 def haversine_distance(lat1, lon1, lat2, lon2):
     """
     Calculate Haversine distance between two coordinates (in km).
     """
-    R = 6371  # Earth radius in km
+    R = EARTH_RADIUS_KM
     phi1, phi2 = math.radians(lat1), math.radians(lat2)
     dphi = math.radians(lat2 - lat1)
     dlambda = math.radians(lon2 - lon1)
@@ -30,19 +171,211 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
     return R * c
 
-def location_compatibility_score(renter_locs: list, landlord_loc: str, max_score=100, threshold_km=10):
+
+def haversine_matrix(points_a: Sequence[Coords], points_b: Sequence[Coords]) -> np.ndarray:
+    """
+    Haversine distances (km) between every point in `points_a` and every
+    point in `points_b`, as a len(a) x len(b) matrix.
+    """
+    a = np.radians(np.asarray(points_a, dtype=np.float64).reshape(-1, 2))
+    b = np.radians(np.asarray(points_b, dtype=np.float64).reshape(-1, 2))
+    lat1, lon1 = a[:, 0:1], a[:, 1:2]
+    lat2, lon2 = b[:, 0], b[:, 1]
+    h = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def proximity_scores(distances, max_score=100, threshold_km=PROXIMITY_THRESHOLD_KM) -> np.ndarray:
+    """Linear falloff from max_score at 0 km to 0 at threshold_km."""
+    distances = np.asarray(distances, dtype=np.float64)
+    return np.clip(max_score - (distances / threshold_km) * max_score, 0, max_score)
+
+
+# --- Geohash -----------------------------------------------------------------
+
+def geohash_encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Standard base32 geohash of (lat, lon)."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def geohash_cell_degrees(precision: int) -> Tuple[float, float]:
+    """(height, width) in degrees of a geohash cell at `precision`."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) enclosing a circle of radius_km."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    cos_lat = min(math.cos(math.radians(min_lat)), math.cos(math.radians(max_lat)))
+    if min_lat <= -90.0 or max_lat >= 90.0 or cos_lat <= 1e-6:
+        return min_lat, -180.0, max_lat, 180.0
+    dlon = min(180.0, radius_km / (KM_PER_DEGREE_LAT * cos_lat))
+    return min_lat, lon - dlon, max_lat, lon + dlon
+
+
+def _covering_cells(box, precision: int) -> int:
+    height, width = geohash_cell_degrees(precision)
+    min_lat, min_lon, max_lat, max_lon = box
+    rows = math.floor((max_lat + 90) / height) - math.floor((min_lat + 90) / height) + 1
+    cols = math.floor((max_lon + 180) / width) - math.floor((min_lon + 180) / width) + 1
+    return rows * min(cols, 2 ** ((5 * precision + 1) // 2))
+
+
+def covering_precision(box, max_cells: int = 64, max_precision: int = 6) -> int:
+    """Finest geohash precision whose cells cover `box` in at most max_cells cells."""
+    for precision in range(max_precision, 0, -1):
+        if _covering_cells(box, precision) <= max_cells:
+            return precision
+    return 1
+
+
+def geohashes_covering(box, precision: Optional[int] = None) -> List[str]:
+    """
+    Geohash prefixes whose cells together cover `box`
+    (min_lat, min_lon, max_lat, max_lon). Longitudes past ±180 wrap around.
+    """
+    precision = precision or covering_precision(box)
+    height, width = geohash_cell_degrees(precision)
+    min_lat, min_lon, max_lat, max_lon = box
+    if max_lon - min_lon >= 360.0:
+        min_lon, max_lon = -180.0, 180.0 - width / 2
+    cells = []
+    seen = set()
+    row = math.floor((min_lat + 90) / height)
+    while row * height - 90 <= max_lat and row * height < 180:
+        lat = row * height - 90 + height / 2
+        col = math.floor((min_lon + 180) / width)
+        while col * width - 180 <= max_lon:
+            lon = (col * width + width / 2) % 360.0 - 180
+            cell = geohash_encode(lat, lon, precision)
+            if cell not in seen:
+                seen.add(cell)
+                cells.append(cell)
+            col += 1
+        row += 1
+    return cells
+
+
+class GeohashIndex:
+    """
+    Points (listing coordinates) bucketed by geohash prefix. Radius and
+    bounding-box queries only compute distances for points in the cells
+    covering the query area instead of scanning every point; the
+    precision is picked per query so a query touches at most 64 cells.
+    """
+
+    def __init__(self, ids: Sequence[int], coords: Sequence[Coords]):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self._hashes = [geohash_encode(lat, lon) for lat, lon in self.coords]
+        self._buckets: Dict[int, Dict[str, np.ndarray]] = {}
+
+    @classmethod
+    def from_listings(cls, listings) -> "GeohashIndex":
+        """
+        Index listings by their stored latitude/longitude, falling back to
+        the geocode cache for listings not geocoded yet. Listings without
+        coordinates are left out.
+        """
+        ids, coords = [], []
+        for listing in listings:
+            if getattr(listing, "latitude", None) is not None:
+                point = (listing.latitude, listing.longitude)
+            else:
+                point = geocode_cache.lookup(listing.location) if listing.location else None
+            if point is not None:
+                ids.append(listing.id)
+                coords.append(point)
+        return cls(ids, coords)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _bucket(self, precision: int) -> Dict[str, np.ndarray]:
+        buckets = self._buckets.get(precision)
+        if buckets is None:
+            grouped: Dict[str, List[int]] = {}
+            for i, h in enumerate(self._hashes):
+                grouped.setdefault(h[:precision], []).append(i)
+            buckets = {cell: np.asarray(rows, dtype=np.int64) for cell, rows in grouped.items()}
+            self._buckets[precision] = buckets
+        return buckets
+
+    def _candidates(self, box) -> np.ndarray:
+        precision = covering_precision(box)
+        buckets = self._bucket(precision)
+        rows = [buckets[cell] for cell in geohashes_covering(box, precision) if cell in buckets]
+        return np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+
+    def in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[int]:
+        """Ids of points inside the box, in index order."""
+        crosses = min_lon > max_lon  # box crosses the antimeridian
+        rows = np.unique(self._candidates((min_lat, min_lon, max_lat, max_lon + 360 * crosses)))
+        lats, lons = self.coords[rows, 0], self.coords[rows, 1]
+        inside = (lats >= min_lat) & (lats <= max_lat)
+        if crosses:
+            inside &= (lons >= min_lon) | (lons <= max_lon)
+        else:
+            inside &= (lons >= min_lon) & (lons <= max_lon)
+        return self.ids[rows[inside]].tolist()
+
+    def within(self, points: Sequence[Coords], radius_km: float) -> Dict[int, float]:
+        """
+        {id: distance in km to the nearest of `points`} for every indexed
+        point within radius_km of at least one of them.
+        """
+        if not len(self) or not len(points):
+            return {}
+        rows = np.unique(np.concatenate([
+            self._candidates(bounding_box(lat, lon, radius_km)) for lat, lon in points
+        ]))
+        if not len(rows):
+            return {}
+        nearest = haversine_matrix(points, self.coords[rows]).min(axis=0)
+        close = nearest <= radius_km
+        return dict(zip(self.ids[rows[close]].tolist(), nearest[close].tolist()))
+
+
+def location_compatibility_score(
+    renter_locs: list,
+    landlord_loc: str,
+    max_score=100,
+    threshold_km=PROXIMITY_THRESHOLD_KM,
+    listing_coords: Optional[Coords] = None,
+):
     """
     Given renter's preferred locations (list of str) and landlord's property location (str),
     returns best compatibility score based on proximity.
+    Coordinates come from `listing_coords` (the listing's stored lat/lon) and
+    the geocode cache; addresses that were never geocoded are skipped.
     """
-    best_score = 0
-    lat2, lon2 = geocode_address(landlord_loc)
-    for loc in renter_locs:
-        lat1, lon1 = geocode_address(loc)
-        dist = haversine_distance(lat1, lon1, lat2, lon2)
-        if dist <= threshold_km:
-            score = max_score - (dist / threshold_km) * max_score
-            score = max(score, 0)
-            if score > best_score:
-                best_score = score
-    return best_score
+    coords = listing_coords or geocode_cache.lookup(landlord_loc)
+    if coords is None:
+        return 0
+    renter_coords = [c for c in (geocode_cache.lookup(loc) for loc in renter_locs) if c is not None]
+    if not renter_coords:
+        return 0
+    distances = haversine_matrix(renter_coords, [coords])[:, 0]
+    return float(proximity_scores(distances.min(), max_score, threshold_km))
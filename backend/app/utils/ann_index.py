@@ -0,0 +1,206 @@
+# app/utils/ann_index.py
+"""
+Inverted-file (IVF) index for approximate nearest-neighbor search over
+unit-length embeddings.
+
+Vectors are clustered with spherical k-means into `nlist` cells. A query
+is compared with the cell centroids and only the vectors in the `nprobe`
+closest cells are scored, so a lookup touches roughly nprobe / nlist of
+the catalog. New vectors are inserted into their nearest existing cell;
+the centroids are only re-fit by a rebuild.
+"""
+
+import os
+import random
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_NPROBE = 16
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / (norms + 1e-8)
+
+
+def default_nlist(n: int) -> int:
+    # ~sqrt(n) cells; small catalogs are a single cell (exact search)
+    if n < 1024:
+        return 1
+    return int(np.sqrt(n))
+
+
+def spherical_kmeans(
+    vectors: np.ndarray,
+    k: int,
+    iterations: int = 10,
+    sample_size: int = 256,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    k unit-length centroids fit on at most `sample_size` points per centroid.
+    Empty clusters are re-seeded from random points.
+    """
+    rng = np.random.RandomState(seed)
+    if len(vectors) > k * sample_size:
+        vectors = vectors[rng.choice(len(vectors), k * sample_size, replace=False)]
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=k)
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Ids are ints (listing ids). Similarities returned by `search` are cosine
+    similarities in [-1, 1].
+    """
+
+    def __init__(self, centroids: np.ndarray, nprobe: int = DEFAULT_NPROBE):
+        self.centroids = _normalize(centroids)
+        self.dim = self.centroids.shape[1]
+        self.nprobe = nprobe
+        nlist = len(self.centroids)
+        self._ids: List[np.ndarray] = [np.zeros(0, dtype=np.int64) for _ in range(nlist)]
+        self._vectors: List[np.ndarray] = [np.zeros((0, self.dim), dtype=np.float32) for _ in range(nlist)]
+        self._cell: Dict[int, int] = {}
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[int],
+        vectors: np.ndarray,
+        nlist: Optional[int] = None,
+        nprobe: int = DEFAULT_NPROBE,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        vectors = _normalize(vectors).reshape(len(ids), -1)
+        nlist = min(nlist or default_nlist(len(ids)), max(1, len(ids)))
+        if len(ids) == 0:
+            raise ValueError("Cannot build an IVF index without vectors")
+        if nlist == 1:
+            centroids = _normalize(vectors.mean(axis=0, keepdims=True))
+        else:
+            centroids = spherical_kmeans(vectors, nlist, seed=seed)
+        index = cls(centroids, nprobe=nprobe)
+        index.add(ids, vectors)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._cell)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        """Insert (or move) vectors into their nearest cell."""
+        if not len(ids):
+            return
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = _normalize(vectors).reshape(len(ids), self.dim)
+        self.remove([int(i) for i in ids if int(i) in self._cell])
+        cells = np.argmax(vectors @ self.centroids.T, axis=1)
+        for cell in np.unique(cells):
+            mask = cells == cell
+            self._ids[cell] = np.concatenate([self._ids[cell], ids[mask]])
+            self._vectors[cell] = np.concatenate([self._vectors[cell], vectors[mask]])
+        self._cell.update(zip(ids.tolist(), cells.tolist()))
+
+    def remove(self, ids: Sequence[int]) -> None:
+        by_cell: Dict[int, List[int]] = {}
+        for i in ids:
+            cell = self._cell.pop(int(i), None)
+            if cell is not None:
+                by_cell.setdefault(cell, []).append(int(i))
+        for cell, removed in by_cell.items():
+            keep = ~np.isin(self._ids[cell], removed)
+            self._ids[cell] = self._ids[cell][keep]
+            self._vectors[cell] = self._vectors[cell][keep]
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Top-k (id, cosine similarity) pairs, best first."""
+        if not len(self) or k <= 0:
+            return []
+        query = _normalize(query).reshape(self.dim)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        cells = np.argsort(-(self.centroids @ query), kind="stable")[:nprobe]
+        ids = np.concatenate([self._ids[c] for c in cells])
+        if not len(ids):
+            return []
+        scores = np.concatenate([self._vectors[c] @ query for c in cells])
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((ids[top], -scores[top]))]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def exact_search(self, query: np.ndarray, k: int = 10) -> List[Tuple[int, float]]:
+        return self.search(query, k, nprobe=self.nlist)
+
+    # -- persistence ------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        """Atomic write, so readers never see a half-written index."""
+        ids = np.concatenate(self._ids) if self._ids else np.zeros(0, dtype=np.int64)
+        vectors = np.concatenate(self._vectors) if self._vectors else np.zeros((0, self.dim), dtype=np.float32)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, centroids=self.centroids, ids=ids, vectors=vectors.astype(np.float16), nprobe=self.nprobe)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as data:
+            index = cls(data["centroids"], nprobe=int(data["nprobe"]))
+            index.add(data["ids"], data["vectors"].astype(np.float32))
+        return index
+
+
+def _clustered_vectors(n: int, dim: int, seed: int) -> np.ndarray:
+    # Embeddings of real listing text are clustered by topic, not uniform
+    rng = np.random.RandomState(seed)
+    topics = _normalize(rng.randn(max(1, n // 100), dim))
+    return _normalize(topics[rng.randint(len(topics), size=n)] + 0.7 * rng.randn(n, dim) / np.sqrt(dim))
+
+
+def benchmark(n: int, dim: int = 384, k: int = 20, n_queries: int = 100, nprobe: int = DEFAULT_NPROBE, seed: int = 0) -> Dict:
+    """Build time, query latency and recall@k against exhaustive search."""
+    vectors = _clustered_vectors(n, dim, seed)
+    started = time.perf_counter()
+    index = IVFIndex.build(list(range(n)), vectors, nprobe=nprobe, seed=seed)
+    build_s = time.perf_counter() - started
+
+    queries = vectors[random.Random(seed + 1).sample(range(n), n_queries)] + np.random.RandomState(seed + 2).randn(n_queries, dim) * 0.02
+    started = time.perf_counter()
+    approx = [index.search(q, k) for q in queries]
+    ivf_ms = (time.perf_counter() - started) * 1000 / n_queries
+    started = time.perf_counter()
+    exact = [index.exact_search(q, k) for q in queries]
+    exact_ms = (time.perf_counter() - started) * 1000 / n_queries
+
+    recall = np.mean([
+        len({i for i, _ in a} & {i for i, _ in e}) / len(e) for a, e in zip(approx, exact)
+    ])
+    return {
+        'vectors': n,
+        'nlist': index.nlist,
+        'nprobe': nprobe,
+        'build_s': round(build_s, 2),
+        'ivf_query_ms': round(ivf_ms, 2),
+        'exact_query_ms': round(exact_ms, 2),
+        'recall_at_k': round(float(recall), 3),
+    }
+
+
+if __name__ == "__main__":
+    for n in (10_000, 100_000):
+        print(benchmark(n))
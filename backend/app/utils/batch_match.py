@@ -0,0 +1,395 @@
+# app/utils/batch_match.py
+"""
+Vectorized batch version of app.utils.match.compute_compatibility_score.
+
+Listings and renters are encoded once into NumPy arrays and the full
+renter x listing score matrix is produced in a handful of array operations.
+Every term is accumulated in the same order and with the same arithmetic as
+the scalar function, so results are identical (not just close) to it.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.dates import available_date_of, move_in_deadline
+from app.utils.match import (
+    IMMEDIATE_MOVE_IN,
+    NON_SMOKING_PREFS,
+    SMOKER_PREFS,
+    WEIGHTS,
+    attr,
+)
+from app.utils.tags import AMENITY_BITS, FEATURE_BITS, mask_array, popcount, split_mask
+
+TOTAL_WEIGHT = sum(WEIGHTS.values())
+DEFAULT_CHUNK_SIZE = 256
+
+
+def _vocabulary(rows: Iterable[Iterable]) -> Dict:
+    vocab: Dict = {}
+    for items in rows:
+        for item in items:
+            if item not in vocab:
+                vocab[item] = len(vocab)
+    return vocab
+
+
+def _multi_hot(rows: Sequence[set], vocab: Dict) -> np.ndarray:
+    matrix = np.zeros((len(rows), max(1, len(vocab))), dtype=np.float64)
+    for i, items in enumerate(rows):
+        for item in items:
+            col = vocab.get(item)
+            if col is not None:
+                matrix[i, col] = 1.0
+    return matrix
+
+
+def _listing_masks(listings: Sequence, column: str, mask_column: str, bits: Dict):
+    """
+    Per-listing bitmask over a tag vocabulary (the stored column for ORM
+    rows, computed for dicts) plus each listing's out-of-vocabulary values.
+    Stored masks written before the vocabulary grew lack the new values'
+    bits; those are filled in here, so scores don't depend on a backfill.
+    """
+    masks, extras = [], []
+    for listing in listings:
+        values = attr(listing, column, []) or []
+        stored = attr(listing, mask_column)
+        if stored is None:
+            mask, extra = split_mask(values, bits)
+        else:
+            mask, extra = stored, set()
+            for value in values:
+                bit = bits.get(value)
+                if bit is None:
+                    extra.add(value)
+                else:
+                    mask |= 1 << bit
+        masks.append(mask)
+        extras.append(extra)
+    return mask_array(masks), extras
+
+
+class EncodedListings:
+    """Column-oriented view of a listing catalog plus its landlords' preferences."""
+
+    def __init__(self, listings: Sequence, landlord_pref_map: Optional[Dict] = None):
+        landlord_pref_map = landlord_pref_map or {}
+        self.listings = list(listings)
+        self.ids = [attr(l, "id") for l in self.listings]
+        n = len(self.listings)
+
+        self.rent = np.array([attr(l, "rent_price", 0) or 0 for l in self.listings], dtype=np.float64)
+        self.bedrooms = np.array([attr(l, "bedrooms", 0) or 0 for l in self.listings], dtype=np.float64)
+        self.bathrooms = np.array([attr(l, "bathrooms", 0) or 0 for l in self.listings], dtype=np.float64)
+        leases = [attr(l, "lease_length") for l in self.listings]
+        self.lease_set = np.array([bool(v) for v in leases], dtype=bool)
+        self.lease = np.array([v if v else 0 for v in leases], dtype=np.float64)
+        self.max_occupants = np.array([attr(l, "max_occupants", 0) or 0 for l in self.listings], dtype=np.float64)
+        self.pets_allowed = np.array([bool(attr(l, "pets_allowed", True)) for l in self.listings], dtype=bool)
+
+        self.location = [(attr(l, "location", "") or "").lower() for l in self.listings]
+        self.neighborhood_profile = [
+            {p.lower() for p in (attr(l, "neighborhood_profile", []) or [])} for l in self.listings
+        ]
+        neighborhood_types = [(attr(l, "neighborhood_type", "") or "").lower() for l in self.listings]
+        self.neighborhood_type_vocab = _vocabulary([t] for t in neighborhood_types if t)
+        # -1 marks "no neighborhood type"; it indexes an always-zero padding column.
+        self.neighborhood_type_idx = np.array(
+            [self.neighborhood_type_vocab.get(t, -1) if t else -1 for t in neighborhood_types],
+            dtype=np.int64,
+        )
+
+        available = [attr(l, "available_from") for l in self.listings]
+        self.available_set = np.array([bool(v) for v in available], dtype=bool)
+        self.available = [v.lower() if v else "" for v in available]
+        available_dates = [available_date_of(l) for l in self.listings]
+        self.available_dated = np.array([d is not None for d in available_dates], dtype=bool)
+        self.available_ordinal = np.array([d.toordinal() if d else 0 for d in available_dates], dtype=np.int64)
+
+        # Amenities and features are bitmasks (overlap is a popcount); only the
+        # rare values outside the controlled vocabularies stay multi-hot.
+        self.unit_mask, unit_extra = _listing_masks(self.listings, "amenities", "amenity_mask", AMENITY_BITS)
+        self.building_mask, building_extra = _listing_masks(
+            self.listings, "building_features", "feature_mask", FEATURE_BITS
+        )
+        tags = [set(attr(l, "custom_tags", []) or []) for l in self.listings]
+        self.unit_vocab = _vocabulary(unit_extra)
+        self.building_vocab = _vocabulary(building_extra)
+        self.tag_vocab = _vocabulary(tags)
+        self.unit_hot = _multi_hot(unit_extra, self.unit_vocab)
+        self.building_hot = _multi_hot(building_extra, self.building_vocab)
+        self.tag_hot = _multi_hot(tags, self.tag_vocab)
+
+        self.has_landlord_prefs = np.zeros(n, dtype=bool)
+        self.no_smoking = np.zeros(n, dtype=bool)
+        self.no_pets = np.zeros(n, dtype=bool)
+        for i, listing in enumerate(self.listings):
+            prefs = landlord_pref_map.get(attr(listing, "landlord_id"))
+            if prefs:
+                tenant_prefs = set(attr(prefs, "tenant_preferences", []) or [])
+                self.has_landlord_prefs[i] = True
+                self.no_smoking[i] = "No smoking" in tenant_prefs
+                self.no_pets[i] = "No pets" in tenant_prefs
+
+        # Substring checks can't be vectorized, but they only depend on the
+        # renter-side string, so each distinct string is evaluated once per catalog.
+        self._location_hits: Dict[str, np.ndarray] = {}
+        self._move_in_hits: Dict[str, np.ndarray] = {}
+
+    def __len__(self):
+        return len(self.listings)
+
+    def location_hits(self, loc: str) -> np.ndarray:
+        hits = self._location_hits.get(loc)
+        if hits is None:
+            hits = np.array(
+                [loc in location or loc in profile
+                 for location, profile in zip(self.location, self.neighborhood_profile)],
+                dtype=bool,
+            )
+            self._location_hits[loc] = hits
+        return hits
+
+    def move_in_hits(self, pref: str) -> np.ndarray:
+        hits = self._move_in_hits.get(pref)
+        if hits is None:
+            if pref in IMMEDIATE_MOVE_IN:
+                hits = np.ones(len(self.listings), dtype=bool)
+            else:
+                hits = np.array([pref in available for available in self.available], dtype=bool)
+                deadline = move_in_deadline(pref)
+                if deadline:
+                    by_date = self.available_ordinal <= deadline.toordinal()
+                    hits = np.where(self.available_dated, by_date, hits)
+            self._move_in_hits[pref] = hits
+        return hits
+
+
+class EncodedRenters:
+    """Renter preferences encoded against the vocabularies of an EncodedListings."""
+
+    def __init__(self, renters: Sequence, listings: EncodedListings):
+        self.renters = list(renters)
+        self.user_ids = [attr(r, "user_id") for r in self.renters]
+
+        def column(name, default, fallback):
+            return np.array(
+                [attr(r, name, default) or fallback for r in self.renters], dtype=np.float64
+            )[:, None]
+
+        self.budget_min = column("budget_min", 0, 0)
+        self.budget_max = column("budget_max", 0, 0)
+        self.bedrooms = column("bedrooms", 0, 0)
+        self.bathrooms = column("bathrooms", 0, 0)
+        self.lease = column("lease_length", None, 0)
+        self.household_size = column("household_size", 1, 1)
+        self.has_pets = np.array([bool(attr(r, "pets_allowed")) for r in self.renters], dtype=bool)[:, None]
+
+        self.locations = [set(attr(r, "locations", []) or []) for r in self.renters]
+        self.neighborhood_type_hot = np.zeros(
+            (len(self.renters), len(listings.neighborhood_type_vocab) + 1), dtype=bool
+        )
+        for i, locs in enumerate(self.locations):
+            for loc in locs:
+                col = listings.neighborhood_type_vocab.get((loc or "").lower())
+                if col is not None:
+                    self.neighborhood_type_hot[i, col] = True
+
+        self.move_in = [(attr(r, "move_in_date", "") or "").lower() for r in self.renters]
+        self.smoking = [(attr(r, "smoking_preference") or "").lower() for r in self.renters]
+
+        unit = [set(attr(r, "amenities", []) or []) for r in self.renters]
+        building = [set(attr(r, "building_amenities", []) or []) for r in self.renters]
+        custom = [set(attr(r, "custom_preferences", []) or []) for r in self.renters]
+        unit_split = [split_mask(s, AMENITY_BITS) for s in unit]
+        building_split = [split_mask(s, FEATURE_BITS) for s in building]
+        self.unit_mask = mask_array([mask for mask, _ in unit_split])[:, None]
+        self.building_mask = mask_array([mask for mask, _ in building_split])[:, None]
+        self.unit_hot = _multi_hot([extra for _, extra in unit_split], listings.unit_vocab)
+        self.building_hot = _multi_hot([extra for _, extra in building_split], listings.building_vocab)
+        self.custom_hot = _multi_hot(custom, listings.tag_vocab)
+        self.unit_size = np.array([len(s) for s in unit], dtype=np.float64)[:, None]
+        self.building_size = np.array([len(s) for s in building], dtype=np.float64)[:, None]
+        self.custom_size = np.array([len(s) for s in custom], dtype=np.float64)[:, None]
+
+    def __len__(self):
+        return len(self.renters)
+
+
+def encode_listings(listings: Sequence, landlord_pref_map: Optional[Dict] = None) -> EncodedListings:
+    return EncodedListings(listings, landlord_pref_map)
+
+
+def encode_renters(renters: Sequence, listings: EncodedListings) -> EncodedRenters:
+    return EncodedRenters(renters, listings)
+
+
+def _shortfall_term(weight, have, want):
+    deficit = want - have
+    penalty = np.minimum(1.0, deficit / np.maximum(1, want))
+    return np.where(have >= want, weight, weight * (1 - penalty))
+
+
+def _overlap_term(weight, overlap, renter_size, empty_factor):
+    ratio = overlap / np.maximum(renter_size, 1)
+    return np.where(renter_size > 0, weight * ratio, weight * empty_factor)
+
+
+def _round3(values: np.ndarray) -> np.ndarray:
+    """np.round(x, 3), except exact ties fall back to Python's round()."""
+    scaled = values * 1000
+    rounded = np.rint(scaled) / 1000
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if ties.any():
+        rounded[ties] = [round(float(v), 3) for v in values[ties]]
+    return rounded
+
+
+def score_matrix(renters: EncodedRenters, listings: EncodedListings) -> np.ndarray:
+    """
+    Return the (len(renters), len(listings)) compatibility score matrix.
+    Entry [i, j] equals compute_compatibility_score(renter_i, landlord_j, listing_j).
+    """
+    w = WEIGHTS
+    n_renters, n_listings = len(renters), len(listings)
+    score = np.zeros((n_renters, n_listings), dtype=np.float64)
+    if not n_renters or not n_listings:
+        return score
+
+    # budget
+    bmin, bmax, rent = renters.budget_min, renters.budget_max, listings.rent[None, :]
+    in_range = (bmin <= rent) & (rent <= bmax) & (bmax > 0)
+    partial = (bmax > 0) & (bmin > 0)
+    over = np.maximum(0, rent - bmax)
+    under = np.maximum(0, bmin - rent)
+    delta = np.where(over != 0, over, under)
+    penalty = np.minimum(1.0, delta / np.maximum(1, bmax - bmin))
+    score += np.where(
+        in_range, w["budget"], np.where(partial, w["budget"] * (1 - penalty), w["budget"] * 0.5)
+    )
+
+    # location
+    location_hit = np.zeros((n_renters, n_listings), dtype=bool)
+    for i, locs in enumerate(renters.locations):
+        for loc in locs:
+            loc_l = (loc or "").lower()
+            if loc_l:
+                location_hit[i] |= listings.location_hits(loc_l)
+    type_hit = renters.neighborhood_type_hot[:, listings.neighborhood_type_idx]
+    location_hit |= type_hit
+    score += np.where(location_hit, w["location"], w["location"] * 0.2)
+
+    score += _shortfall_term(w["bedrooms"], listings.bedrooms[None, :], renters.bedrooms)
+    score += _shortfall_term(w["bathrooms"], listings.bathrooms[None, :], renters.bathrooms)
+
+    unit_overlap = popcount(renters.unit_mask & listings.unit_mask[None, :]) + renters.unit_hot @ listings.unit_hot.T
+    score += _overlap_term(w["unit_amenities"], unit_overlap, renters.unit_size, 0.5)
+    building_overlap = (
+        popcount(renters.building_mask & listings.building_mask[None, :])
+        + renters.building_hot @ listings.building_hot.T
+    )
+    score += _overlap_term(w["building_amenities"], building_overlap, renters.building_size, 0.5)
+
+    # lease length
+    desired, offered = renters.lease, listings.lease[None, :]
+    both = (desired != 0) & listings.lease_set[None, :]
+    penalty = np.minimum(1.0, np.abs(desired - offered) / np.maximum(1, desired))
+    score += np.where(both, w["lease_length"] * (1 - penalty), w["lease_length"] * 0.6)
+
+    # move-in
+    move_in = np.empty((n_renters, n_listings), dtype=np.float64)
+    for i, pref in enumerate(renters.move_in):
+        if pref:
+            hits = listings.move_in_hits(pref)
+            move_in[i] = np.where(
+                listings.available_set,
+                np.where(hits, w["move_in"], w["move_in"] * 0.4),
+                w["move_in"] * 0.6,
+            )
+        else:
+            move_in[i] = w["move_in"] * 0.6
+    score += move_in
+
+    # pets
+    has_pets, pets_ok = renters.has_pets, listings.pets_allowed[None, :]
+    score += np.where(
+        has_pets, np.where(pets_ok, w["pets"], w["pets"] * 0.1), w["pets"] * 0.8
+    )
+
+    # tenant policies
+    policies = np.empty((n_renters, n_listings), dtype=np.float64)
+    smoker = np.zeros((n_renters, 1), dtype=bool)
+    for i, pref in enumerate(renters.smoking):
+        if not pref:
+            policies[i] = w["tenant_policies"] * 0.5
+        elif pref in NON_SMOKING_PREFS:
+            policies[i] = np.where(listings.no_smoking, w["tenant_policies"], w["tenant_policies"] * 0.4)
+        elif pref in SMOKER_PREFS:
+            policies[i] = w["tenant_policies"] * 0.8
+            smoker[i] = True
+        else:
+            policies[i] = w["tenant_policies"] * 0.6
+    score += policies
+
+    # occupants
+    household, max_occ = renters.household_size, listings.max_occupants[None, :]
+    penalty = np.minimum(1.0, (household - max_occ) / household)
+    score += np.where(
+        max_occ == 0,
+        w["occupants"] * 0.5,
+        np.where(household <= max_occ, w["occupants"], w["occupants"] * (1 - penalty)),
+    )
+
+    score += _overlap_term(w["custom_tags"], renters.custom_hot @ listings.tag_hot.T, renters.custom_size, 0.4)
+
+    # landlord requirements
+    penalties = (
+        0.0
+        + np.where(listings.no_pets[None, :] & has_pets, 0.6, 0.0)
+        + np.where(listings.no_smoking[None, :] & smoker, 0.4, 0.0)
+    )
+    score += np.where(
+        listings.has_landlord_prefs[None, :],
+        w["landlord_requirements"] * np.maximum(0, 1 - penalties),
+        w["landlord_requirements"] * 0.5,
+    )
+
+    return _round3(np.clip(score / TOTAL_WEIGHT, 0.0, 1.0))
+
+
+def iter_score_blocks(
+    renters: Sequence,
+    listings: EncodedListings,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Tuple[EncodedRenters, np.ndarray]]:
+    """Yield (encoded renter chunk, score block) pairs so memory stays O(chunk_size x L)."""
+    renters = list(renters)
+    for start in range(0, len(renters), chunk_size):
+        chunk = EncodedRenters(renters[start:start + chunk_size], listings)
+        yield chunk, score_matrix(chunk, listings)
+
+
+def compute_score_matrix(renters: Sequence, listings: Sequence, landlord_pref_map: Optional[Dict] = None) -> np.ndarray:
+    """Convenience wrapper: encode everything and return the full score matrix."""
+    encoded_listings = encode_listings(listings, landlord_pref_map)
+    return score_matrix(encode_renters(renters, encoded_listings), encoded_listings)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> List[int]:
+    """
+    Indices of the k best scores, highest first. Ties keep catalog order, which
+    matches `ranked.sort(key=score, reverse=True)` on a list built in catalog order.
+    """
+    n = scores.shape[0]
+    if n == 0 or k <= 0:
+        return []
+    if k < n:
+        threshold = np.partition(scores, n - k)[n - k]
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(n)
+    order = np.argsort(-scores[candidates], kind="stable")
+    return candidates[order][:k].tolist()
+
@@ -0,0 +1,132 @@
+# app/utils/dates.py
+"""
+Parsing of free-text move-in dates.
+
+Listings store `available_from` as the landlord typed it, plus the parsed
+`available_date` / `available_flexible` columns written once by the listing
+write path (app.crud.listings). Matchers and the listings API read the
+typed columns; renters' `move_in_date` is parsed once per distinct string.
+"""
+
+import calendar
+import re
+from functools import lru_cache
+from datetime import date, datetime
+from typing import Optional, Tuple
+
+# "Available / moving in right away"
+IMMEDIATE_PHRASES = {"asap", "immediately", "immediate", "now", "today"}
+# "Any date works": from today with no end
+OPEN_PHRASES = {"flexible", "anytime", "any time"}
+
+_DAY_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%B %d %Y", "%b %d %Y", "%d %B %Y", "%d %b %Y"]
+_MONTH_FORMATS = ["%Y-%m", "%B %Y", "%b %Y", "%m/%Y"]
+_YEARLESS_DAY_FORMATS = ["%B %d", "%b %d", "%d %B", "%d %b"]
+_YEARLESS_MONTH_FORMATS = ["%B", "%b"]
+
+
+def _clean(text: str) -> str:
+    text = re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", (text or "").strip().lower())
+    return re.sub(r"\s+", " ", text.replace(",", " ")).strip()
+
+
+def _strptime(text: str, formats) -> Optional[datetime]:
+    for fmt in formats:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _month_end(day: date) -> date:
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def parse_move_in(text: str, today: Optional[date] = None) -> Optional[Tuple[date, date, bool]]:
+    """
+    (first day, last day, flexible) of the period `text` describes, or None
+    if it can't be parsed. A month ("June", "2025-09") covers the whole
+    month; dates without a year are the next such date on or after today;
+    ASAP/immediately start and end today, "flexible" starts today and
+    never ends; both are flagged flexible.
+    """
+    return _parse_move_in(_clean(text), today or date.today())
+
+
+@lru_cache(maxsize=4096)
+def _parse_move_in(text: str, today: date) -> Optional[Tuple[date, date, bool]]:
+    # Renters share a handful of distinct strings; each is parsed once a day
+    if not text:
+        return None
+    if text in IMMEDIATE_PHRASES:
+        return today, today, True
+    if text in OPEN_PHRASES:
+        return today, date.max, True
+    if text == "next month":
+        start = _add_months(today, 1)
+        return start, _month_end(start), False
+    if text == "this month":
+        return today, _month_end(today), False
+
+    parsed = _strptime(text[:10], _DAY_FORMATS[:1]) or _strptime(text, _DAY_FORMATS)
+    if parsed:
+        return parsed.date(), parsed.date(), False
+    parsed = _strptime(text, _MONTH_FORMATS)
+    if parsed:
+        start = parsed.date()
+        return start, _month_end(start), False
+    parsed = _strptime(text, _YEARLESS_DAY_FORMATS)
+    if parsed:
+        try:
+            day = parsed.date().replace(year=today.year)
+            if day < today:
+                day = day.replace(year=today.year + 1)
+        except ValueError:  # Feb 29
+            return None
+        return day, day, False
+    parsed = _strptime(text, _YEARLESS_MONTH_FORMATS)
+    if parsed:
+        start = date(today.year, parsed.month, 1)
+        if start < today.replace(day=1):
+            start = start.replace(year=today.year + 1)
+        return start, _month_end(start), False
+    return None
+
+
+def parse_available_from(text: str, today: Optional[date] = None) -> Tuple[Optional[date], bool]:
+    """
+    (available_date, available_flexible) for a listing's `available_from`
+    text. "Immediately"/"flexible" listings are available from the day
+    they were written.
+    """
+    parsed = parse_move_in(text, today)
+    if parsed is None:
+        return None, False
+    start, _, flexible = parsed
+    return start, flexible
+
+
+def move_in_deadline(text: str, today: Optional[date] = None) -> Optional[date]:
+    """Last day a renter's move-in preference covers, or None if unparseable."""
+    parsed = parse_move_in(text, today)
+    return parsed[1] if parsed else None
+
+
+def available_date_of(listing) -> Optional[date]:
+    """
+    A listing's parsed available date: the stored column when the listing
+    has one (ORM rows), otherwise parsed from `available_from` (plain dicts).
+    """
+    if isinstance(listing, dict):
+        if "available_date" in listing:
+            return listing["available_date"]
+        return parse_available_from(listing.get("available_from") or "")[0]
+    if hasattr(listing, "available_date"):
+        return listing.available_date
+    return parse_available_from(getattr(listing, "available_from", "") or "")[0]
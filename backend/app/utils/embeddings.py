@@ -0,0 +1,228 @@
+# app/utils/embeddings.py
+"""
+Persistent, content-hash keyed embedding store for semantic matching.
+
+Each record (a listing or a renter) maps to one row of a memory-mapped
+float16 or int8 matrix on disk. A row holds the L2-normalized mean of the
+record's text embeddings, so cosine similarity is a plain dot product and
+scoring a batch of renters against the catalog is one matrix product.
+Rows are only re-encoded when the hash of their text changes.
+"""
+
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+Encoder = Callable[[List[str]], np.ndarray]
+
+_DTYPES = {"float16": np.float16, "int8": np.int8}
+_INT8_SCALE = 127.0
+
+
+def listing_texts(listing) -> List[str]:
+    texts = []
+    if getattr(listing, 'description', None):
+        texts.append(listing.description)
+    texts.extend(getattr(listing, 'custom_tags', None) or [])
+    if getattr(listing, 'neighborhood_description', None):
+        texts.append(listing.neighborhood_description)
+    return [t for t in texts if t is not None]
+
+
+def renter_texts(renter) -> List[str]:
+    texts = []
+    texts.extend(getattr(renter, 'custom_preferences', None) or [])
+    texts.extend(getattr(renter, 'locations', None) or [])
+    return [t for t in texts if t is not None]
+
+
+def content_hash(texts: Sequence[str]) -> str:
+    return hashlib.sha1(json.dumps(list(texts), ensure_ascii=False).encode()).hexdigest()
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive flock on `path`, shared by every process using the same directory."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class EmbeddingStore:
+    """
+    Files under `directory`:
+      index.json  - {"dim", "dtype", "capacity", "rows": {key: [row, hash]}, "free": [...]}
+      vectors.bin - capacity x dim matrix, memory-mapped
+    Writers take an exclusive flock so several workers can share one store.
+    """
+
+    def __init__(self, directory: str, dim: int, dtype: str = "float16"):
+        if dtype not in _DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        self.directory = directory
+        self.dim = dim
+        self.dtype = dtype
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, "index.json")
+        self._vectors_path = os.path.join(directory, "vectors.bin")
+        self._lock_path = os.path.join(directory, ".lock")
+        self._mtime = None
+        self._load()
+
+    # -- persistence ------------------------------------------------------
+
+    def _load(self):
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as f:
+                index = json.load(f)
+            if index["dim"] != self.dim or index["dtype"] != self.dtype:
+                raise ValueError(
+                    f"Embedding store at {self.directory} holds {index['dim']}-d {index['dtype']} vectors"
+                )
+            self._mtime = os.path.getmtime(self._index_path)
+        else:
+            index = {"dim": self.dim, "dtype": self.dtype, "capacity": 0, "rows": {}, "free": []}
+        self.capacity = index["capacity"]
+        self.rows: Dict[str, Tuple[int, str]] = {k: (v[0], v[1]) for k, v in index["rows"].items()}
+        self.free: List[int] = index["free"]
+        self.vectors = self._open_vectors(self.capacity)
+
+    def _open_vectors(self, capacity: int):
+        if capacity == 0:
+            return np.zeros((0, self.dim), dtype=_DTYPES[self.dtype])
+        return np.memmap(self._vectors_path, dtype=_DTYPES[self.dtype], mode="r+", shape=(capacity, self.dim))
+
+    def _save_index(self):
+        tmp = self._index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(
+                {
+                    "dim": self.dim,
+                    "dtype": self.dtype,
+                    "capacity": self.capacity,
+                    "rows": {k: [row, h] for k, (row, h) in self.rows.items()},
+                    "free": self.free,
+                },
+                f,
+            )
+        os.replace(tmp, self._index_path)
+        self._mtime = os.path.getmtime(self._index_path)
+
+    def refresh(self):
+        """Pick up rows written by other processes."""
+        if os.path.exists(self._index_path) and os.path.getmtime(self._index_path) != self._mtime:
+            self._load()
+
+    @contextmanager
+    def _locked(self):
+        with file_lock(self._lock_path):
+            self.refresh()
+            yield
+
+    def _grow(self, needed: int):
+        capacity = max(1024, self.capacity)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        # Extend the file in place; existing rows keep their offsets
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * np.dtype(_DTYPES[self.dtype]).itemsize)
+        self.capacity = capacity
+        self.vectors = self._open_vectors(capacity)
+
+    # -- encoding ---------------------------------------------------------
+
+    def _quantize(self, unit: np.ndarray) -> np.ndarray:
+        if self.dtype == "int8":
+            return np.clip(np.round(unit * _INT8_SCALE), -127, 127).astype(np.int8)
+        return unit.astype(np.float16)
+
+    def _dequantize(self, stored: np.ndarray) -> np.ndarray:
+        if self.dtype == "int8":
+            return stored.astype(np.float32) / _INT8_SCALE
+        return stored.astype(np.float32)
+
+    def sync(self, items: Dict[str, List[str]], encoder: Encoder) -> int:
+        """
+        Make sure every key in `items` (key -> texts) has an up-to-date row.
+        All changed texts are encoded in one encoder call. Returns the number
+        of rows (re)encoded. Records without text are dropped from the store.
+        """
+        pending = {}
+        for key, texts in items.items():
+            digest = content_hash(texts) if texts else None
+            current = self.rows.get(key)
+            if (current[1] if current else None) != digest:
+                pending[key] = (texts, digest)
+        if not pending:
+            return 0
+
+        with self._locked():
+            # Another worker may have written the same rows meanwhile
+            pending = {
+                key: (texts, digest) for key, (texts, digest) in pending.items()
+                if (self.rows[key][1] if key in self.rows else None) != digest
+            }
+            flat, spans = [], {}
+            for key, (texts, digest) in pending.items():
+                if digest is None:
+                    continue
+                spans[key] = (len(flat), len(flat) + len(texts))
+                flat.extend(texts)
+            encoded = np.asarray(encoder(flat), dtype=np.float32) if flat else None
+
+            for key, (texts, digest) in pending.items():
+                if digest is None:
+                    if key in self.rows:
+                        self.free.append(self.rows.pop(key)[0])
+                    continue
+                start, end = spans[key]
+                mean = encoded[start:end].mean(axis=0)
+                unit = mean / (np.linalg.norm(mean) + 1e-8)
+                if key in self.rows:
+                    row = self.rows[key][0]
+                elif self.free:
+                    row = self.free.pop()
+                else:
+                    row = len(self.rows) + len(self.free)
+                    self._grow(row + 1)
+                self.vectors[row] = self._quantize(unit)
+                self.rows[key] = (row, digest)
+            if isinstance(self.vectors, np.memmap):
+                self.vectors.flush()
+            self._save_index()
+        return len(pending)
+
+    # -- lookup -----------------------------------------------------------
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        entry = self.rows.get(key)
+        if entry is None:
+            return None
+        return self._dequantize(self.vectors[entry[0]])
+
+    def matrix(self, keys: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(len(keys) x dim float32 matrix, boolean mask of keys that have a vector)."""
+        rows = [self.rows.get(k) for k in keys]
+        present = np.array([r is not None for r in rows], dtype=bool)
+        out = np.zeros((len(keys), self.dim), dtype=np.float32)
+        if present.any():
+            idx = np.array([r[0] for r in rows if r is not None])
+            out[present] = self._dequantize(self.vectors[idx])
+        return out, present
@@ -1,34 +1,59 @@
 # app/utils/match.py
+from app.utils.dates import available_date_of, move_in_deadline
+
+WEIGHTS = {
+    "budget": 20,
+    "location": 15,
+    "bedrooms": 10,
+    "bathrooms": 8,
+    "unit_amenities": 10,
+    "building_amenities": 5,
+    "lease_length": 8,
+    "move_in": 7,
+    "pets": 7,
+    "tenant_policies": 5,
+    "occupants": 3,
+    "custom_tags": 4,
+    "landlord_requirements": 8,
+}
+
+NON_SMOKING_PREFS = {"no smoking", "non smoking", "non-smoking"}
+SMOKER_PREFS = {"smoker friendly", "smoking ok"}
+IMMEDIATE_MOVE_IN = {"asap", "immediately"}
+
+
+def attr(source, name, default=None):
+    if source is None:
+        return default
+    if isinstance(source, dict):
+        return source.get(name, default)
+    return getattr(source, name, default)
+
+
+def move_in_matches(move_in_pref: str, available_date, available_from: str) -> bool:
+    """
+    Whether a listing is available by the renter's move-in preference.
+    Compares dates when both sides parse, otherwise falls back to a
+    substring check on the listing's text.
+    """
+    if move_in_pref in IMMEDIATE_MOVE_IN:
+        return True
+    deadline = move_in_deadline(move_in_pref)
+    if deadline and available_date:
+        return available_date <= deadline
+    return move_in_pref in available_from.lower()
+
 
 def compute_compatibility_score(renter, landlord_prefs, listing):
     """
     renter: RenterPreferences SQLAlchemy instance or dict
     landlord_prefs: LandlordPreferences SQLAlchemy instance or dict
     listing: Listing SQLAlchemy instance or dict
-    """
 
-    def attr(source, name, default=None):
-        if source is None:
-            return default
-        if isinstance(source, dict):
-            return source.get(name, default)
-        return getattr(source, name, default)
-
-    weights = {
-        "budget": 20,
-        "location": 15,
-        "bedrooms": 10,
-        "bathrooms": 8,
-        "unit_amenities": 10,
-        "building_amenities": 5,
-        "lease_length": 8,
-        "move_in": 7,
-        "pets": 7,
-        "tenant_policies": 5,
-        "occupants": 3,
-        "custom_tags": 4,
-        "landlord_requirements": 8,
-    }
+    This is the reference implementation; app.utils.batch_match must stay
+    in sync with it.
+    """
+    weights = WEIGHTS
 
     score = 0.0
     total = sum(weights.values())
@@ -108,10 +133,7 @@ def compute_compatibility_score(renter, landlord_prefs, listing):
     move_in_pref = (attr(renter, "move_in_date", "") or "").lower()
     available_from = attr(listing, "available_from")
     if move_in_pref and available_from:
-        if move_in_pref in {"asap", "immediately"}:
-            match = True
-        else:
-            match = move_in_pref in available_from.lower()
+        match = move_in_matches(move_in_pref, available_date_of(listing), available_from)
         score += weights["move_in"] if match else weights["move_in"] * 0.4
     else:
         score += weights["move_in"] * 0.6
@@ -131,9 +153,9 @@ def compute_compatibility_score(renter, landlord_prefs, listing):
 
     smoking_pref = (attr(renter, "smoking_preference") or "").lower()
     if smoking_pref:
-        if smoking_pref in {"no smoking", "non smoking", "non-smoking"}:
+        if smoking_pref in NON_SMOKING_PREFS:
             score += weights["tenant_policies"] if "No smoking" in tenant_prefs else weights["tenant_policies"] * 0.4
-        elif smoking_pref in {"smoker friendly", "smoking ok"}:
+        elif smoking_pref in SMOKER_PREFS:
             score += weights["tenant_policies"] * 0.8
         else:
             score += weights["tenant_policies"] * 0.6
@@ -164,7 +186,7 @@ def compute_compatibility_score(renter, landlord_prefs, listing):
         penalties = 0.0
         if "No pets" in tenant_prefs and renter_has_pets:
             penalties += 0.6
-        if "No smoking" in tenant_prefs and smoking_pref in {"smoker friendly", "smoking ok"}:
+        if "No smoking" in tenant_prefs and smoking_pref in SMOKER_PREFS:
             penalties += 0.4
         score += landlord_req_score * max(0, 1 - penalties)
     else:
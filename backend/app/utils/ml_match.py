@@ -12,17 +12,26 @@ Key improvements:
 """
 
 import numpy as np
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, date
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime, date, timedelta
 import json
+import logging
+import os
 
-# For semantic matching (optional - requires sentence-transformers)
-try:
-    from sentence_transformers import SentenceTransformer
-    SEMANTIC_AVAILABLE = True
-except ImportError:
-    SEMANTIC_AVAILABLE = False
-    print("Warning: sentence-transformers not installed. Semantic matching disabled.")
+from app.utils.dates import available_date_of, move_in_deadline
+from app.utils.tags import AMENITY_VOCABULARY, FEATURE_VOCABULARY, mask_bits
+from app.utils.model_registry import (
+    DEFAULT_EMBEDDING_MODEL,
+    get_embedding_model,
+    sentence_transformers_available,
+)
+
+logger = logging.getLogger(__name__)
+
+# For semantic matching (optional - requires sentence-transformers). Only
+# checks that the package is installed; torch and the model are loaded on
+# first use through app.utils.model_registry.
+SEMANTIC_AVAILABLE = sentence_transformers_available()
 
 
 class SmartMatcher:
@@ -30,11 +39,23 @@ class SmartMatcher:
     Enhanced matching that learns from user behavior and uses ML techniques.
     """
     
-    def __init__(self, use_semantic: bool = False):
+    def __init__(
+        self,
+        use_semantic: bool = False,
+        embedding_store_dir: Optional[str] = None,
+        embedding_dtype: str = "float16",
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+    ):
+        if use_semantic and not SEMANTIC_AVAILABLE:
+            logger.warning("sentence-transformers not installed. Semantic matching disabled.")
         self.use_semantic = use_semantic and SEMANTIC_AVAILABLE
-        if self.use_semantic:
-            # Lightweight model for text similarity
-            self.semantic_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Lightweight model for text similarity, loaded on first use
+        self.model_name = model_name
+        self.embedding_store_dir = embedding_store_dir if self.use_semantic else None
+        self.embedding_dtype = embedding_dtype
+        self._embedding_store = None
+        self.listing_index = None
+        self._listing_index_mtime = None
         
         # Base weights (can be learned per-user)
         self.base_weights = {
@@ -55,24 +76,64 @@ class SmartMatcher:
             "semantic_match": 10,      # New: text similarity
         }
     
+    @property
+    def semantic_model(self):
+        """Shared per process by the model registry; loads on first access."""
+        return get_embedding_model(self.model_name)
+    
+    @property
+    def has_embedding_store(self) -> bool:
+        """Whether semantic scores come from the embedding store (no model load)."""
+        return self.embedding_store_dir is not None
+    
+    @property
+    def embedding_store(self):
+        if self._embedding_store is None and self.has_embedding_store:
+            from app.utils.embeddings import EmbeddingStore
+            self._embedding_store = EmbeddingStore(
+                self.embedding_store_dir,
+                self.semantic_model.get_sentence_embedding_dimension(),
+                self.embedding_dtype,
+            )
+        return self._embedding_store
+    
+    def warm_up(self) -> None:
+        """Load the embedding model (and open the store) ahead of the first task."""
+        if not self.use_semantic:
+            return
+        try:
+            self.semantic_model
+            self.embedding_store
+        except Exception:
+            logger.exception("Could not warm up semantic matching")
+    
     def compute_enhanced_score(
         self,
         renter,
         landlord_prefs,
         listing,
         user_behavior: Optional[Dict] = None,
-        similar_users_prefs: Optional[List] = None
+        similar_users_prefs: Optional[List] = None,
+        base_score: Optional[float] = None,
+        semantic_score: Optional[float] = None,
+        geo_score: Optional[float] = None,
     ) -> Tuple[float, Dict]:
         """
         Compute enhanced compatibility score with ML features.
         
+        base_score, semantic_score and geo_score can be passed in when they
+        were already computed in bulk (see app.utils.batch_match,
+        semantic_score_matrix and app.utilis.geo.GeohashIndex); otherwise
+        they are computed here.
+        
         Returns:
             (score, explanation_dict) - score 0-1, and breakdown for transparency
         """
         from app.utils.match import compute_compatibility_score
         
         # 1. Base rule-based score (maintains existing logic)
-        base_score = compute_compatibility_score(renter, landlord_prefs, listing)
+        if base_score is None:
+            base_score = compute_compatibility_score(renter, landlord_prefs, listing)
         
         # 2. Behavioral signal (learned from user actions)
         behavioral_boost = self._compute_behavioral_signal(
@@ -80,9 +141,10 @@ class SmartMatcher:
         )
         
         # 3. Semantic matching (text similarity)
-        semantic_score = self._compute_semantic_match(
-            renter, listing
-        ) if self.use_semantic else 0.5
+        if semantic_score is None:
+            semantic_score = self._compute_semantic_match(
+                renter, listing
+            ) if self.use_semantic else 0.5
         
         # 4. Collaborative filtering signal
         collab_score = self._compute_collaborative_signal(
@@ -90,7 +152,7 @@ class SmartMatcher:
         ) if similar_users_prefs else 0.5
         
         # 5. Feature engineering improvements
-        location_boost = self._enhanced_location_match(renter, listing)
+        location_boost = self._enhanced_location_match(renter, listing, geo_score)
         timing_boost = self._enhanced_timing_match(renter, listing)
         
         # Combine signals (weighted ensemble)
@@ -161,6 +223,14 @@ class SmartMatcher:
         if not self.use_semantic:
             return 0.5
         
+        if self.has_embedding_store and _has_embedding_key(renter, listing):
+            try:
+                self.sync_embeddings([renter], [listing])
+                return float(self.semantic_score_matrix([renter], [listing])[0, 0])
+            except Exception:
+                logger.exception("Semantic matching failed")
+                return 0.5
+        
         try:
             # Collect text from renter preferences
             renter_texts = []
@@ -197,10 +267,140 @@ class SmartMatcher:
             # Normalize to 0-1
             return (similarity + 1) / 2
             
-        except Exception as e:
-            print(f"Semantic matching error: {e}")
+        except Exception:
+            logger.exception("Semantic matching failed")
             return 0.5
     
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.semantic_model.encode(texts, convert_to_numpy=True)
+    
+    def sync_embeddings(self, renters=(), listings=()) -> int:
+        """
+        Bring the stored embeddings of these renters/listings up to date.
+        Only records whose text changed since the last sync are encoded.
+        """
+        if not self.has_embedding_store:
+            return 0
+        from app.utils.embeddings import listing_texts, renter_texts
+        
+        items = {_renter_key(r): renter_texts(r) for r in renters}
+        items.update({_listing_key(l): listing_texts(l) for l in listings})
+        return self.embedding_store.sync(items, self._encode)
+    
+    def semantic_score_matrix(self, renters, listings) -> np.ndarray:
+        """
+        (renters x listings) semantic scores from the embedding store as one
+        matrix product; 0.5 where either side has no text. Call
+        sync_embeddings first for records that may have changed.
+        """
+        scores = np.full((len(renters), len(listings)), 0.5)
+        if not self.has_embedding_store or not len(renters) or not len(listings):
+            return scores
+        renter_vecs, renter_mask = self.embedding_store.matrix([_renter_key(r) for r in renters])
+        listing_vecs, listing_mask = self.embedding_store.matrix([_listing_key(l) for l in listings])
+        similarity = (renter_vecs[renter_mask] @ listing_vecs[listing_mask].T + 1) / 2
+        scores[np.ix_(renter_mask, listing_mask)] = similarity
+        return scores
+    
+    # -- semantic candidate retrieval ----------------------------------------
+    
+    @property
+    def _listing_index_path(self) -> str:
+        return os.path.join(self.embedding_store_dir, "listing_ivf.npz")
+    
+    def _listing_index_lock(self):
+        from app.utils.embeddings import file_lock
+        return file_lock(os.path.join(self.embedding_store_dir, ".listing_ivf.lock"))
+    
+    def _current_listing_index(self):
+        """The listing index on disk, reloaded when another process rewrote it."""
+        path = self._listing_index_path
+        if not os.path.exists(path):
+            return self.listing_index
+        mtime = os.path.getmtime(path)
+        if mtime != self._listing_index_mtime:
+            from app.utils.ann_index import IVFIndex
+            self.listing_index = IVFIndex.load(path)
+            self._listing_index_mtime = mtime
+        return self.listing_index
+    
+    def _save_listing_index(self, index):
+        index.save(self._listing_index_path)
+        self.listing_index = index
+        self._listing_index_mtime = os.path.getmtime(self._listing_index_path)
+    
+    def build_listing_index(self, listings) -> int:
+        """
+        Re-cluster the listing index from scratch over `listings` (the full
+        catalog). Returns the number of indexed listings.
+        """
+        if not self.has_embedding_store:
+            return 0
+        from app.utils.ann_index import IVFIndex
+        
+        self.sync_embeddings(listings=listings)
+        vectors, present = self.embedding_store.matrix([_listing_key(l) for l in listings])
+        ids = [l.id for l, has_vector in zip(listings, present) if has_vector]
+        if not ids:
+            return 0
+        # Held while clustering so concurrent inserts are not overwritten
+        with self._listing_index_lock():
+            self._save_listing_index(IVFIndex.build(ids, vectors[present]))
+        return len(ids)
+    
+    def index_listings(self, listings=(), removed_ids=()) -> int:
+        """
+        Insert new or edited listings into the existing index (and drop
+        deleted ones) without re-clustering. Returns the number inserted.
+        """
+        if not self.has_embedding_store:
+            return 0
+        self.sync_embeddings(listings=listings)
+        with self._listing_index_lock():
+            index = self._current_listing_index()
+            if index is None:
+                # Nothing to insert into yet; the periodic rebuild creates it
+                return 0
+            vectors, present = self.embedding_store.matrix([_listing_key(l) for l in listings])
+            index.remove(list(removed_ids) + [l.id for l, has_vector in zip(listings, present) if not has_vector])
+            ids = [l.id for l, has_vector in zip(listings, present) if has_vector]
+            index.add(ids, vectors[present])
+            self._save_listing_index(index)
+        return len(ids)
+    
+    def retrieve_semantic_candidates(
+        self,
+        renter=None,
+        query: Optional[str] = None,
+        k: int = 50,
+        nprobe: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Top-k (listing_id, semantic score) for a renter's free-text
+        preferences or a free-text `query`, best first. Scores use the same
+        0-1 scale as _compute_semantic_match. Empty when semantic matching
+        or the listing index is unavailable.
+        """
+        if not self.has_embedding_store:
+            return []
+        index = self._current_listing_index()
+        if index is None:
+            return []
+        
+        if query is not None:
+            texts = [query] if query.strip() else []
+        else:
+            from app.utils.embeddings import renter_texts
+            texts = renter_texts(renter)
+        if not texts:
+            return []
+        if renter is not None and query is None and getattr(renter, 'user_id', None) is not None:
+            self.sync_embeddings(renters=[renter])
+            vector = self.embedding_store.get(_renter_key(renter))
+        else:
+            vector = np.mean(self._encode(texts), axis=0)
+        return [(listing_id, (similarity + 1) / 2) for listing_id, similarity in index.search(vector, k, nprobe)]
+    
     def _compute_collaborative_signal(
         self,
         renter,
@@ -225,18 +425,15 @@ class SmartMatcher:
         # Normalize
         return min(1.0, positive_signals / max(1, len(similar_users_prefs) * 0.3))
     
-    def _enhanced_location_match(self, renter, listing) -> float:
+    def _enhanced_location_match(self, renter, listing, geo_score: Optional[float] = None) -> float:
         """
         Better location matching using:
-        - Geographic proximity (if coordinates available)
+        - Geographic proximity (stored listing coordinates and cached
+          geocodes only; the geocoder is never called here). `geo_score`
+          is the precomputed 0-1 proximity score when scoring in bulk.
         - Neighborhood profile overlap
         - Location name fuzzy matching
         """
-        try:
-            from app.utilis.geo import location_compatibility_score
-        except ImportError:
-            location_compatibility_score = None
-        
         renter_locations = getattr(renter, 'locations', []) or []
         listing_location = getattr(listing, 'location', '') or ''
         
@@ -244,18 +441,10 @@ class SmartMatcher:
             return 0.5
         
         # Try geocoding-based proximity
-        if location_compatibility_score:
-            try:
-                geo_score = location_compatibility_score(
-                    renter_locations,
-                    listing_location,
-                    max_score=100,
-                    threshold_km=10
-                ) / 100.0
-                if geo_score > 0:
-                    return geo_score
-            except:
-                pass
+        if geo_score is None:
+            geo_score = self._geo_proximity(renter_locations, listing)
+        if geo_score > 0:
+            return geo_score
         
         # Fallback to text matching
         listing_lower = listing_location.lower()
@@ -273,9 +462,29 @@ class SmartMatcher:
         
         return 0.3
     
+    def _geo_proximity(self, renter_locations, listing) -> float:
+        """0-1 proximity score for one pair, from stored coordinates and the geocode cache."""
+        try:
+            from app.utilis.geo import PROXIMITY_THRESHOLD_KM, location_compatibility_score
+        except ImportError:
+            return 0.0
+        try:
+            latitude = getattr(listing, 'latitude', None)
+            longitude = getattr(listing, 'longitude', None)
+            return location_compatibility_score(
+                renter_locations,
+                listing.location,
+                max_score=100,
+                threshold_km=PROXIMITY_THRESHOLD_KM,
+                listing_coords=(latitude, longitude) if latitude is not None else None,
+            ) / 100.0
+        except Exception:
+            return 0.0
+    
     def _enhanced_timing_match(self, renter, listing) -> float:
         """
-        Better move-in date matching with actual date parsing.
+        Better move-in date matching using the listing's parsed
+        available_date (written once on save, see app.utils.dates).
         """
         move_in_pref = (getattr(renter, 'move_in_date', '') or '').lower()
         available_from = getattr(listing, 'available_from', '') or ''
@@ -289,27 +498,21 @@ class SmartMatcher:
         if move_in_pref in {'asap', 'immediately', 'flexible'}:
             return 0.9  # Flexible = high match
         
-        # Try to parse dates
-        try:
-            if available_from and len(available_from) > 4:
-                # Assume ISO format or similar
-                avail_date = datetime.strptime(available_from[:10], '%Y-%m-%d').date()
-                
-                if move_in_pref == 'next month':
-                    target_month = today.month + 1
-                    if avail_date.month == target_month or avail_date <= today:
-                        return 0.9
-                
-                # Check if available date is before or near move-in preference
-                days_diff = abs((avail_date - today).days)
-                if days_diff <= 30:
-                    return 0.9
-                elif days_diff <= 60:
-                    return 0.7
-                elif days_diff <= 90:
-                    return 0.5
-        except:
-            pass
+        avail_date = available_date_of(listing)
+        if avail_date:
+            # Available by the end of the period the renter asked for
+            deadline = move_in_deadline(move_in_pref, today)
+            if deadline and avail_date <= deadline:
+                return 0.9
+            
+            # Check if available date is before or near move-in preference
+            days_diff = abs((avail_date - today).days)
+            if days_diff <= 30:
+                return 0.9
+            elif days_diff <= 60:
+                return 0.7
+            elif days_diff <= 90:
+                return 0.5
         
         # Fallback to text matching
         if move_in_pref in available_from.lower():
@@ -318,44 +521,169 @@ class SmartMatcher:
         return 0.4
 
 
+def _renter_key(renter) -> str:
+    return f"renter:{renter.user_id}"
+
+
+def _listing_key(listing) -> str:
+    return f"listing:{listing.id}"
+
+
+def _has_embedding_key(renter, listing) -> bool:
+    return getattr(renter, 'user_id', None) is not None and getattr(listing, 'id', None) is not None
+
+
 def compute_user_behavior_features(db, user_id: int, listing_id: int) -> Dict:
     """
-    Extract behavioral features for a user-listing pair.
-    Called from matching service to gather interaction data.
+    Extract behavioral features for a user-listing pair, from a
+    BehaviorFeatureStore over the whole catalog. Loads the catalog on every
+    call; batch jobs should load the store once and use features_for.
     """
-    from app.db.models import SavedListing, VisitRequest
-    
-    features = {
-        'saved_similarity': 0.0,
-        'visit_similarity': 0.0,
-        'ignored_similarity': 0.0,
-    }
-    
-    # Check if user saved this exact listing
-    saved = db.query(SavedListing).filter(
-        SavedListing.user_id == user_id,
-        SavedListing.listing_id == listing_id
-    ).first()
-    if saved:
-        features['saved_similarity'] = 1.0
-    
-    # Check visit requests
-    visit = db.query(VisitRequest).filter(
-        VisitRequest.renter_id == user_id,
-        VisitRequest.listing_id == listing_id
-    ).first()
-    if visit:
-        features['visit_similarity'] = 1.0
-    
-    # TODO: Compute similarity to other saved listings
-    # This would require comparing listing features
-    
-    return features
+    from app.db.models import Listing
+    from app.utils.batch_match import encode_listings
+
+    listings = db.query(Listing).order_by(Listing.id).all()
+    store = BehaviorFeatureStore.load(db, encode_listings(listings), user_ids=[user_id])
+    return store.features_for(user_id, listing_id)
+
+
+def listing_feature_matrix(encoded_listings) -> np.ndarray:
+    """
+    L2-normalized feature vector per listing (price, size, pets, property type,
+    amenities, building features) used to compare listings with each other.
+    `encoded_listings` is an app.utils.batch_match.EncodedListings.
+    """
+    def scaled(values):
+        top = values.max() if values.size else 0
+        return values / top if top > 0 else values
+
+    from app.utils.match import attr
+
+    property_types = [attr(l, 'property_type') or '' for l in encoded_listings.listings]
+    type_vocab = {t: i for i, t in enumerate(sorted(set(property_types)))}
+    type_hot = np.zeros((len(property_types), max(1, len(type_vocab))))
+    for i, t in enumerate(property_types):
+        type_hot[i, type_vocab[t]] = 1.0
+
+    # Amenities / features: vocabulary bits from the masks, then the out-of-vocabulary extras
+    features = np.hstack([
+        scaled(encoded_listings.rent)[:, None],
+        scaled(encoded_listings.bedrooms)[:, None],
+        scaled(encoded_listings.bathrooms)[:, None],
+        encoded_listings.pets_allowed.astype(np.float64)[:, None],
+        type_hot,
+        mask_bits(encoded_listings.unit_mask, len(AMENITY_VOCABULARY)),
+        encoded_listings.unit_hot,
+        mask_bits(encoded_listings.building_mask, len(FEATURE_VOCABULARY)),
+        encoded_listings.building_hot,
+    ])
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    return features / np.maximum(norms, 1e-8)
+
+
+class BehaviorFeatureStore:
+    """
+    In-memory index of saves, visit requests and ignored matches for one
+    matching run. Loaded with a constant number of queries; serves each
+    renter-listing pair's similarity to the renter's saved, visited and
+    ignored listings (1.0 for those listings themselves) with O(1) lookups.
+    """
+
+    IGNORED_LOOKBACK_DAYS = 30
+
+    def __init__(
+        self,
+        listing_ids: List[int],
+        features: np.ndarray,
+        saved: Dict[int, Set[int]],
+        visited: Dict[int, Set[int]],
+        ignored: Dict[int, Set[int]],
+    ):
+        self.listing_index = {listing_id: i for i, listing_id in enumerate(listing_ids)}
+        self.features = features
+        self.saved = saved
+        self.visited = visited
+        self.ignored = ignored
+        self._cached_user = None
+        self._cached_profile = None
+
+    @classmethod
+    def load(cls, db, encoded_listings, user_ids: Optional[List[int]] = None) -> "BehaviorFeatureStore":
+        """Load all interactions (optionally for a renter shard) in three queries."""
+        from app.db.models import DailyMatch, SavedListing, VisitRequest
+
+        def grouped(rows):
+            index: Dict[int, Set[int]] = {}
+            for user_id, listing_id in rows:
+                index.setdefault(user_id, set()).add(listing_id)
+            return index
+
+        saved_q = db.query(SavedListing.user_id, SavedListing.listing_id)
+        visit_q = db.query(VisitRequest.renter_id, VisitRequest.listing_id)
+        since = date.today() - timedelta(days=cls.IGNORED_LOOKBACK_DAYS)
+        shown_q = db.query(DailyMatch.renter_id, DailyMatch.listing_id).filter(
+            DailyMatch.matched_date >= since,
+            DailyMatch.matched_date < date.today(),
+        )
+        if user_ids is not None:
+            saved_q = saved_q.filter(SavedListing.user_id.in_(user_ids))
+            visit_q = visit_q.filter(VisitRequest.renter_id.in_(user_ids))
+            shown_q = shown_q.filter(DailyMatch.renter_id.in_(user_ids))
+
+        saved = grouped(saved_q.all())
+        visited = grouped(visit_q.all())
+        ignored = {
+            user_id: shown - saved.get(user_id, set()) - visited.get(user_id, set())
+            for user_id, shown in grouped(shown_q.all()).items()
+        }
+        return cls(
+            encoded_listings.ids,
+            listing_feature_matrix(encoded_listings),
+            saved,
+            visited,
+            ignored,
+        )
+
+    def _similarity_to(self, listing_ids: Set[int]) -> Optional[np.ndarray]:
+        rows = [self.listing_index[i] for i in listing_ids if i in self.listing_index]
+        if not rows:
+            return None
+        similarity = (self.features[rows] @ self.features.T).max(axis=0)
+        # Interacting with the listing itself is the strongest possible signal
+        similarity[rows] = 1.0
+        return np.clip(similarity, 0.0, 1.0)
+
+    def _profile(self, user_id: int) -> Dict[str, Optional[np.ndarray]]:
+        # The matching job walks listings renter by renter, so caching the
+        # current renter is enough to make every per-listing lookup O(1).
+        if self._cached_user != user_id:
+            self._cached_user = user_id
+            self._cached_profile = {
+                'saved_similarity': self._similarity_to(self.saved.get(user_id, set())),
+                'visit_similarity': self._similarity_to(self.visited.get(user_id, set())),
+                'ignored_similarity': self._similarity_to(self.ignored.get(user_id, set())),
+            }
+        return self._cached_profile
+
+    def features_for(self, user_id: int, listing_id: int) -> Dict:
+        features = {
+            'saved_similarity': 0.0,
+            'visit_similarity': 0.0,
+            'ignored_similarity': 0.0,
+        }
+        idx = self.listing_index.get(listing_id)
+        if idx is None:
+            return features
+        for name, similarity in self._profile(user_id).items():
+            if similarity is not None:
+                features[name] = float(similarity[idx])
+        return features
 
 
 def find_similar_users(db, renter_prefs, limit: int = 10) -> List[Dict]:
     """
     Find users with similar preferences for collaborative filtering.
+    Brute-force reference; batch jobs use app.utils.similar_users.SimilarUserIndex.
     """
     from app.db.models import RenterPreferences, SavedListing
     
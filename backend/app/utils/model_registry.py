@@ -0,0 +1,115 @@
+# app/utils/model_registry.py
+"""
+Process-wide registry for heavy ML models.
+
+Models are loaded on first use (never at import), exactly once per process
+even when several tasks or threads ask at the same time, and then shared.
+Each load records how long it took and how much resident memory it added.
+Celery workers can warm models up at boot with `warm_up`.
+"""
+
+import importlib.util
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+
+def resident_memory_mb() -> Optional[float]:
+    """Current RSS of this process in MB (None where it can't be read)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Peak rather than current RSS; bytes on macOS, KB elsewhere
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except (ImportError, OSError):
+        return None
+
+
+def sentence_transformers_available() -> bool:
+    # find_spec checks for the package without importing torch
+    return importlib.util.find_spec("sentence_transformers") is not None
+
+
+def _load_sentence_transformer(name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name)
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], object]] = {}
+        self._models: Dict[str, object] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], object]) -> None:
+        with self._registry_lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._loaders
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def get(self, name: str):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        if name not in self._loaders:
+            raise KeyError(f"No model registered as {name!r}")
+        with self._locks[name]:
+            # Another thread may have finished loading while we waited
+            if name not in self._models:
+                rss_before = resident_memory_mb()
+                started = time.perf_counter()
+                self._models[name] = self._loaders[name]()
+                load_seconds = time.perf_counter() - started
+                rss_after = resident_memory_mb()
+                self._stats[name] = {
+                    "load_seconds": round(load_seconds, 3),
+                    "rss_mb": None if rss_after is None else round(rss_after, 1),
+                    "rss_delta_mb": None if None in (rss_before, rss_after) else round(rss_after - rss_before, 1),
+                }
+                logger.info("Loaded model %s in %.2fs (%s)", name, load_seconds, self._stats[name])
+        return self._models[name]
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """Load the given (default: all registered) models now. Failures are logged, not raised."""
+        for name in list(names if names is not None else self._loaders):
+            try:
+                self.get(name)
+            except Exception:
+                logger.exception("Could not warm up model %s", name)
+        return self.stats()
+
+    def stats(self) -> Dict[str, Dict]:
+        return {
+            name: {"loaded": name in self._models, **self._stats.get(name, {})}
+            for name in self._loaders
+        }
+
+
+registry = ModelRegistry()
+
+
+def get_embedding_model(name: str = DEFAULT_EMBEDDING_MODEL):
+    """The shared SentenceTransformer for `name`, loaded on first call."""
+    if not registry.is_registered(name):
+        registry.register(name, lambda: _load_sentence_transformer(name))
+    return registry.get(name)
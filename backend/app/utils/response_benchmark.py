@@ -0,0 +1,129 @@
+# app/utils/response_benchmark.py
+"""
+Requests/sec of GET /api/listings on a synthetic catalog, before and after
+the fast JSON path (app.core.responses):
+
+- baseline: the previous handler, returning ListingResponse dicts through
+  response_model validation and jsonable_encoder;
+- fast: the current handler with its payload cache cleared before every
+  request (serialization cost only);
+- cached: the current handler serving the pre-serialized body.
+
+Runs in-process against an in-memory SQLite catalog:
+    python -m app.utils.response_benchmark
+"""
+
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+AMENITIES = ["Parking", "WiFi", "Laundry", "Garden", "Gym", "Pool", "Heating", "Balcony"]
+FEATURES = ["Hardwood Floors", "Fireplace", "Storage Space", "High Ceilings"]
+TAGS = ["quiet", "near campus", "sunny", "renovated", "furnished"]
+
+
+def build_catalog(db, n_listings: int, seed: int = 0) -> None:
+    from app.db.models import Listing, User
+
+    rng = random.Random(seed)
+    landlords = [
+        User(email=f"landlord{i}@example.com", role="landlord", name=f"Landlord {i}")
+        for i in range(max(1, n_listings // 20))
+    ]
+    db.add_all(landlords)
+    db.flush()
+    started = datetime(2025, 1, 1)
+    db.add_all([
+        Listing(
+            landlord_id=rng.choice(landlords).id,
+            title=f"Listing {i}",
+            description="Bright, quiet apartment close to transit. " * rng.randint(2, 8),
+            location=rng.choice(["Downtown", "Midtown", "Uptown", "Collegetown"]),
+            rent_price=rng.randint(600, 3500),
+            created_at=started + timedelta(minutes=i),
+            property_type=rng.choice(["apartment", "house", "studio"]),
+            bedrooms=rng.randint(0, 4),
+            bathrooms=rng.randint(1, 3),
+            available_from="2025-09-01",
+            neighborhood_profile=["Urban"],
+            amenities=rng.sample(AMENITIES, rng.randint(0, 5)),
+            building_features=rng.sample(FEATURES, rng.randint(0, 3)),
+            custom_tags=rng.sample(TAGS, rng.randint(0, 3)),
+            images=[f"/static/listing_images/{i}-{n}.jpg" for n in range(rng.randint(1, 6))],
+            house_rules=["No Smoking"],
+        )
+        for i in range(n_listings)
+    ])
+    db.commit()
+
+
+def _requests_per_second(client, path: str, n_requests: int, before=None) -> float:
+    elapsed = 0.0
+    for _ in range(n_requests):
+        if before:
+            before()
+        started = time.perf_counter()
+        response = client.get(path)
+        elapsed += time.perf_counter() - started
+        response.raise_for_status()
+    return n_requests / elapsed
+
+
+def benchmark(n_listings: int = 10_000, n_requests: int = 5, seed: int = 0) -> Dict:
+    from fastapi import Depends, FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session, sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from app.crud.listings import get_all_listings
+    from app.db.base import Base
+    from app.dependencies import get_db, get_optional_user
+    from app.routers import listing
+    from app.schemas.listing import ListingResponse
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+    with SessionLocal() as db:
+        build_catalog(db, n_listings, seed)
+
+    def session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(listing.router)
+
+    @app.get("/baseline", response_model=List[ListingResponse])
+    def baseline(db: Session = Depends(get_db)):
+        results = []
+        for l in get_all_listings(db):
+            data = ListingResponse.from_orm(l).dict()
+            data["match_score"] = None
+            results.append(data)
+        return results
+
+    app.dependency_overrides[get_db] = session
+    app.dependency_overrides[get_optional_user] = lambda: None
+    client = TestClient(app)
+
+    identical = json.loads(client.get("/baseline").content) == json.loads(client.get("/api/listings").content)
+    result = {
+        "listings": n_listings,
+        "baseline_rps": _requests_per_second(client, "/baseline", n_requests),
+        "fast_rps": _requests_per_second(client, "/api/listings", n_requests, listing._anonymous_listings.clear),
+        "cached_rps": _requests_per_second(client, "/api/listings", n_requests),
+        "identical_body": identical,
+    }
+    engine.dispose()
+    return {k: round(v, 2) if isinstance(v, float) else v for k, v in result.items()}
+
+
+if __name__ == "__main__":
+    print(benchmark())
@@ -0,0 +1,198 @@
+# app/utils/score_cache.py
+"""
+Cache for on-request compatibility scores.
+
+A score only depends on the renter's preferences, the listing and the
+listing's landlord preferences (plus today's date, for move-in matching),
+so it is keyed by the `score_version` of each of those rows. The crud
+write paths bump the versions; an edit therefore never serves a stale
+score, and entries for old versions simply stop being read.
+
+Two tiers: an in-process LRU bounded by entry count, and an optional Redis
+tier (SCORE_CACHE_REDIS_URL) holding one hash per (renter, day, renter
+version) that expires a TTL after its last write. A new day or new
+preferences start a new hash and the old one just runs out, so Redis memory
+is bounded by renters active within the TTL x listings they viewed.
+Saving a renter's preferences drops their entries from the local tier.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (renter_id, renter_version, listing_id, listing_version, landlord_version, day ordinal)
+ScoreKey = Tuple[int, int, int, int, int, int]
+
+
+def bump_score_version(obj) -> None:
+    """Mark a RenterPreferences / LandlordPreferences / Listing row as changed for scoring."""
+    obj.score_version = (obj.score_version or 0) + 1
+
+
+def score_key(renter, listing, landlord_prefs, today: Optional[date] = None) -> ScoreKey:
+    return (
+        renter.user_id,
+        renter.score_version or 0,
+        listing.id,
+        listing.score_version or 0,
+        (landlord_prefs.score_version or 0) if landlord_prefs is not None else 0,
+        (today or date.today()).toordinal(),
+    )
+
+
+def _redis_key(key: ScoreKey) -> str:
+    renter_id, renter_version, _, _, _, day = key
+    return f"score_cache:{renter_id}:{day}:{renter_version}"
+
+
+def _field(key: ScoreKey) -> str:
+    # listing_id:listing_version:landlord_version within the hash
+    return ":".join(str(part) for part in key[2:5])
+
+
+class ScoreCache:
+    def __init__(self, maxsize: int = 50_000, redis_url: Optional[str] = None, redis_ttl: int = 24 * 60 * 60):
+        self.maxsize = maxsize
+        self.redis_url = redis_url
+        self.redis_ttl = redis_ttl
+        self._entries: "OrderedDict[ScoreKey, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_failed = False
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def redis(self):
+        if self._redis is None and self.redis_url and not self._redis_failed:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(self.redis_url)
+            except Exception:
+                # Redis is an optional tier; keep serving from the LRU
+                logger.exception("Score cache Redis tier unavailable")
+                self._redis_failed = True
+        return self._redis
+
+    def _put_local(self, key: ScoreKey, score: float) -> None:
+        self._entries[key] = score
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, keys: Iterable[ScoreKey]) -> Dict[ScoreKey, float]:
+        """Cached scores for whichever of `keys` are cached."""
+        found: Dict[ScoreKey, float] = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                score = self._entries.get(key)
+                if score is None:
+                    missing.append(key)
+                else:
+                    self._entries.move_to_end(key)
+                    found[key] = score
+            self.local_hits += len(found)
+
+        if missing and self.redis is not None:
+            by_hash: Dict[str, list] = {}
+            for key in missing:
+                by_hash.setdefault(_redis_key(key), []).append(key)
+            try:
+                pipe = self.redis.pipeline()
+                for redis_key, hash_keys in by_hash.items():
+                    pipe.hmget(redis_key, [_field(k) for k in hash_keys])
+                results = pipe.execute()
+            except Exception:
+                logger.exception("Score cache Redis read failed")
+                results = []
+            with self._lock:
+                for hash_keys, values in zip(by_hash.values(), results):
+                    for key, value in zip(hash_keys, values):
+                        if value is not None:
+                            score = float(value)
+                            found[key] = score
+                            self._put_local(key, score)
+                            self.redis_hits += 1
+
+        with self._lock:
+            self.misses += sum(1 for key in missing if key not in found)
+        return found
+
+    def set_many(self, scores: Dict[ScoreKey, float]) -> None:
+        if not scores:
+            return
+        with self._lock:
+            for key, score in scores.items():
+                self._put_local(key, score)
+        if self.redis is None:
+            return
+        by_hash: Dict[str, Dict[str, float]] = {}
+        for key, score in scores.items():
+            by_hash.setdefault(_redis_key(key), {})[_field(key)] = score
+        try:
+            pipe = self.redis.pipeline()
+            for redis_key, fields in by_hash.items():
+                pipe.hset(redis_key, mapping=fields)
+                # The day is part of the key, so writes stop after midnight
+                # and the hash outlives its day by at most the TTL
+                pipe.expire(redis_key, self.redis_ttl)
+            pipe.execute()
+        except Exception:
+            logger.exception("Score cache Redis write failed")
+
+    def evict_renter(self, renter_id: int) -> None:
+        """
+        Drop every locally cached score of a renter (their preferences
+        changed). Their Redis hash is keyed by the old renter version, so it
+        is no longer read and expires on its own.
+        """
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == renter_id]
+            for key in stale:
+                del self._entries[key]
+            self.evictions += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "redis": self.redis is not None,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.local_hits + self.redis_hits) / lookups, 4) if lookups else None,
+        }
+
+
+_score_cache: Optional[ScoreCache] = None
+
+
+def get_score_cache() -> ScoreCache:
+    """Process-wide cache configured from settings (created on first use)."""
+    global _score_cache
+    if _score_cache is None:
+        from app.core.config import settings
+        _score_cache = ScoreCache(
+            maxsize=settings.SCORE_CACHE_SIZE,
+            redis_url=settings.SCORE_CACHE_REDIS_URL,
+            redis_ttl=settings.SCORE_CACHE_TTL_S,
+        )
+    return _score_cache
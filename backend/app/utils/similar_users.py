@@ -0,0 +1,254 @@
+# app/utils/similar_users.py
+"""
+MinHash / LSH index for collaborative filtering.
+
+Replaces the brute-force scan in app.utils.ml_match.find_similar_users for
+batch jobs: the index is built once per matching run and each lookup only
+re-ranks the renters that share an LSH bucket, instead of every renter.
+"""
+
+import hashlib
+import random
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+
+SIMILARITY_THRESHOLD = 0.3  # same cut-off as find_similar_users
+
+_PRIME = np.uint64((1 << 31) - 1)
+
+
+def load_saved_listing_ids(db, user_ids: Optional[Iterable[int]] = None) -> Dict[int, Set[int]]:
+    """Saved listing ids per user, in a single query."""
+    from app.db.models import SavedListing
+
+    query = db.query(SavedListing.user_id, SavedListing.listing_id)
+    if user_ids is not None:
+        query = query.filter(SavedListing.user_id.in_(list(user_ids)))
+    saved: Dict[int, Set[int]] = {}
+    for user_id, listing_id in query.all():
+        saved.setdefault(user_id, set()).add(listing_id)
+    return saved
+
+
+def preference_similarity(amenities_a: Set, locations_a: Set, amenities_b: Set, locations_b: Set) -> float:
+    """Mean of the amenity and location Jaccard overlaps (as in find_similar_users)."""
+    amenity_overlap = len(amenities_a & amenities_b) / max(1, len(amenities_a | amenities_b))
+    location_overlap = len(locations_a & locations_b) / max(1, len(locations_a | locations_b))
+    return (amenity_overlap + location_overlap) / 2
+
+
+class SimilarUserIndex:
+    """
+    Two MinHash signatures per renter (amenities, locations), each split
+    into LSH bands. Two renters become candidates when any band matches;
+    candidates are then scored exactly, so returned similarities are exact
+    and only recall is approximate.
+
+    With rows_per_band=2 and 32 bands a pair whose amenity or location
+    Jaccard is 0.3 collides with probability ~0.95 (~0.9999 at 0.5).
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        rows_per_band: int = 2,
+        seed: int = 1,
+    ):
+        if num_perm % rows_per_band:
+            raise ValueError("num_perm must be a multiple of rows_per_band")
+        self.num_perm = num_perm
+        self.rows_per_band = rows_per_band
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_PRIME), size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, int(_PRIME), size=num_perm).astype(np.uint64)
+        self._token_hashes: Dict[str, int] = {}
+
+        self.user_ids: List[int] = []
+        self.amenities: List[frozenset] = []
+        self.locations: List[frozenset] = []
+        self.saved_listing_ids: Dict[int, Set[int]] = {}
+        self._position: Dict[int, int] = {}
+        self._buckets: Dict[tuple, List[int]] = {}
+
+    @classmethod
+    def build(
+        cls,
+        renters: Sequence,
+        saved_listing_ids: Optional[Dict[int, Set[int]]] = None,
+        **kwargs,
+    ) -> "SimilarUserIndex":
+        index = cls(**kwargs)
+        for renter in renters:
+            index.add(renter)
+        index.saved_listing_ids = saved_listing_ids or {}
+        return index
+
+    def _hash(self, token: str) -> int:
+        value = self._token_hashes.get(token)
+        if value is None:
+            digest = hashlib.blake2b(str(token).encode(), digest_size=8).digest()
+            value = int.from_bytes(digest, "big") % int(_PRIME)
+            self._token_hashes[token] = value
+        return value
+
+    def signature(self, tokens: Set) -> Optional[np.ndarray]:
+        if not tokens:
+            return None
+        hashes = np.fromiter((self._hash(t) for t in tokens), dtype=np.uint64, count=len(tokens))
+        return ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def _band_keys(self, part: str, tokens: Set) -> List[tuple]:
+        sig = self.signature(tokens)
+        if sig is None:
+            # Empty sets never contribute overlap, so they are not bucketed
+            return []
+        r = self.rows_per_band
+        return [(part, band, sig[band * r:(band + 1) * r].tobytes()) for band in range(self.num_perm // r)]
+
+    def add(self, renter) -> None:
+        user_id = getattr(renter, 'user_id', None)
+        amenities = frozenset(getattr(renter, 'amenities', []) or [])
+        locations = frozenset(getattr(renter, 'locations', []) or [])
+        position = len(self.user_ids)
+        self.user_ids.append(user_id)
+        self.amenities.append(amenities)
+        self.locations.append(locations)
+        self._position[user_id] = position
+        for key in self._band_keys('a', amenities) + self._band_keys('l', locations):
+            self._buckets.setdefault(key, []).append(position)
+
+    def _candidates(self, amenities: Set, locations: Set) -> Set[int]:
+        candidates: Set[int] = set()
+        for key in self._band_keys('a', amenities) + self._band_keys('l', locations):
+            candidates.update(self._buckets.get(key, ()))
+        return candidates
+
+    def _rank(self, user_id, amenities, locations, positions: Iterable[int], limit: int) -> List[Dict]:
+        scored = []
+        for pos in positions:
+            if self.user_ids[pos] == user_id:
+                continue
+            similarity = preference_similarity(amenities, locations, self.amenities[pos], self.locations[pos])
+            if similarity > SIMILARITY_THRESHOLD:
+                scored.append((similarity, pos))
+        # Highest similarity first; ties keep insertion order like find_similar_users
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [
+            {
+                'user_id': self.user_ids[pos],
+                'similarity': similarity,
+                'saved_listing_ids': sorted(self.saved_listing_ids.get(self.user_ids[pos], ())),
+            }
+            for similarity, pos in scored[:limit]
+        ]
+
+    def query(self, renter_prefs, limit: int = 10) -> List[Dict]:
+        """Approximate top-`limit` similar renters, same output shape as find_similar_users."""
+        amenities = set(getattr(renter_prefs, 'amenities', []) or [])
+        locations = set(getattr(renter_prefs, 'locations', []) or [])
+        positions = self._candidates(amenities, locations)
+        return self._rank(getattr(renter_prefs, 'user_id', None), amenities, locations, positions, limit)
+
+    def exact_query(self, renter_prefs, limit: int = 10) -> List[Dict]:
+        """Brute-force scan over the indexed renters (in memory, no queries)."""
+        amenities = set(getattr(renter_prefs, 'amenities', []) or [])
+        locations = set(getattr(renter_prefs, 'locations', []) or [])
+        return self._rank(
+            getattr(renter_prefs, 'user_id', None), amenities, locations, range(len(self.user_ids)), limit
+        )
+
+
+def _recall(approx: List[Dict], exact: List[Dict]) -> Optional[float]:
+    # Users tied with the k-th exact result are interchangeable, so compare
+    # similarity multisets rather than ids.
+    if not exact:
+        return None
+    expected = sorted(round(u['similarity'], 9) for u in exact)
+    found = sorted(round(u['similarity'], 9) for u in approx)
+    hits = 0
+    for value in found:
+        if value in expected:
+            expected.remove(value)
+            hits += 1
+    return hits / len(exact)
+
+
+def check_recall(db, limit: int = 10, sample_size: int = 50, seed: int = 0) -> Dict:
+    """
+    Compare the LSH index with the brute-force find_similar_users on a
+    random sample of renters from the database.
+    """
+    from app.db.models import RenterPreferences
+    from app.utils.ml_match import find_similar_users
+
+    renters = db.query(RenterPreferences).all()
+    index = SimilarUserIndex.build(renters, load_saved_listing_ids(db))
+    sample = random.Random(seed).sample(renters, min(sample_size, len(renters)))
+
+    recalls = []
+    for renter in sample:
+        value = _recall(index.query(renter, limit), find_similar_users(db, renter, limit=limit))
+        if value is not None:
+            recalls.append(value)
+    return {
+        'renters': len(renters),
+        'sampled': len(sample),
+        'mean_recall': sum(recalls) / len(recalls) if recalls else None,
+        'min_recall': min(recalls) if recalls else None,
+    }
+
+
+class _SyntheticRenter:
+    def __init__(self, user_id, amenities, locations):
+        self.user_id = user_id
+        self.amenities = amenities
+        self.locations = locations
+
+
+def synthetic_renters(n: int, seed: int = 0) -> List[_SyntheticRenter]:
+    """Renters drawn around a few hundred preference 'archetypes' so similar users exist."""
+    rng = random.Random(seed)
+    amenity_vocab = [f"amenity-{i}" for i in range(60)]
+    location_vocab = [f"neighborhood-{i}" for i in range(400)]
+    archetypes = [
+        (rng.sample(amenity_vocab, 5), rng.sample(location_vocab, 3)) for _ in range(max(1, n // 200))
+    ]
+    renters = []
+    for user_id in range(n):
+        amenities, locations = rng.choice(archetypes)
+        amenities = rng.sample(amenities, rng.randint(2, 5)) + rng.sample(amenity_vocab, rng.randint(0, 2))
+        locations = rng.sample(locations, rng.randint(1, 3)) + rng.sample(location_vocab, rng.randint(0, 1))
+        renters.append(_SyntheticRenter(user_id, amenities, locations))
+    return renters
+
+
+def benchmark(n_renters: int, n_queries: int = 50, limit: int = 10, seed: int = 0) -> Dict:
+    """Build + query timings for the LSH index against the in-memory brute-force scan."""
+    renters = synthetic_renters(n_renters, seed)
+    started = time.perf_counter()
+    index = SimilarUserIndex.build(renters)
+    build_s = time.perf_counter() - started
+
+    queries = random.Random(seed + 1).sample(renters, min(n_queries, n_renters))
+    started = time.perf_counter()
+    approx = [index.query(r, limit) for r in queries]
+    lsh_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    started = time.perf_counter()
+    exact = [index.exact_query(r, limit) for r in queries]
+    exact_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    recalls = [v for v in (_recall(a, e) for a, e in zip(approx, exact)) if v is not None]
+    return {
+        'renters': n_renters,
+        'build_s': round(build_s, 2),
+        'lsh_query_ms': round(lsh_ms, 2),
+        'exact_query_ms': round(exact_ms, 2),
+        'mean_recall': round(sum(recalls) / len(recalls), 3) if recalls else None,
+    }
+
+
+if __name__ == "__main__":
+    for n in (10_000, 100_000):
+        print(benchmark(n))
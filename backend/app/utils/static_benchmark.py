@@ -0,0 +1,126 @@
+# app/utils/static_benchmark.py
+"""
+Bytes and requests a browser spends on a listing's media, served by plain
+StaticFiles (baseline) and by MediaFiles (app.core.static):
+
+- first visit: every file downloaded;
+- repeat visit: what the browser cache still has to ask for;
+- resume: finishing a download of the floor-plan PDF cut off half-way.
+
+The browser is modelled as an HTTP cache that reuses fresh entries
+(Cache-Control max-age) and revalidates stale ones with If-None-Match.
+Responses without Cache-Control are revalidated. Runs in-process on
+synthetic files in a temporary directory:
+    python -m app.utils.static_benchmark
+"""
+
+import gzip
+import hashlib
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+
+def build_media(directory: Path, n_images: int, image_bytes: int, seed: int = 0) -> List[str]:
+    """Content-addressed images and a PDF with a .gz sibling; returns their URLs."""
+    rng = random.Random(seed)
+    files = [b"\xff\xd8\xff\xe0" + rng.randbytes(image_bytes) for _ in range(n_images)]
+    words = ["bedroom", "kitchen", "bath", "closet", "living", "hall", "sq ft", "window"]
+    pdf = b"%PDF-1.4\n" + " ".join(rng.choice(words) for _ in range(400_000)).encode()
+    urls = []
+    for content, ext in [(f, "jpg") for f in files] + [(pdf, "pdf")]:
+        sha = hashlib.sha256(content).hexdigest()
+        path = directory / "blobs" / sha[:2] / f"{sha}.{ext}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        if ext == "pdf":
+            path.with_name(path.name + ".gz").write_bytes(gzip.compress(content, 9))
+        urls.append(f"/static/blobs/{sha[:2]}/{sha}.{ext}")
+    return urls
+
+
+class BrowserCache:
+    def __init__(self, client):
+        self.client = client
+        self.entries: Dict[str, dict] = {}
+        self.requests = 0
+        self.bytes = 0
+
+    def _send(self, url: str, headers: dict):
+        response = self.client.get(url, headers={"accept-encoding": "gzip", **headers})
+        self.requests += 1
+        self.bytes += response.num_bytes_downloaded
+        return response
+
+    def get(self, url: str, now: float) -> None:
+        entry = self.entries.get(url)
+        if entry and entry["fresh_until"] > now:
+            return
+        headers = {"if-none-match": entry["etag"]} if entry and entry["etag"] else {}
+        response = self._send(url, headers)
+        if response.status_code == 304:
+            entry["fresh_until"] = self._fresh_until(response, now)
+            return
+        response.raise_for_status()
+        self.entries[url] = {"etag": response.headers.get("etag"), "fresh_until": self._fresh_until(response, now)}
+
+    def resume(self, url: str, received: int) -> None:
+        """Fetch the rest of a download cut off after `received` bytes."""
+        response = self._send(url, {"range": f"bytes={received}-"})
+        response.raise_for_status()
+
+    @staticmethod
+    def _fresh_until(response, now: float) -> float:
+        cache_control = response.headers.get("cache-control", "")
+        match = re.search(r"max-age=(\d+)", cache_control)
+        if not match or "no-cache" in cache_control:
+            return 0.0
+        return now + int(match.group(1))
+
+
+def _visits(app, urls: List[str], resume_url: str, resume_at: int) -> Dict:
+    from fastapi.testclient import TestClient
+
+    client = TestClient(app)
+    result = {}
+    browser = BrowserCache(client)
+    now = time.time()
+    for visit, at in (("first", now), ("repeat", now + 3600)):
+        browser.requests = browser.bytes = 0
+        for url in urls:
+            browser.get(url, at)
+        result[f"{visit}_requests"] = browser.requests
+        result[f"{visit}_bytes"] = browser.bytes
+    browser.requests = browser.bytes = 0
+    browser.resume(resume_url, resume_at)
+    result["resume_bytes"] = browser.bytes
+    return result
+
+
+def benchmark(n_images: int = 24, image_bytes: int = 250_000, seed: int = 0) -> Dict:
+    from fastapi import FastAPI
+    from fastapi.staticfiles import StaticFiles
+
+    from app.core.static import MediaFiles
+
+    with tempfile.TemporaryDirectory() as directory:
+        urls = build_media(Path(directory), n_images, image_bytes, seed)
+        pdf = Path(directory) / urls[-1][len("/static/"):]
+        resume_at = pdf.stat().st_size // 2
+
+        baseline = FastAPI()
+        baseline.mount("/static", StaticFiles(directory=directory), name="static")
+        media = FastAPI()
+        media.mount("/static", MediaFiles(directory=directory, immutable=("blobs",)), name="static")
+        return {
+            "files": len(urls),
+            "baseline": _visits(baseline, urls, urls[-1], resume_at),
+            "media": _visits(media, urls, urls[-1], resume_at),
+        }
+
+
+if __name__ == "__main__":
+    print(benchmark())
@@ -0,0 +1,114 @@
+# app/utils/tags.py
+"""
+Listing amenities and tags in indexable form.
+
+The JSON list columns stay the source of truth. The listing write path
+(app.crud.listings) derives two indexed forms from them:
+
+- listing_tags rows: one (listing_id, kind, value) row per normalized
+  value. Containment filters ("has parking and laundry") become index
+  lookups.
+- amenity_mask / feature_mask: one bit per value of a controlled
+  vocabulary. The batch matcher computes overlap as popcount(renter & listing).
+
+Bit positions are persisted, so the vocabularies are append-only: add new
+values at the end (at most 63 per vocabulary). Values outside the
+vocabulary get no bit. The matcher counts them separately, which keeps
+scores exact. Masks stored before a value was appended lack its bit; the
+matcher adds it when encoding listings, and a migration re-running the
+backfill brings the stored masks up to date.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# listing_tags.kind -> listing JSON column
+TAG_KINDS = {
+    "amenity": "amenities",
+    "feature": "building_features",
+    "tag": "custom_tags",
+    "neighborhood": "neighborhood_profile",
+}
+MAX_TAG_LENGTH = 128
+
+# Options offered by the listing form and the renter preference form
+AMENITY_VOCABULARY = [
+    "Parking", "WiFi", "Laundry", "Garden", "Gym", "Air Conditioning", "Dishwasher",
+    "Security System", "Pool", "Heating", "Balcony", "Pet Friendly", "Furnished",
+    "Utilities included", "High-speed internet", "Security system", "Smart home features",
+    "Washer/dryer in unit", "Central air conditioning", "Hardwood floors", "Modern appliances",
+    "Storage space", "Good natural light", "Soundproof walls", "Open floor plan",
+    "Walk-in closets", "Updated kitchen", "Updated bathroom", "Energy efficient", "Elevator",
+    "Package receiving", "Maintenance included", "Close to public transit", "Close to shopping",
+    "Close to parks", "Quiet neighborhood", "Safe neighborhood", "Family-friendly",
+    "Professional community", "Student-friendly",
+]
+FEATURE_VOCABULARY = [
+    "Hardwood Floors", "Walk-in Closet", "Updated Kitchen", "Storage Space",
+    "Stainless Appliances", "Fireplace", "Modern Bathroom", "Granite Counters",
+    "High Ceilings", "Natural Light", "Gym", "Pool", "Security system", "Elevator",
+    "Package receiving", "Maintenance included", "Bike storage", "Business center",
+    "Community room", "Outdoor space", "Rooftop deck", "BBQ area", "Pet wash station",
+    "Electric car charging", "Smart access control", "High-speed internet infrastructure",
+    "Trash chute", "Recycling systems", "On-site maintenance", "On-site manager",
+]
+
+AMENITY_BITS: Dict[str, int] = {value: bit for bit, value in enumerate(AMENITY_VOCABULARY)}
+FEATURE_BITS: Dict[str, int] = {value: bit for bit, value in enumerate(FEATURE_VOCABULARY)}
+assert len(AMENITY_BITS) == len(AMENITY_VOCABULARY) <= 63
+assert len(FEATURE_BITS) == len(FEATURE_VOCABULARY) <= 63
+
+
+def normalize_tag(value) -> str:
+    """Form of a value stored in (and looked up from) listing_tags."""
+    return " ".join(str(value or "").split()).lower()[:MAX_TAG_LENGTH]
+
+
+def split_mask(values: Optional[Iterable], bits: Dict[str, int]) -> Tuple[int, frozenset]:
+    """(bitmask of the in-vocabulary values, the other values). Values match exactly, as in the matcher."""
+    mask = 0
+    extras = set()
+    for value in values or []:
+        bit = bits.get(value)
+        if bit is None:
+            extras.add(value)
+        else:
+            mask |= 1 << bit
+    return mask, frozenset(extras)
+
+
+def tag_mask(values: Optional[Iterable], bits: Dict[str, int]) -> int:
+    return split_mask(values, bits)[0]
+
+
+def listing_tag_values(listing) -> Dict[str, List[str]]:
+    """{kind: sorted distinct normalized values} for a listing."""
+    result = {}
+    for kind, column in TAG_KINDS.items():
+        values = {normalize_tag(v) for v in (getattr(listing, column, None) or [])}
+        values.discard("")
+        result[kind] = sorted(values)
+    return result
+
+
+if hasattr(np, "bitwise_count"):
+    def popcount(values: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(values)
+else:
+    _BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(values: np.ndarray) -> np.ndarray:
+        values = np.ascontiguousarray(values, dtype=np.uint64)
+        counts = _BYTE_POPCOUNT[values.view(np.uint8)].reshape(values.shape + (8,))
+        return counts.sum(axis=-1, dtype=np.uint8)
+
+
+def mask_array(masks: Sequence[int]) -> np.ndarray:
+    return np.array(masks, dtype=np.uint64)
+
+
+def mask_bits(masks: np.ndarray, width: int) -> np.ndarray:
+    """(n, width) 0/1 float matrix of the low `width` bits of each mask."""
+    shifts = np.arange(width, dtype=np.uint64)
+    return ((masks[:, None] >> shifts) & np.uint64(1)).astype(np.float64)
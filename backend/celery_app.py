@@ -6,6 +6,8 @@ celery = Celery(
     __name__,
     broker=settings.REDIS_URL,
     backend=settings.REDIS_URL,
+    include=["app.services.matching", "app.services.geocoding", "app.services.images", "app.services.upload_store",
+             "app.services.upload_sessions"],
 )
 
 celery.conf.beat_schedule = {
@@ -14,5 +16,29 @@ celery.conf.beat_schedule = {
         "schedule": 60 * 60 * 24,  # every 24 hours
         # Or use crontab: "schedule": crontab(hour=2, minute=0)
     },
+    "refresh-listing-scores": {
+        "task": "app.services.matching.refresh_all_listing_scores",
+        "schedule": 60 * 60 * 24,  # upper bound on sort-by-match staleness
+    },
+    "geocode-missing-listings": {
+        "task": "app.services.geocoding.geocode_missing_listings",
+        "schedule": 60 * 60,  # backfill coordinates the write-time task missed
+    },
+    "generate-missing-image-variants": {
+        "task": "app.services.images.generate_missing_image_variants",
+        "schedule": 60 * 60,  # backfill derivatives the write-time task missed
+    },
+    "collect-orphaned-uploads": {
+        "task": "app.services.upload_store.collect_orphaned_uploads",
+        "schedule": 60 * 60 * 24,  # delete upload blobs no listing or user references
+    },
+    "expire-upload-sessions": {
+        "task": "app.services.upload_sessions.expire_upload_sessions",
+        "schedule": 60 * 60,  # drop abandoned resumable uploads and their chunks
+    },
+    "rebuild-listing-index": {
+        "task": "app.services.matching.rebuild_listing_index",
+        "schedule": 60 * 60 * 6,  # re-cluster the semantic listing index
+    },
 }
 celery.conf.timezone = "UTC"
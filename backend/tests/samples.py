@@ -0,0 +1,78 @@
+"""Random renters, listings and landlord preferences for matcher tests (plain dicts, like API payloads)."""
+
+import random
+from typing import Dict
+
+from app.utils.batch_match import compute_score_matrix
+from app.utils.match import compute_compatibility_score
+
+AMENITIES = ["Parking", "WiFi", "Laundry", "Garden", "Gym", "Pool", "Heating", "Balcony"]
+FEATURES = ["Hardwood Floors", "Fireplace", "Storage Space", "High Ceilings"]
+TAGS = ["quiet", "near campus", "sunny", "renovated", "furnished"]
+LOCATIONS = ["Downtown", "Midtown", "Uptown", "Suburbs", "Collegetown", ""]
+MOVE_IN = ["", "ASAP", "immediately", "Flexible", "next month", "2025-09", "june"]
+SMOKING = [None, "", "No smoking", "Non-smoking", "Smoker friendly", "smoking ok", "outside only"]
+TENANT_PREFS = ["No smoking", "No pets", "Students", "Professionals"]
+
+
+def _maybe(rng: random.Random, value, p_none=0.15):
+    return None if rng.random() < p_none else value
+
+
+def random_listing(rng: random.Random, listing_id: int, landlord_id: int) -> Dict:
+    return {
+        "id": listing_id,
+        "landlord_id": landlord_id,
+        "rent_price": _maybe(rng, rng.choice([0, 600, 950, 1200, 1500, 2200, 3100])),
+        "location": _maybe(rng, rng.choice(["123 Downtown Ave", "Midtown Loft", "Uptown", "Ithaca, NY"])),
+        "neighborhood_type": _maybe(rng, rng.choice(LOCATIONS)),
+        "neighborhood_profile": rng.sample(["Downtown", "Urban", "Suburbs", "Historic"], rng.randint(0, 2)),
+        "bedrooms": _maybe(rng, rng.randint(0, 4)),
+        "bathrooms": _maybe(rng, rng.randint(0, 3)),
+        "amenities": rng.sample(AMENITIES + ["Sauna"], rng.randint(0, 5)),
+        "building_features": rng.sample(FEATURES, rng.randint(0, 3)),
+        "lease_length": _maybe(rng, rng.choice([0, 6, 12, 18, 24])),
+        "available_from": _maybe(rng, rng.choice(["", "2025-09-01", "June 1st", "Immediately", "next month"])),
+        "pets_allowed": _maybe(rng, rng.random() < 0.5),
+        "max_occupants": _maybe(rng, rng.randint(0, 5)),
+        "custom_tags": rng.sample(TAGS, rng.randint(0, 3)),
+    }
+
+
+def random_renter(rng: random.Random, user_id: int) -> Dict:
+    budget_min = rng.choice([0, 500, 900, 1400, 2500])
+    return {
+        "user_id": user_id,
+        "budget_min": budget_min,
+        "budget_max": rng.choice([0, budget_min, budget_min + 300, budget_min + 1000, max(0, budget_min - 200)]),
+        "locations": rng.sample(LOCATIONS, rng.randint(0, 3)),
+        "bedrooms": _maybe(rng, rng.randint(0, 4)),
+        "bathrooms": _maybe(rng, rng.randint(0, 3)),
+        "amenities": rng.sample(AMENITIES + ["Sauna"], rng.randint(0, 4)),
+        "building_amenities": rng.sample(FEATURES, rng.randint(0, 2)),
+        "lease_length": _maybe(rng, rng.choice([0, 6, 12, 24])),
+        "move_in_date": _maybe(rng, rng.choice(MOVE_IN)),
+        "pets_allowed": _maybe(rng, rng.random() < 0.5),
+        "smoking_preference": rng.choice(SMOKING),
+        "household_size": _maybe(rng, rng.randint(1, 6)),
+        "custom_preferences": rng.sample(TAGS + ["pool table"], rng.randint(0, 3)),
+    }
+
+
+def random_landlord_prefs(rng: random.Random, n_landlords: int = 20) -> Dict[int, Dict]:
+    """Preferences for about 70% of landlords 1..n_landlords, by landlord id."""
+    prefs = {}
+    for landlord_id in range(1, n_landlords + 1):
+        if rng.random() < 0.7:
+            prefs[landlord_id] = {"tenant_preferences": rng.sample(TENANT_PREFS, rng.randint(0, 3))}
+    return prefs
+
+
+def assert_batch_matches_scalar(renters, listings, landlord_prefs) -> None:
+    """compute_score_matrix equals compute_compatibility_score for every (renter, listing) pair."""
+    batch = compute_score_matrix(renters, listings, landlord_prefs)
+    assert batch.shape == (len(renters), len(listings))
+    for i, renter in enumerate(renters):
+        for j, listing in enumerate(listings):
+            expected = compute_compatibility_score(renter, landlord_prefs.get(listing["landlord_id"]), listing)
+            assert batch[i, j] == expected, (renter, listing)
@@ -0,0 +1,66 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from app.utils.batch_match import compute_score_matrix, top_k_indices
+from app.utils.tags import AMENITY_BITS, AMENITY_VOCABULARY, FEATURE_BITS, tag_mask
+from samples import assert_batch_matches_scalar, random_landlord_prefs, random_listing, random_renter
+
+OOV_AMENITIES = ["Sauna", "Wine cellar", "Bowling alley"]
+MOVE_IN_PREFS = ["ASAP", "immediately", "Flexible", "flexible", "next month", "", None]
+
+
+def _catalog(seed: int, n_renters: int = 60, n_listings: int = 90):
+    rng = random.Random(seed)
+    today = date.today()
+    landlord_prefs = random_landlord_prefs(rng)
+    listings = []
+    for i in range(n_listings):
+        listing = random_listing(rng, i, rng.randint(1, 20))
+        listing["amenities"] += rng.sample(OOV_AMENITIES, rng.randint(0, 2))
+        if rng.random() < 0.5:
+            # As stored on ORM rows; None is a listing without a parsable date
+            listing["available_date"] = rng.choice([None, today, today + timedelta(days=rng.randint(-30, 120))])
+        listings.append(listing)
+    renters = []
+    for i in range(n_renters):
+        renter = random_renter(rng, i)
+        renter["amenities"] += rng.sample(OOV_AMENITIES, rng.randint(0, 1))
+        renter["move_in_date"] = rng.choice(MOVE_IN_PREFS + [renter["move_in_date"]])
+        renters.append(renter)
+    return renters, listings, landlord_prefs
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_scores_equal_scalar_scores(seed):
+    renters, listings, landlord_prefs = _catalog(seed)
+    assert any(set(l["amenities"]) & set(OOV_AMENITIES) for l in listings)
+    assert any(r["move_in_date"] in ("ASAP", "immediately", "Flexible") for r in renters)
+    assert_batch_matches_scalar(renters, listings, landlord_prefs)
+
+
+@pytest.mark.parametrize("stale", [False, True])
+def test_stored_masks_score_like_values(stale):
+    renters, listings, landlord_prefs = _catalog(7)
+    for listing in listings:
+        amenities = listing["amenities"]
+        if stale:
+            # Written before the vocabulary had the later half of its values
+            cutoff = len(AMENITY_VOCABULARY) // 2
+            amenities = [value for value in amenities if AMENITY_BITS.get(value, cutoff) < cutoff]
+        listing["amenity_mask"] = tag_mask(amenities, AMENITY_BITS)
+        listing["feature_mask"] = 0 if stale else tag_mask(listing["building_features"], FEATURE_BITS)
+    assert_batch_matches_scalar(renters, listings, landlord_prefs)
+
+
+def test_empty_inputs():
+    renters, listings, landlord_prefs = _catalog(0, n_renters=3, n_listings=4)
+    assert compute_score_matrix([], listings, landlord_prefs).shape == (0, 4)
+    assert compute_score_matrix(renters, [], landlord_prefs).shape == (3, 0)
+
+
+def test_top_k_indices_orders_by_score_then_position():
+    scores = compute_score_matrix(*_catalog(3, n_renters=1, n_listings=50))[0]
+    top = top_k_indices(scores, 10)
+    assert top == sorted(range(len(scores)), key=lambda j: (-scores[j], j))[:10]
@@ -101,7 +101,7 @@ export default function CreateListingForm({ edit = false, initialFields = {}, on
       const formData = new FormData();
       formData.append("file", file);
       const res = await axios.post("/api/listings/upload-image", formData, {
-        headers: { "Content-Type": "multipart/form-data" }
+        headers: { "Content-Type": "multipart/form-data", Authorization: `Bearer ${user?.accessToken}` }
       });
       uploadedUrls.push(res.data.url);
     }